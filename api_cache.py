@@ -0,0 +1,137 @@
+"""
+Persistent cache of post API responses, keyed by shortcode.
+
+The same post is often asked for more than once: in the likes/views
+pre-scan, again in the download phase, and on every re-run or resume of a
+target. Entries are served from disk while fresh, revalidated with
+If-None-Match / If-Modified-Since once their TTL runs out (when the server
+sent a validator), and the least recently used ones are evicted past
+`max_entries`.
+
+Post JSON carries signed CDN URLs (`oe=` is their hex expiry), so an entry
+never outlives the earliest of them, whatever the TTL.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_ENTRIES = 20000
+# Margin before a signed URL's expiry: the download may start minutes later
+URL_EXPIRY_MARGIN = 600
+
+_OE_RE = re.compile(r"[?&]oe=([0-9A-Fa-f]{8})")
+_SHORTCODE_RE = re.compile(r"/(?:p|reel|tv)/([\w-]+)")
+
+
+def shortcode_of(url):
+    match = _SHORTCODE_RE.search(url or "")
+    return match.group(1) if match else None
+
+
+def url_expiry(body):
+    """Earliest `oe=` expiry (epoch seconds) among the signed URLs in `body`, or None."""
+    stamps = [int(h, 16) for h in _OE_RE.findall(body)]
+    return min(stamps) if stamps else None
+
+
+class ApiCache:
+    """
+    SQLite-backed TTL/LRU cache. lookup() returns None (miss) or a dict
+    {'data', 'etag', 'last_modified', 'fresh'}; a stale entry is only
+    returned when it can be revalidated. Safe to share between threads.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " shortcode TEXT PRIMARY KEY,"
+            " body TEXT NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " expires_at REAL NOT NULL,"
+            " url_expires_at REAL,"
+            " used_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used_at)")
+        self._db.commit()
+
+    def lookup(self, shortcode):
+        now = self.clock()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, expires_at, url_expires_at FROM responses WHERE shortcode = ?",
+                (shortcode,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            body, etag, last_modified, expires_at, url_expires_at = row
+            urls_valid = url_expires_at is None or url_expires_at - URL_EXPIRY_MARGIN > now
+            fresh = expires_at > now and urls_valid
+            if not fresh and not (urls_valid and (etag or last_modified)):
+                # Nothing to revalidate with, or the media URLs are dead
+                self._db.execute("DELETE FROM responses WHERE shortcode = ?", (shortcode,))
+                self._db.commit()
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET used_at = ? WHERE shortcode = ?", (now, shortcode))
+            self._db.commit()
+            if fresh:
+                self.hits += 1
+        return {"data": json.loads(body), "etag": etag, "last_modified": last_modified, "fresh": fresh}
+
+    def store(self, shortcode, data, etag=None, last_modified=None):
+        now = self.clock()
+        body = json.dumps(data, ensure_ascii=False)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (shortcode, body, etag, last_modified, expires_at, url_expires_at, used_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (shortcode, body, etag, last_modified, now + self.ttl, url_expiry(body), now)
+            )
+            self._evict_locked()
+            self._db.commit()
+
+    def touch(self, shortcode):
+        """The server answered 304: the entry is good for another TTL."""
+        now = self.clock()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET expires_at = ?, used_at = ? WHERE shortcode = ?",
+                (now + self.ttl, now, shortcode)
+            )
+            self._db.commit()
+            self.revalidated += 1
+
+    def _evict_locked(self):
+        (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM responses WHERE shortcode IN"
+                " (SELECT shortcode FROM responses ORDER BY used_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
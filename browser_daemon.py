@@ -0,0 +1,220 @@
+"""
+Long-lived Chrome on the scraper profile that main.py attaches to.
+
+Cold-starting undetected-chromedriver costs 10-20 s per run (driver patch,
+Chrome launch, profile load). This keeps one Chrome running with its
+remote debugging port open on localhost, so `main.py --attach` only pays
+a sub-second chromedriver attach.
+
+    python3 browser_daemon.py start [--headless]   # launch in background
+    python3 browser_daemon.py run                  # foreground, relaunch on crash
+    python3 browser_daemon.py status
+    python3 browser_daemon.py stop
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import argparse
+import subprocess
+from urllib.request import urlopen
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIR = os.path.join(BASE_DIR, "chrome_profile")
+STATE_FILE = os.path.join(BASE_DIR, ".browser_daemon.json")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9222
+DEFAULT_ADDRESS = f"{DEFAULT_HOST}:{DEFAULT_PORT}"
+CHROME_CANDIDATES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+STARTUP_TIMEOUT = 20.0
+HEALTH_INTERVAL = 10.0
+# Consecutive failed health checks before `run` relaunches Chrome
+MAX_FAILED_CHECKS = 3
+
+
+def find_chrome():
+    for name in CHROME_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise RuntimeError("Chrome not found (see install_chrome.sh)")
+
+
+def chrome_command(port=DEFAULT_PORT, headless=False, mute_audio=True, profile_dir=PROFILE_DIR):
+    cmd = [
+        find_chrome(),
+        f"--user-data-dir={profile_dir}",
+        f"--remote-debugging-port={port}",
+        # Never expose DevTools (full control of the logged-in profile) beyond localhost
+        f"--remote-debugging-address={DEFAULT_HOST}",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--window-size=1920,1080",
+    ]
+    if headless:
+        cmd.append("--headless=new")
+    if mute_audio:
+        cmd.append("--mute-audio")
+    cmd.append("about:blank")
+    return cmd
+
+
+def health(address=DEFAULT_ADDRESS, timeout=1.0):
+    """Chrome's /json/version info if the DevTools endpoint answers, else None."""
+    try:
+        with urlopen(f"http://{address}/json/version", timeout=timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def wait_healthy(address, timeout=STARTUP_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = health(address)
+        if info:
+            return info
+        time.sleep(0.25)
+    return None
+
+
+def read_state():
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_state(state):
+    with open(STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except (OSError, TypeError):
+        return False
+
+
+def launch(port=DEFAULT_PORT, headless=False, mute_audio=True):
+    """Starts Chrome detached from this process. Returns the Popen."""
+    os.makedirs(PROFILE_DIR, mode=0o700, exist_ok=True)
+    os.chmod(PROFILE_DIR, 0o700)
+    proc = subprocess.Popen(
+        chrome_command(port, headless, mute_audio),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,  # survives the shell (and Ctrl+C) that started it
+    )
+    write_state({"pid": proc.pid, "port": port, "headless": headless, "started_at": time.time()})
+    return proc
+
+
+def start(port=DEFAULT_PORT, headless=False, mute_audio=True):
+    """
+    Makes sure a daemon Chrome answers on `port`, launching one if needed.
+    Returns its /json/version info. Raises RuntimeError if it won't come up.
+    """
+    address = f"{DEFAULT_HOST}:{port}"
+    info = health(address)
+    if info:
+        return info
+    proc = launch(port, headless, mute_audio)
+    info = wait_healthy(address)
+    if not info:
+        proc.terminate()
+        raise RuntimeError(f"Chrome did not open its debugging port {port} in {STARTUP_TIMEOUT:.0f}s")
+    return info
+
+
+def stop(timeout=10.0):
+    """Terminates the daemon Chrome. Returns True if one was running."""
+    state = read_state()
+    if not state or not pid_alive(state.get("pid")):
+        if state:
+            os.remove(STATE_FILE)
+        return False
+    os.kill(state["pid"], signal.SIGTERM)
+    deadline = time.monotonic() + timeout
+    while pid_alive(state["pid"]) and time.monotonic() < deadline:
+        time.sleep(0.2)
+    if pid_alive(state["pid"]):
+        os.kill(state["pid"], signal.SIGKILL)
+    os.remove(STATE_FILE)
+    return True
+
+
+def run(port=DEFAULT_PORT, headless=False, mute_audio=True, interval=HEALTH_INTERVAL):
+    """Foreground supervisor: health-checks Chrome and relaunches it when it dies or hangs."""
+    address = f"{DEFAULT_HOST}:{port}"
+    stopping = False
+
+    def on_signal(sig, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    failed = 0
+    start(port, headless, mute_audio)
+    print(f"[+] Browser daemon listening on {address}")
+    while not stopping:
+        time.sleep(interval)
+        if stopping:
+            break
+        state = read_state() or {}
+        if health(address, timeout=3.0):
+            failed = 0
+            continue
+        failed += 1
+        if failed < MAX_FAILED_CHECKS and pid_alive(state.get("pid")):
+            continue
+        print(f"[!] Chrome on {address} is not responding, relaunching...")
+        stop()
+        try:
+            start(port, headless, mute_audio)
+            failed = 0
+        except RuntimeError as e:
+            print(f"[!] Relaunch failed: {e}")
+    print("[*] Stopping browser daemon...")
+    stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent Chrome for main.py --attach")
+    parser.add_argument("command", choices=["start", "stop", "status", "run"])
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Remote debugging port (default: {DEFAULT_PORT})")
+    parser.add_argument("--headless", action="store_true", help="Run Chrome without a window")
+    parser.add_argument("--no-mute", action="store_false", dest="mute", help="Enable browser audio")
+    args = parser.parse_args()
+
+    if args.command == "start":
+        try:
+            info = start(args.port, args.headless, args.mute)
+        except RuntimeError as e:
+            print(f"[!] {e}")
+            sys.exit(1)
+        print(f"[+] {info.get('Browser', 'Chrome')} ready on {DEFAULT_HOST}:{args.port}")
+        print(f"    Attach with: python3 main.py <username> --attach {DEFAULT_HOST}:{args.port}")
+    elif args.command == "stop":
+        print("[+] Stopped." if stop() else "[*] Not running.")
+    elif args.command == "status":
+        state = read_state() or {}
+        info = health(f"{DEFAULT_HOST}:{args.port}")
+        if info:
+            print(f"[+] Healthy: {info.get('Browser')} on port {args.port} (pid {state.get('pid', '?')})")
+        else:
+            print(f"[!] No browser answering on port {args.port}")
+            sys.exit(1)
+    else:
+        run(args.port, args.headless, args.mute)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import threading
+import concurrent.futures
+
+
+class DownloadPool:
+    """
+    Bounded worker pool for media transfers.
+
+    The browser loop submits one job per post and moves on to the next page
+    while bytes are still arriving. `max_pending` caps how far navigation may
+    run ahead of the disk: once that many jobs are queued or running,
+    submit() blocks until a worker frees a slot.
+    """
+
+    def __init__(self, max_workers=4, max_pending=None, on_error=None):
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max_pending or self.max_workers * 2
+        self.on_error = on_error
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="download"
+        )
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._closed = False
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues fn(*args, **kwargs). Blocks while the pool is saturated."""
+        if self._closed:
+            raise RuntimeError("DownloadPool is already drained")
+
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._job_done)
+        return future
+
+    def _job_done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+        self._slots.release()
+
+        if future.cancelled():
+            return
+        err = future.exception()
+        if err and self.on_error:
+            self.on_error(err)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def drain(self, cancel_pending=False):
+        """
+        Waits for submitted jobs and shuts the workers down.
+        With cancel_pending=True (e.g. after Ctrl+C) jobs that have not started
+        yet are dropped; transfers already in flight always finish cleanly.
+        Returns the number of cancelled jobs.
+        """
+        cancelled = 0
+        if cancel_pending:
+            with self._lock:
+                queued = list(self._pending)
+            for future in queued:
+                if future.cancel():
+                    cancelled += 1
+
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        return cancelled
@@ -0,0 +1,185 @@
+"""
+Parallel Chrome workers, each on its own clone of the logged-in profile.
+
+Chrome locks a user-data-dir to a single instance, so the workers can't
+share `chrome_profile/`. Each one gets a snapshot of it (reflinked where the
+filesystem allows, copied otherwise) minus caches and lock files, pulls
+posts from a shared queue at its own pace and relaunches its browser when
+it crashes.
+"""
+import os
+import queue
+import shutil
+import threading
+import time
+
+import media_store
+
+# Caches are rebuilt by Chrome; Singleton* / lockfile would make the clone
+# look "in use" by the original browser
+PROFILE_IGNORE = (
+    "Cache", "Code Cache", "GPUCache", "ShaderCache", "GrShaderCache", "GraphiteDawnCache",
+    "DawnCache", "CacheStorage", "ScriptCache", "Crashpad",
+    "SingletonLock", "SingletonCookie", "SingletonSocket", "lockfile",
+)
+# Seconds between two navigations of the same worker
+DEFAULT_MIN_INTERVAL = 4.0
+# Relaunches per worker before it is retired
+MAX_RESTARTS = 3
+
+
+def _clone_file(src, dst):
+    try:
+        media_store.reflink(src, dst)
+        shutil.copystat(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+
+def clone_profile(src, dst):
+    """Replaces dst with a snapshot of the Chrome profile at src."""
+    if os.path.exists(dst):
+        shutil.rmtree(dst)
+    try:
+        shutil.copytree(
+            src, dst, symlinks=True,
+            ignore=shutil.ignore_patterns(*PROFILE_IGNORE),
+            copy_function=_clone_file,
+        )
+    except shutil.Error as e:
+        # Files Chrome holds open or deletes mid-copy; the rest is usable
+        print(f"    [!] Profile clone incomplete ({len(e.args[0])} files skipped)")
+    os.chmod(dst, 0o700)
+    return dst
+
+
+class DriverWorker:
+    """One browser on its own profile clone, with a navigation rate limit."""
+
+    def __init__(self, index, profile_dir, launch, min_interval=DEFAULT_MIN_INTERVAL):
+        self.index = index
+        self.profile_dir = profile_dir
+        self.launch = launch
+        self.min_interval = min_interval
+        self.driver = None
+        self.restarts = 0
+        self._last_item = 0.0
+
+    def start(self):
+        self.driver = self.launch(self.profile_dir)
+        return self
+
+    def restart(self):
+        self.close()
+        self.restarts += 1
+        return self.start()
+
+    def throttle(self):
+        """Sleeps until min_interval has passed since this worker's last item."""
+        wait = self._last_item + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_item = time.monotonic()
+
+    def close(self):
+        if self.driver is None:
+            return
+        listener = getattr(self.driver, "media_listener", None)
+        if listener:
+            listener.close()
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        self.driver = None
+
+
+class DriverPool:
+    """
+    N browser workers sharding a list of items.
+
+    `launch(profile_dir)` starts a driver; `crash_errors` are the exception
+    types meaning the browser itself died (the worker is relaunched and the
+    item re-queued once). Any other error is passed to `on_error`.
+    """
+
+    def __init__(self, size, base_profile, clone_root, launch, crash_errors=(),
+                 min_interval=DEFAULT_MIN_INTERVAL, on_error=None):
+        self.size = size
+        self.base_profile = base_profile
+        self.clone_root = clone_root
+        self.launch = launch
+        self.crash_errors = tuple(crash_errors)
+        self.min_interval = min_interval
+        self.on_error = on_error
+        self.workers = []
+
+    def start(self):
+        os.makedirs(self.clone_root, mode=0o700, exist_ok=True)
+        for i in range(self.size):
+            profile = clone_profile(self.base_profile, os.path.join(self.clone_root, f"worker_{i}"))
+            worker = DriverWorker(i, profile, self.launch, self.min_interval)
+            # Sequential on purpose: undetected-chromedriver patches its binary on launch
+            try:
+                self.workers.append(worker.start())
+            except Exception as e:
+                print(f"    [!] Browser worker {i} failed to start: {e}")
+        if not self.workers:
+            raise RuntimeError("No browser worker could be started")
+        return self
+
+    def run(self, items, handle, should_stop=None):
+        """
+        Calls handle(driver, item) for every item, spread over the workers.
+        Returns the number of items left unprocessed (stop requested, or
+        every worker retired).
+        """
+        todo = queue.Queue()
+        for item in items:
+            todo.put((item, 0))
+
+        threads = [
+            threading.Thread(target=self._work, args=(w, todo, handle, should_stop), name=f"driver-{w.index}", daemon=True)
+            for w in self.workers
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return todo.qsize()
+
+    def _work(self, worker, todo, handle, should_stop):
+        while not (should_stop and should_stop()):
+            try:
+                item, attempts = todo.get_nowait()
+            except queue.Empty:
+                return
+            worker.throttle()
+            try:
+                handle(worker.driver, item)
+            except self.crash_errors as e:
+                print(f"    [!] Browser worker {worker.index} crashed: {e}")
+                if attempts == 0:
+                    todo.put((item, 1))
+                elif self.on_error:
+                    self.on_error(e)
+                if worker.restarts >= MAX_RESTARTS:
+                    print(f"    [!] Browser worker {worker.index} retired after {worker.restarts} relaunches")
+                    worker.close()
+                    return
+                try:
+                    worker.restart()
+                except Exception as launch_error:
+                    print(f"    [!] Browser worker {worker.index} could not relaunch: {launch_error}")
+                    return
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+
+    def close(self, remove_clones=True):
+        for worker in self.workers:
+            worker.close()
+        if remove_clones:
+            # Clones hold live session cookies
+            shutil.rmtree(self.clone_root, ignore_errors=True)
@@ -1,13 +1,27 @@
 import os
 import undetected_chromedriver as uc
+import network_capture
 
-def get_driver(headless=False, mute_audio=False):
+# Persistent, logged-in profile in the scraper directory
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chrome_profile")
+
+def get_driver(headless=False, mute_audio=False, cdp_capture=True, profile_dir=None, block=()):
+    """
+    Starts Chrome on the persistent profile (or on `profile_dir`, e.g. a
+    DriverPool clone of it).
+    `block` lists resource categories to drop (see network_capture.BLOCK_CATEGORIES).
+    With cdp_capture (and websocket-client available) media responses are
+    collected by a MediaResponseListener exposed as `driver.media_listener`;
+    otherwise Chrome's performance log is enabled for get_log() polling
+    (`driver.perf_logs`). If the listener can't be attached, Chrome is
+    relaunched with the performance log so one capture path always exists.
+    """
+    use_cdp = cdp_capture and network_capture.websocket is not None
     options = uc.ChromeOptions()
     
     # 1. Profile Persistence
     # Use the 'chrome_profile' folder in the scraper directory
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    profile_dir = os.path.join(base_dir, "chrome_profile")
+    profile_dir = profile_dir or PROFILE_DIR
 
     # Secure the profile directory (chmod 700)
     if not os.path.exists(profile_dir):
@@ -20,8 +34,9 @@ def get_driver(headless=False, mute_audio=False):
     # but good for consistency if trying to stick to one profile.
     # options.add_argument("--profile-directory=Default")
     
-    # 2. Performance Logs (for capturing network traffic)
-    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    # 2. Performance Logs (for capturing network traffic, legacy path)
+    if not use_cdp:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
     
     # 3. Headless Mode
     if headless:
@@ -43,9 +58,81 @@ def get_driver(headless=False, mute_audio=False):
     except Exception:
         # Fails in some headless environments or if window not found immediately
         pass
-    
+
+    driver.media_listener = None
+    driver.perf_logs = not use_cdp
+    if use_cdp:
+        driver.media_listener = attach_media_listener(driver)
+        if driver.media_listener is None:
+            print("    [*] Relaunching Chrome with performance logging instead...")
+            driver.quit()
+            return get_driver(headless, mute_audio, cdp_capture=False, profile_dir=profile_dir, block=block)
+    apply_blocking(driver, block)
+
+    return driver
+
+def attach_driver(debugger_address, cdp_capture=True, block=()):
+    """
+    Attaches to an already running Chrome (browser_daemon.py, or
+    launch_browser.sh) through its remote debugging port instead of
+    launching one. Plain chromedriver is enough here: the browser was not
+    started by automation, so there's nothing for uc to patch.
+    quit() on this driver leaves the browser running, so when the media
+    listener can't be attached the session is simply reopened with the
+    performance log enabled.
+    """
+    from selenium import webdriver
+
+    use_cdp = cdp_capture and network_capture.websocket is not None
+    options = webdriver.ChromeOptions()
+    options.debugger_address = debugger_address
+    if not use_cdp:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    driver = webdriver.Chrome(options=options)
+    driver.media_listener = None
+    driver.perf_logs = not use_cdp
+    if use_cdp:
+        driver.media_listener = attach_media_listener(driver)
+        if driver.media_listener is None:
+            driver.quit()
+            return attach_driver(debugger_address, cdp_capture=False, block=block)
+    apply_blocking(driver, block)
     return driver
 
+def apply_blocking(driver, block):
+    """
+    Drops the given resource categories for the rest of the session:
+    images/fonts/css/trackers via Network.setBlockedURLs, and video bodies
+    via Fetch interception on the media listener, which records the
+    response headers before refusing the body.
+    """
+    if not block:
+        return
+    patterns = network_capture.blocked_patterns(block)
+    try:
+        if patterns:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        if "video" in block:
+            listener = getattr(driver, "media_listener", None)
+            if listener:
+                listener.intercept_media(block_bodies=True)
+            else:
+                print("    [!] Video blocking needs the CDP media listener, skipped")
+    except Exception as e:
+        print(f"    [!] Resource blocking unavailable: {e}")
+
+def attach_media_listener(driver):
+    """Connects a MediaResponseListener to the driver's current tab. Returns None on failure."""
+    try:
+        address = driver.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+        listener = network_capture.MediaResponseListener(address, target_id=driver.current_window_handle)
+        return listener.start()
+    except Exception as e:
+        print(f"    [!] CDP media listener unavailable: {e}")
+        return None
+
 if __name__ == "__main__":
     # Test execution
     d = get_driver(headless=False)
@@ -0,0 +1,117 @@
+import throttle
+
+API_ROOT = "https://www.instagram.com"
+# Public web client id, sent by instagram.com itself on every API call
+IG_APP_ID = "936619743392459"
+PAGE_SIZE = 12
+
+
+# Redirects to /accounts/login/ or /challenge/, or an HTML login wall
+LOGIN_STATUSES = (200, 301, 302, 401, 403)
+
+
+class FeedError(Exception):
+    """The feed endpoint refused us (logged out, blocked, unknown user...)."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def login_required(self):
+        return self.status in LOGIN_STATUSES
+
+
+def api_headers(referer=API_ROOT + "/"):
+    return {
+        "Referer": referer,
+        "x-ig-app-id": IG_APP_ID,
+        "x-requested-with": "XMLHttpRequest",
+    }
+
+
+def _get_json(session, url, params=None, referer=API_ROOT + "/"):
+    def send():
+        throttle.SCHEDULER.acquire("api")
+        return session.get(url, params=params, headers=api_headers(referer), timeout=10, allow_redirects=False)
+
+    resp = throttle.RETRY["api"].call(send)
+    if resp.status_code != 200:
+        raise FeedError(f"HTTP {resp.status_code} from {url}", resp.status_code)
+    try:
+        return resp.json()
+    except ValueError:
+        # Login wall served as HTML
+        raise FeedError(f"Non-JSON response from {url}", resp.status_code)
+
+
+def get_user_id(username, session, base_url=API_ROOT):
+    data = _get_json(
+        session,
+        f"{base_url}/api/v1/users/web_profile_info/",
+        params={"username": username},
+        referer=f"{API_ROOT}/{username}/"
+    )
+    user = (data.get("data") or {}).get("user") or {}
+    if not user.get("id"):
+        raise FeedError(f"No user id for @{username}")
+    return user["id"]
+
+
+def iter_feed_items(username, session, tagged=False, base_url=API_ROOT, page_size=PAGE_SIZE, pace=True):
+    """
+    Lazily pages through a profile's posts (or tagged posts) with the
+    `max_id` cursor and yields raw v1 media items, newest first.
+    With `pace`, pages are spaced by throttle.PACER's 'feed_page' delay; every request
+    goes through the 'api' class of throttle.SCHEDULER and is retried by
+    throttle.RETRY['api'].
+    Raises FeedError if the first page can't be fetched.
+    """
+    user_id = get_user_id(username, session, base_url)
+    if tagged:
+        url = f"{base_url}/api/v1/usertags/{user_id}/feed/"
+    else:
+        url = f"{base_url}/api/v1/feed/user/{user_id}/"
+
+    cursor = None
+    seen_cursors = set()
+    while True:
+        params = {"count": page_size}
+        if cursor:
+            params["max_id"] = cursor
+        data = _get_json(session, url, params=params, referer=f"{API_ROOT}/{username}/")
+
+        for item in data.get("items", []):
+            yield item
+
+        cursor = data.get("next_max_id")
+        # Guard against a server handing back the same cursor forever
+        if not data.get("more_available") or not cursor or cursor in seen_cursors:
+            return
+        seen_cursors.add(cursor)
+        if pace:
+            throttle.PACER.pause("feed_page")
+
+
+def is_pinned(item):
+    """Pinned posts are served first regardless of their date."""
+    return bool(item.get("timeline_pinned_user_ids") or item.get("clips_tab_pinned_user_ids"))
+
+
+def iter_profile_posts(username, session, tagged=False, **kwargs):
+    """
+    Yields one queue entry per post: {'url', 'shortcode', 'date', 'item'}
+    where `item` is the raw v1 node (media and metrics included).
+    """
+    seen = set()
+    for item in iter_feed_items(username, session, tagged=tagged, **kwargs):
+        code = item.get("code")
+        if not code or code in seen:
+            continue
+        seen.add(code)
+        yield {
+            "url": f"https://www.instagram.com/p/{code}/",
+            "shortcode": code,
+            "date": item.get("taken_at", 0),
+            "item": item,
+        }
@@ -1,16 +1,56 @@
 import time
-import random
 import re
 import base64
 import json
 import subprocess
-from bs4 import BeautifulSoup
+import concurrent.futures
+import api_cache
+import mp4_probe
+import throttle
+from page_snapshot import PageSnapshot
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 
-def human_sleep(min_seconds=2.0, max_seconds=5.0):
-    """Sleeps for a random amount of time to simulate human behavior."""
-    time.sleep(random.uniform(min_seconds, max_seconds))
+# Candidate stream probing (get_video_url_from_network_logs)
+PROBE_WORKERS = 4
+PROBE_DEADLINE = 20.0
+
+# Readiness waits (pacing itself is throttle.PACER's job)
+READY_TIMEOUT = 10.0
+READY_POLL = 0.2
+SCROLL_SETTLE_TIMEOUT = 3.0
+POST_READY_JS = (
+    "return document.readyState !== 'loading'"
+    " && !!document.querySelector('meta[property=\"og:title\"], meta[property=\"og:description\"]')"
+    " && !!document.querySelector('article, main');"
+)
+PROFILE_READY_JS = (
+    "if (document.querySelector('a[href*=\"/p/\"], a[href*=\"/reel/\"], input[name=\"username\"]')) return true;"
+    " return document.readyState === 'complete' && !!document.querySelector('header, h2');"
+)
+
+def wait_until(driver, script, timeout=READY_TIMEOUT, poll=READY_POLL):
+    """
+    Polls a JavaScript predicate until it returns something truthy or
+    `timeout` expires. Returns the last result.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        result = driver.execute_script(script)
+        if result or time.monotonic() >= deadline:
+            return result
+        time.sleep(poll)
+
+def wait_for_post_ready(driver, timeout=READY_TIMEOUT):
+    """True once the post's og: meta and article/main are in the DOM."""
+    return bool(wait_until(driver, POST_READY_JS, timeout))
+
+def wait_for_profile_ready(driver, timeout=READY_TIMEOUT):
+    """True once the grid, the profile header or a login form is in the DOM."""
+    return bool(wait_until(driver, PROFILE_READY_JS, timeout))
+
+def wait_for_page_ready(driver, timeout=READY_TIMEOUT):
+    return bool(wait_until(driver, "return document.readyState === 'complete';", timeout))
 
 def download_blob_video(driver, blob_url):
     """
@@ -49,30 +89,6 @@ def download_blob_video(driver, blob_url):
         print(f"    [!] Blob extraction failed: {e}")
         return None
 
-def scroll_human(driver, scroll_count=5):
-    """
-    Scrolls the page down in a non-linear, human-like way.
-    """
-    actions = ActionChains(driver)
-    
-    for _ in range(scroll_count):
-        # Random scroll amount
-        scroll_height = random.randint(400, 800)
-        
-        driver.execute_script(f"window.scrollBy(0, {scroll_height});")
-        
-        # Occasional "micro-moves" with mouse (optional but good for heuristics)
-        try:
-            # Move mouse slightly to center of screen
-            actions.move_by_offset(random.randint(-10, 10), random.randint(-10, 10)).perform()
-            # Reset offset logic is complex in selenium, so just perform simple move
-            actions.reset_actions()
-        except:
-            pass # Ignore mouse move errors
-            
-            
-        human_sleep(1.5, 3.5)
-
 def unmute_video(driver):
     """
     Attempts to unmute the video using robust SVG targeting and ActionChains.
@@ -108,7 +124,7 @@ def unmute_video(driver):
             # Use ActionChains for a "real" click
             actions = ActionChains(driver)
             actions.move_to_element(target_btn).click().perform()
-            human_sleep(0.5, 1.0)
+            throttle.PACER.pause("click")
             print("    [ACT] Clicked mute button with ActionChains.")
             return
         except Exception as e:
@@ -121,74 +137,233 @@ def unmute_video(driver):
     try:
         actions = ActionChains(driver)
         actions.send_keys("m").perform()
-        human_sleep(0.5, 1.0)
+        throttle.PACER.pause("click")
     except:
         pass
 
-def get_post_links(driver):
+SHORTCODE_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+# Instagram ids carry a millisecond timestamp (since this epoch) in their top bits
+IG_EPOCH_MS = 1314220021721
+
+def shortcode_to_timestamp(short_code):
     """
-    Extracts all visible post links from the current feed view.
-    Returns a set of URLs to avoid duplicates.
+    Upload time (epoch seconds) encoded in a post shortcode, no request needed.
+    Returns None for codes that don't decode.
     """
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    links = set()
-    
-    # Instagram post links usually look like /p/CODE/ or /reel/CODE/
-    # We now handle both absolute (https://...) and relative (/) paths
-    all_links = soup.find_all("a", href=True)
-    print(f"    [DEBUG] Found {len(all_links)} total anchor tags.")
-    
-    for a in all_links:
-        href = a["href"]
-        
-        # Check for /p/ or /reel/ segments
-        # Regex explanation:
-        # (?:https?://www\.instagram\.com)? -> Optional Domain
-        # /(?:p|reel)/              -> /p/ or /reel/
-        # ([\w-]+)/?                -> The code (captured)
-        match = re.search(r"/(p|reel)/([\w-]+)", href)
-        
+    media_id = 0
+    # Long (private) shortcodes carry the media id in their first 11 characters
+    for ch in short_code[:11]:
+        idx = SHORTCODE_ALPHABET.find(ch)
+        if idx < 0:
+            return None
+        media_id = media_id * 64 + idx
+    return ((media_id >> 23) + IG_EPOCH_MS) / 1000.0
+
+def _visible_post_codes(driver):
+    """Shortcodes of the post links currently in the DOM (one script call, no page_source)."""
+    hrefs = driver.execute_script(
+        "return Array.from(document.querySelectorAll('a[href*=\"/p/\"], a[href*=\"/reel/\"]'),"
+        " a => a.getAttribute('href'));"
+    ) or []
+    codes = []
+    for href in hrefs:
+        match = re.search(r"/(p|reel)/([\w-]+)", href or "")
         if match:
-            # Reconstruct clean URL
-            short_code = match.group(2) # Group 2 is the code
-            # type = match.group(1) # p or reel
-            full_url = f"https://www.instagram.com/p/{short_code}/"
-            links.add(full_url)
-    
-    print(f"    [DEBUG] Filtered down to {len(links)} unique post links.")
-    return links
+            codes.append(match.group(2))
+    return codes
+
+def _wait_grid_change(driver, previous, timeout):
+    """Polls the grid until its shortcodes differ from `previous` (or timeout). Returns the new ones."""
+    deadline = time.monotonic() + timeout
+    while True:
+        codes = _visible_post_codes(driver)
+        if codes != previous or time.monotonic() >= deadline:
+            return codes
+        time.sleep(READY_POLL)
 
-def get_post_details_api(post_url, session):
+def harvest_post_links(driver, max_posts=None, since=None, stall_limit=3, max_scrolls=None,
+                       settle_timeout=SCROLL_SETTLE_TIMEOUT):
+    """
+    Scrolls the profile grid to the end, collecting post links after EVERY
+    step (Instagram virtualizes the grid, so rows that scroll out are gone).
+
+    Stops when `stall_limit` consecutive scrolls bring no new shortcode,
+    after `max_posts` links, or - with `since` (epoch seconds) - once a
+    scroll only reveals posts older than that (pinned posts can't stop it).
+    After each scroll it waits (up to `settle_timeout`) for the grid to
+    change instead of sleeping a fixed time.
+    Returns the links in feed order (newest first).
+    """
+    links = {} # ordered set of post URLs
+    too_old = set()
+    stalls = 0
+    scrolls = 0
+    codes = _visible_post_codes(driver)
+
+    while True:
+        fresh = 0
+        fresh_old = 0
+        for short_code in codes:
+            url = f"https://www.instagram.com/p/{short_code}/"
+            if url in links or short_code in too_old:
+                continue
+            taken_at = shortcode_to_timestamp(short_code) if since else None
+            if taken_at is not None and taken_at < since:
+                too_old.add(short_code)
+                fresh_old += 1
+                continue
+            links[url] = None
+            fresh += 1
+            if max_posts and len(links) >= max_posts:
+                print(f"    [HARVEST] Reached --max-posts ({max_posts}).")
+                return list(links)
+
+        if since and fresh_old and not fresh:
+            print(f"    [HARVEST] Reached posts older than --since after {scrolls} scrolls.")
+            break
+
+        stalls = 0 if fresh else stalls + 1
+        if stalls >= stall_limit:
+            print(f"    [HARVEST] No new posts after {stall_limit} scrolls, end of feed.")
+            break
+        if max_scrolls is not None and scrolls >= max_scrolls:
+            break
+
+        # Slightly less than a viewport so no grid row is skipped
+        scrolled_at = time.monotonic()
+        driver.execute_script("window.scrollBy(0, Math.floor(window.innerHeight * 0.9));")
+        scrolls += 1
+        codes = _wait_grid_change(driver, codes, settle_timeout)
+        throttle.PACER.pause("scroll", since=scrolled_at)
+
+    print(f"    [HARVEST] Collected {len(links)} post links in {scrolls} scrolls.")
+    return list(links)
+
+def _extract_media_node(node):
+    """Best media URL of a single node, GraphQL (shortcode_media) or v1 (items) shape."""
+    # GraphQL shape
+    if node.get("is_video"):
+        return {"type": "video", "url": node.get("video_url")}
+    resources = node.get("display_resources", [])
+    if resources:
+        best = sorted(resources, key=lambda x: x["config_width"], reverse=True)[0]
+        return {"type": "image", "url": best["src"]}
+    if node.get("display_url"):
+        return {"type": "image", "url": node["display_url"]}
+
+    # v1 shape (?__a=1 "items", profile/tagged feeds)
+    versions = node.get("video_versions") or []
+    if versions:
+        best = sorted(versions, key=lambda x: x.get("width", 0) * x.get("height", 0), reverse=True)[0]
+        return {"type": "video", "url": best["url"]}
+    if node.get("media_type") == 2:
+        # Video without playable versions: don't mistake the cover for the media
+        return {"type": "video", "url": None}
+    candidates = node.get("image_versions2", {}).get("candidates", [])
+    if candidates:
+        best = sorted(candidates, key=lambda x: x.get("width", 0), reverse=True)[0]
+        return {"type": "image", "url": best["url"]}
+    return None
+
+def parse_post_node(items):
+    """
+    Extracts date, metrics and media from one post node.
+    Accepts both the GraphQL `shortcode_media` and the v1 `items` shapes.
+    """
+    result = {"likes": 0, "views": 0, "date": 0, "media": [], "owner": None, "caption": ""}
+
+    # Owner and caption, so a post can be handled without loading its page
+    owner = items.get("owner") or items.get("user") or {}
+    result["owner"] = owner.get("username")
+    caption_edges = items.get("edge_media_to_caption", {}).get("edges", [])
+    if caption_edges:
+        result["caption"] = caption_edges[0].get("node", {}).get("text", "")
+    elif items.get("caption"):
+        result["caption"] = items["caption"].get("text", "")
+
+    # Extract Metrics
+    result["date"] = items.get("taken_at_timestamp") or items.get("taken_at") or 0
+    result["views"] = items.get("video_view_count") or items.get("play_count") or items.get("view_count") or 0
+
+    likes_node = items.get("edge_media_preview_like", {})
+    result["likes"] = likes_node.get("count") or items.get("like_count") or 0
+
+    # Check for Carousel (Sidecar)
+    if "edge_sidecar_to_children" in items:
+        children = [child.get("node", {}) for child in items["edge_sidecar_to_children"].get("edges", [])]
+    elif items.get("carousel_media"):
+        children = items["carousel_media"]
+    else:
+        children = [items]
+
+    for node in children:
+        res = _extract_media_node(node)
+        if res: result["media"].append(res)
+
+    return result
+
+def get_post_details_api(post_url, session, cache=None):
     """
     Fetches full post details (Media + Metrics) using Instagram's ?__a=1&__d=dis endpoint.
-    Returns dict or default structure on failure.
+    With an api_cache.ApiCache, fresh responses are served from disk and stale
+    ones revalidated; only requests that actually go out are charged to
+    the 'api' class of throttle.SCHEDULER.
+    Returns dict or default structure on failure. `status` is the HTTP
+    status (None if no response came back), `latency` the last attempt's
+    round trip, `retries` how many transient failures came before it and
+    `cached` whether the answer was served without a request, so callers
+    can tell a 429 from a post without likes.
     """
-    result = {"success": False, "likes": 0, "views": 0, "date": 0, "media": []}
+    result = {"success": False, "likes": 0, "views": 0, "date": 0, "media": [], "owner": None, "caption": "",
+              "status": None, "latency": None, "retries": 0, "cached": False}
     
     try:
-        # Clean URL and append params
-        base_url = post_url.split("?")[0]
-        api_url = f"{base_url}?__a=1&__d=dis"
-        
-        # Add headers to mimic browsing context
-        kwargs = {
-            "timeout": 10,
-            "headers": {
+        short_code = api_cache.shortcode_of(post_url) if cache else None
+        cached = cache.lookup(short_code) if short_code else None
+
+        if cached and cached["fresh"]:
+            data = cached["data"]
+            result["cached"] = True
+        else:
+            # Clean URL and append params
+            base_url = post_url.split("?")[0]
+            api_url = f"{base_url}?__a=1&__d=dis"
+
+            # Add headers to mimic browsing context
+            headers = {
                 "Referer": "https://www.instagram.com/",
                 "x-requested-with": "XMLHttpRequest"
             }
-        }
-        
-        resp = session.get(api_url, **kwargs)
-        
-        if resp.status_code != 200:
-            # print(f"    [!] API Fail {resp.status_code}: {api_url}") # Debug only
-            return result
+            if cached and cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached and cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
 
-        try:
-            data = resp.json()
-        except json.JSONDecodeError:
-            return result
+            attempts = []
+
+            def send():
+                throttle.SCHEDULER.acquire("api")
+                attempts.append(time.monotonic())
+                return session.get(api_url, timeout=10, headers=headers)
+
+            # 429/5xx are retried (honoring Retry-After) before giving up
+            resp = throttle.RETRY["api"].call(send)
+            result["status"] = resp.status_code
+            result["latency"] = time.monotonic() - attempts[-1]
+            result["retries"] = len(attempts) - 1
+
+            if resp.status_code == 304 and cached:
+                cache.touch(short_code)
+                data = cached["data"]
+            elif resp.status_code != 200:
+                # print(f"    [!] API Fail {resp.status_code}: {api_url}") # Debug only
+                return result
+            else:
+                try:
+                    data = resp.json()
+                except json.JSONDecodeError:
+                    return result
+                cached = None
 
         # Navigate JSON structure
         items = data.get("graphql", {}).get("shortcode_media") 
@@ -198,39 +373,13 @@ def get_post_details_api(post_url, session):
         if not items:
             return result
 
-        # Extract Metrics
-        result["date"] = items.get("taken_at_timestamp", 0)
-        result["views"] = items.get("video_view_count", 0)
-        
-        likes_node = items.get("edge_media_preview_like", {})
-        result["likes"] = likes_node.get("count", 0)
-
-        # Helper to extract media
-        def extract_node(node):
-            if node.get("is_video"):
-                return {"type": "video", "url": node.get("video_url")}
-            else:
-                resources = node.get("display_resources", [])
-                if resources:
-                    best = sorted(resources, key=lambda x: x["config_width"], reverse=True)[0]
-                    return {"type": "image", "url": best["src"]}
-                elif node.get("display_url"):
-                    return {"type": "image", "url": node["display_url"]}
-            return None
-
-        # Check for Carousel (Sidecar)
-        if "edge_sidecar_to_children" in items:
-            children = items["edge_sidecar_to_children"].get("edges", [])
-            for child in children:
-                node = child.get("node", {})
-                res = extract_node(node)
-                if res: result["media"].append(res)
-        else:
-            res = extract_node(items)
-            if res: result["media"].append(res)
+        result.update(parse_post_node(items))
 
         result["success"] = True
-        print(f"    [API] Post details: Likes={result['likes']}, Views={result['views']}, Media={len(result['media'])}")
+        if short_code and not cached:
+            cache.store(short_code, data, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        source = " (cached)" if cached else ""
+        print(f"    [API] Post details{source}: Likes={result['likes']}, Views={result['views']}, Media={len(result['media'])}")
         return result
 
     except Exception as e:
@@ -239,9 +388,15 @@ def get_post_details_api(post_url, session):
 
 def get_stream_metadata(url):
     """
-    Uses ffprobe to extract type, resolution, and duration from a URL.
+    Extracts type, resolution, and duration from a URL or local file.
+    Local MP4s are parsed in-process; ffprobe is the fallback.
     Returns dict: {'type': 'video'|'audio'|None, 'width': int, 'height': int, 'duration': float}
     """
+    if "://" not in url:
+        parsed = mp4_probe.probe_file(url)
+        if parsed and parsed['type']:
+            return parsed
+
     meta = {'type': None, 'width': 0, 'height': 0, 'duration': 0.0}
     
     # JSON Retry for Robustness (Primary method now)
@@ -276,10 +431,44 @@ def get_stream_metadata(url):
         
     return meta
 
+def probe_remote_stream(url, session):
+    """
+    Classifies a remote candidate stream from a few KB of MP4 headers fetched
+    with Range requests on the shared session (no ffprobe, no extra connection).
+    Returns the same dict as get_stream_metadata, or None if it can't tell.
+    """
+    def fetch(start, length):
+        headers = {"Range": f"bytes={start}-{start + length - 1}"}
+        throttle.SCHEDULER.acquire("media", length)
+        resp = session.get(url, headers=headers, stream=True, timeout=10)
+        try:
+            # A 200 means the Range was ignored; that's only usable from offset 0
+            if resp.status_code != 206 and not (resp.status_code == 200 and start == 0):
+                return b""
+            data = b""
+            for chunk in resp.iter_content(chunk_size=16384):
+                data += chunk
+                if len(data) >= length:
+                    break
+            return data[:length]
+        finally:
+            resp.close()
+
+    try:
+        return mp4_probe.probe_ranges(fetch)
+    except Exception as e:
+        print(f"    [!] Range probe error: {e}")
+        return None
+
 def get_media_duration(file_path):
     """
-    Returns the duration of a media file in seconds (float) using ffprobe.
+    Returns the duration of a media file in seconds (float).
+    Reads the MP4 header directly; falls back to ffprobe for anything else.
     """
+    parsed = mp4_probe.probe_file(file_path)
+    if parsed and parsed['duration']:
+        return parsed['duration']
+
     try:
         cmd = [
             "ffprobe", 
@@ -294,85 +483,126 @@ def get_media_duration(file_path):
     except Exception:
         return 0.0
 
-def get_video_url_from_network_logs(driver):
+def _probe_candidate(url, session):
+    meta = probe_remote_stream(url, session) if session else None
+    if not meta or not meta['type']:
+        meta = get_stream_metadata(url)
+    meta['url'] = url
+    return meta
+
+def _media_responses_from_logs(driver):
+    """(url, mime) of every response in the performance log (legacy capture)."""
+    found = []
+    for entry in driver.get_log("performance"):
+        try:
+            message_obj = json.loads(entry["message"])
+            message = message_obj.get("message", {})
+            if message.get("method") == "Network.responseReceived":
+                response = message.get("params", {}).get("response", {})
+                found.append((response.get("url", ""), response.get("mimeType", "")))
+        except: continue
+    return found
+
+def get_video_url_from_network_logs(driver, session=None, deadline=PROBE_DEADLINE, listener=None):
     """
     Scans logs, probess ALL candidates, and verifies the BEST video/audio pair.
+    With a session, candidates are classified from Range-fetched MP4 headers;
+    ffprobe over HTTP is only the fallback.
+    With a MediaResponseListener, candidates come from CDP events instead of
+    the performance log and waits end as soon as new media is seen.
+    Probes run in a small worker pool under a per-post `deadline` (seconds);
+    the pair is returned as soon as every known candidate has been probed.
     """
+    if not listener and not getattr(driver, "perf_logs", True):
+        print("    [!] No network capture on this browser, skipping the stream scan.")
+        return None
     print("    [LOGS] Scanning network traffic for media files...")
     
-    candidates = set()
+    started = time.monotonic()
+    probes = {} # url -> Future, one probe per URL across all attempts
+    analyzed = set() # futures whose result was already sorted into videos/audios
     videos = [] # list of dicts with meta
     audios = [] # list of dicts with meta
-    
-    # 1. Collect phase
-    for attempt in range(3):
-        try:
-            logs = driver.get_log("performance")
-            for entry in logs:
-                try:
-                    message_obj = json.loads(entry["message"])
-                    message = message_obj.get("message", {})
-                    if message.get("method") == "Network.responseReceived":
-                        response = message.get("params", {}).get("response", {})
-                        url = response.get("url", "")
-                        mime = response.get("mimeType", "")
-                        
-                        if "video" in mime or "audio" in mime or ".mp4" in url:
-                            if url.startswith("http"):
-                                clean = re.sub(r"(&|\?)bytestart=[0-9]+", "", url)
-                                clean = re.sub(r"(&|\?)byteend=[0-9]+", "", clean)
-                                if "init" not in clean and clean not in candidates:
-                                    candidates.add(clean)
-                except: continue
-            
-            # 2. Analyze phase
-            if len(videos) == 0 or len(audios) == 0:
-                if candidates:
-                    print(f"    [LOGS] Analyzing {len(candidates)} streams for quality...")
-                    for url in candidates:
-                        # Check if we already analyzed this URL
-                        if any(v['url'] == url for v in videos) or any(a['url'] == url for a in audios):
-                            continue
-                            
-                        meta = get_stream_metadata(url)
-                        meta['url'] = url
-                        
-                        if meta['type'] == 'video':
-                            pixels = meta['width'] * meta['height']
-                            meta['pixels'] = pixels
-                            videos.append(meta)
-                            print(f"    [VID] Found: {meta['width']}x{meta['height']} ({meta['duration']:.1f}s)")
-                        elif meta['type'] == 'audio':
-                            audios.append(meta)
-                            print(f"    [AUD] Found: {meta['duration']:.1f}s")
-
-            # 3. Decision phase
-            if videos and audios:
-                # Sort videos by pixels (quality) DESC
-                videos.sort(key=lambda x: x['pixels'], reverse=True)
-                # Sort audios by duration DESC (usually longer = better/complete)
-                audios.sort(key=lambda x: x['duration'], reverse=True)
-                
-                best_video = videos[0]
-                best_audio = audios[0]
-                
-                print(f"    [★] Selected BEST Video: {best_video['width']}x{best_video['height']} | Audio: {best_audio['duration']:.1f}s")
-                return {"video": best_video['url'], "audio": best_audio['url']}
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix="probe")
 
-            if attempt < 2:
-                print(f"    [WAIT] Need pairs (V:{len(videos)} A:{len(audios)}). Waiting... ({attempt+1}/3)")
-                time.sleep(2.5)
+    def time_left():
+        return deadline - (time.monotonic() - started)
+
+    try:
+        # 1. Collect phase
+        for attempt in range(3):
+            try:
+                responses = listener.responses() if listener else _media_responses_from_logs(driver)
+                for url, mime in responses:
+                    if "video" in mime or "audio" in mime or ".mp4" in url:
+                        if url.startswith("http"):
+                            clean = re.sub(r"(&|\?)bytestart=[0-9]+", "", url)
+                            clean = re.sub(r"(&|\?)byteend=[0-9]+", "", clean)
+                            if "init" not in clean and clean not in probes:
+                                probes[clean] = executor.submit(_probe_candidate, clean, session)
                 
-        except Exception as e:
-            # Suppress noisy connection errors (common during shutdown/interrupts)
-            msg = str(e)
-            if "HTTPConnectionPool" in msg or "Max retries exceeded" in msg or "Connection refused" in msg:
-                continue 
-            print(f"    [!] Scan error: {e}")
+                # 2. Analyze phase (results of earlier attempts are kept, not re-probed)
+                waiting = [f for f in probes.values() if f not in analyzed]
+                if waiting:
+                    print(f"    [LOGS] Analyzing {len(waiting)} streams for quality...")
+                    try:
+                        for future in concurrent.futures.as_completed(waiting, timeout=max(time_left(), 0)):
+                            analyzed.add(future)
+                            try:
+                                meta = future.result()
+                            except Exception as e:
+                                print(f"    [!] Probe error: {e}")
+                                continue
+                            
+                            if meta['type'] == 'video':
+                                pixels = meta['width'] * meta['height']
+                                meta['pixels'] = pixels
+                                videos.append(meta)
+                                print(f"    [VID] Found: {meta['width']}x{meta['height']} ({meta['duration']:.1f}s)")
+                            elif meta['type'] == 'audio':
+                                audios.append(meta)
+                                print(f"    [AUD] Found: {meta['duration']:.1f}s")
+                    except concurrent.futures.TimeoutError:
+                        print(f"    [!] Probe deadline ({deadline:.0f}s) reached, deciding with what we have.")
+
+                # 3. Decision phase
+                if videos and audios:
+                    # Sort videos by pixels (quality) DESC
+                    videos.sort(key=lambda x: x['pixels'], reverse=True)
+                    # Sort audios by duration DESC (usually longer = better/complete)
+                    audios.sort(key=lambda x: x['duration'], reverse=True)
+                    
+                    best_video = videos[0]
+                    best_audio = audios[0]
+                    
+                    print(f"    [★] Selected BEST Video: {best_video['width']}x{best_video['height']} | Audio: {best_audio['duration']:.1f}s")
+                    return {"video": best_video['url'], "audio": best_audio['url']}
+
+                if attempt < 2 and time_left() > 0:
+                    print(f"    [WAIT] Need pairs (V:{len(videos)} A:{len(audios)}). Waiting... ({attempt+1}/3)")
+                    if listener:
+                        # Wakes up as soon as the next media response arrives
+                        listener.wait_for_new(len(responses), min(2.5, time_left()))
+                    else:
+                        time.sleep(min(2.5, time_left()))
+                else:
+                    break
+                    
+            except Exception as e:
+                # Suppress noisy connection errors (common during shutdown/interrupts)
+                msg = str(e)
+                if "HTTPConnectionPool" in msg or "Max retries exceeded" in msg or "Connection refused" in msg:
+                    continue 
+                print(f"    [!] Scan error: {e}")
+    finally:
+        # Don't block on stragglers past the deadline
+        for future in probes.values():
+            future.cancel()
+        executor.shutdown(wait=False)
             
     return None
 
-def extract_media_from_post(driver):
+def extract_media_from_post(driver, snapshot=None):
     """
     Parses the opened post page to extract high quality media.
     Works for single images, carousels (partial), and videos.
@@ -382,8 +612,10 @@ def extract_media_from_post(driver):
     - Multiple srcset parsing strategies
     - JSON-LD structured data extraction
     - data-src lazy-loaded image detection
+
+    Pass the post's PageSnapshot to reuse its parsed DOM.
     """
-    soup = BeautifulSoup(driver.page_source, "html.parser")
+    soup = (snapshot or PageSnapshot(driver)).soup
     media_data = []
     seen_urls = set()  # Avoid duplicates
     
@@ -521,9 +753,10 @@ def extract_media_from_post(driver):
     return media_data
 
 
-def extract_metadata(driver):
+def extract_metadata(driver, snapshot=None):
     """Extracts caption, date, and likes (if visible)."""
-    soup = BeautifulSoup(driver.page_source, "html.parser")
+    page = snapshot or PageSnapshot(driver)
+    soup = page.soup
     meta = {}
     
     # Extract Date
@@ -544,40 +777,38 @@ def extract_metadata(driver):
             # usually "Likes, Comments - Caption (@user) on Instagram..."
             meta["caption"] = content
         else:
-             meta["caption"] = driver.title
+             meta["caption"] = page.title or driver.title
     except Exception:
         meta["caption"] = "unknown_caption"
 
     return meta
 
-def verify_post_owner(driver, target_username):
+def verify_post_owner(driver, target_username, snapshot=None):
     """
     Checks if the current post belongs to the target username.
     Returns True if match or uncertain, False if definitely different.
+    Pass the post's PageSnapshot to avoid per-link WebDriver round trips.
     """
     try:
+        page = snapshot or PageSnapshot(driver)
+
         # Strategy 1: Look for the username link in the header
         # Usually internal href = "/username/"
-        header_links = driver.find_elements(By.XPATH, "//header//a")
-        for link in header_links:
-            href = link.get_attribute("href")
+        header_links = page.header_links()
+        for href in header_links:
             if href and f"/{target_username}/" in href:
                 return True
                 
         # Strategy 2: Check meta tags
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        meta_auth = soup.find("meta", property="og:title")
-        if meta_auth:
-            content = meta_auth.get("content", "")
-            if f"(@{target_username})" in content:
-                return True
+        content = page.meta("og:title") or ""
+        if f"(@{target_username})" in content:
+            return True
                 
         # If we can't find it, assume SAFE (don't skip) or STRICT?
         # Given the "corruption" issue, let's be strict if we find SOMEONE ELSE
         if header_links:
             # Check if we see ANOTHER username
-            for link in header_links:
-                href = link.get_attribute("href")
+            for href in header_links:
                 if href and "/p/" not in href and "/explore/" not in href:
                      # It's a profile link, if not target, then reject
                      if target_username not in href:
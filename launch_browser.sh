@@ -4,19 +4,25 @@
 # Get the directory where the script is located
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROFILE_DIR="$SCRIPT_DIR/chrome_profile"
+# DevTools port, so `main.py --attach` can reuse this browser (localhost only)
+DEBUG_PORT="${DEBUG_PORT:-9222}"
 
 mkdir -p "$PROFILE_DIR"
 chmod 700 "$PROFILE_DIR"
 
 echo "[*] Launching Google Chrome with persistent profile..."
 echo "    Profile: $PROFILE_DIR"
+echo "    Debugging port: 127.0.0.1:$DEBUG_PORT"
 echo "    URL: https://www.instagram.com/gauchaasmr/"
 
 # Launch Chrome in background
 google-chrome \
   --user-data-dir="$PROFILE_DIR" \
+  --remote-debugging-port="$DEBUG_PORT" \
+  --remote-debugging-address=127.0.0.1 \
   --no-first-run \
   --no-default-browser-check \
   https://www.instagram.com/gauchaasmr/ > /dev/null 2>&1 &
 
 echo "[+] Browser launched! perform your login manually."
+echo "    Keep it open and run: python3 main.py <username> --attach 127.0.0.1:$DEBUG_PORT"
@@ -1,14 +1,28 @@
 import os
 import time
-import json
 import requests
 import re
 import sys
 import signal
 import argparse
+import concurrent.futures
+import threading
 import logging
 import driver_setup
 import instagram_actions as action
+import browser_daemon
+import download_pool
+import driver_pool
+import feed_api
+import media_store
+import metadata_sink
+import network_capture
+import prefetch
+import ranking
+import session_bridge
+import throttle
+from api_cache import ApiCache
+from manifest import Manifest
 from urllib.parse import urlparse
 from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
 import random
@@ -19,6 +33,16 @@ import subprocess
 # CONSTANTS & GLOBALS
 # ============================================================
 STOP_REQUESTED = False
+PART_SUFFIX = ".part"
+# Next to a .part: the ETag/Last-Modified of the asset its bytes came from
+VALIDATOR_SUFFIX = ".validator"
+CHUNK_SIZE = 8192
+DOWNLOAD_RETRIES = 3
+# Consecutive post failures after which a batch target is given up
+TARGET_MAX_ERRORS = 5
+# Pre-scan fan-out: AIMD concurrency starting at SCAN_WORKERS, between 1 and SCAN_MAX_WORKERS
+SCAN_WORKERS = 5
+SCAN_MAX_WORKERS = 16
 
 class Logger:
     """
@@ -107,10 +131,34 @@ def is_safe_username(username):
     return True
 
 
+def parse_since(value):
+    """argparse type for --since: YYYY-MM-DD (local time) to epoch seconds."""
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m-%d").timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD")
+
+
+def parse_block(value):
+    """argparse type for --block: comma-separated categories, 'all' or 'none'."""
+    categories = [c.strip() for c in value.split(",") if c.strip()]
+    if categories == ["none"]:
+        return ()
+    if categories == ["all"]:
+        return network_capture.BLOCK_CATEGORIES
+    unknown = [c for c in categories if c not in network_capture.BLOCK_CATEGORIES]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown category {', '.join(unknown)} (choose from {', '.join(network_capture.BLOCK_CATEGORIES)}, all, none)"
+        )
+    return tuple(categories)
+
+
 def wait_for_login(driver):
     """
     Pauses execution and waits for user to log in interactively.
     """
+    throttle.SCHEDULER.acquire("nav")
     driver.get("https://www.instagram.com/accounts/login/")
     log.warning("AUTHENTICATION REQUIRED: Please log in to Instagram now.")
 
@@ -125,7 +173,104 @@ def wait_for_login(driver):
     return True
 
 
-def download_file(url, session, driver, output_dir, override_name=None, media_type="image", timestamp=None):
+class DownloadPaused(Exception):
+    """Raised inside a transfer when a stop was requested; the .part file is kept."""
+
+
+def content_total(resp):
+    """Total body size from Content-Range ('bytes 0-99/1234' or 'bytes */1234'), if known."""
+    match = re.search(r"/(\d+)\s*$", resp.headers.get("Content-Range", ""))
+    return int(match.group(1)) if match else None
+
+
+def part_validator(resp):
+    """Strong ETag, else Last-Modified, of a response: what If-Range accepts."""
+    etag = resp.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return resp.headers.get("Last-Modified")
+
+
+def discard_part(part_path):
+    """Removes a .part sidecar and its validator."""
+    for path in (part_path, part_path + VALIDATOR_SUFFIX):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def stream_to_part(url, session, part_path):
+    """
+    Streams url into part_path, resuming with a Range request from whatever
+    bytes a previous attempt (or run) left behind. The resume is sent with
+    If-Range and the validator saved for those bytes, so a sidecar left by
+    another asset under the same name is replaced by a full body instead of
+    being stitched onto it; bytes without a validator are never resumed.
+    Returns True once the sidecar holds the whole body, False if it had to be
+    discarded and the transfer should start over. Raises IOError on short reads.
+    """
+    validator_path = part_path + VALIDATOR_SUFFIX
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    validator = None
+    if offset:
+        if os.path.exists(validator_path):
+            with open(validator_path, encoding="utf-8") as f:
+                validator = f.read().strip()
+        if not validator:
+            # No telling which asset these bytes belong to
+            discard_part(part_path)
+            offset = 0
+    kwargs = {"headers": {"Range": f"bytes={offset}-", "If-Range": validator}} if offset else {}
+    # 429/5xx and connection errors before the body are retried here
+    resp = throttle.RETRY["media"].call(lambda: session.get(url, stream=True, timeout=20, **kwargs))
+
+    if offset and resp.status_code == 416:
+        # Nothing left to fetch, unless the sidecar belongs to another version
+        total = content_total(resp)
+        resp.close()
+        if total == offset:
+            return True
+        discard_part(part_path)
+        return False
+
+    resp.raise_for_status()
+
+    if offset and resp.status_code == 206:
+        match = re.match(r"bytes (\d+)-", resp.headers.get("Content-Range", ""))
+        if not match or int(match.group(1)) != offset:
+            resp.close()
+            discard_part(part_path)
+            return False
+        mode = "ab"
+        expected = content_total(resp)
+    else:
+        # Fresh transfer, the server ignored the Range header, or If-Range
+        # didn't match: the sidecar starts over with this asset's validator
+        mode = "wb"
+        expected = None
+        if resp.headers.get("Content-Length") and resp.headers.get("Content-Encoding", "identity") == "identity":
+            expected = int(resp.headers["Content-Length"])
+        validator = part_validator(resp)
+        if validator:
+            with open(validator_path, "w", encoding="utf-8") as f:
+                f.write(validator)
+        elif os.path.exists(validator_path):
+            os.remove(validator_path)
+
+    with open(part_path, mode) as f:
+        for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+            if STOP_REQUESTED:
+                resp.close()
+                raise DownloadPaused()
+            throttle.SCHEDULER.acquire("media", len(chunk))
+            f.write(chunk)
+
+    size = os.path.getsize(part_path)
+    if expected is not None and size != expected:
+        raise IOError(f"Incomplete transfer: {size}/{expected} bytes")
+    return True
+
+
+def download_file(url, session, driver, output_dir, override_name=None, media_type="image", timestamp=None, store=None):
     try:
         if not url: return None, None
 
@@ -158,6 +303,17 @@ def download_file(url, session, driver, output_dir, override_name=None, media_ty
             filename = filename[-200:]
             save_path = os.path.join(output_dir, filename)
 
+        # Same asset already fetched for another post or target: link, don't download
+        if store and not url.startswith("blob:"):
+            stored = store.lookup(url)
+            if stored:
+                method = store.link_into(stored, save_path)
+                if timestamp:
+                    try: os.utime(save_path, (timestamp, timestamp))
+                    except: pass
+                log.success(f"Linked from store ({method}): {filename}")
+                return filename, save_path
+
         # Download
         # If blob, use selenium script (not ideal for images usually, but fallback)
         if url.startswith("blob:"):
@@ -169,13 +325,30 @@ def download_file(url, session, driver, output_dir, override_name=None, media_ty
             with open(save_path, "wb") as f:
                 f.write(content)
         else:
-            # Requests download
-            resp = session.get(url, stream=True, timeout=20)
-            resp.raise_for_status()
+            # Requests download into a sidecar; only a complete body is renamed into place
+            part_path = save_path + PART_SUFFIX
+            for attempt in range(1, DOWNLOAD_RETRIES + 1):
+                try:
+                    if stream_to_part(url, session, part_path):
+                        break
+                except DownloadPaused:
+                    raise
+                except IOError as e:
+                    # requests exceptions are IOErrors. An HTTP error status has
+                    # already been through throttle.RETRY; only resume broken bodies
+                    status = getattr(getattr(e, "response", None), "status_code", None)
+                    if attempt == DOWNLOAD_RETRIES or status:
+                        raise
+                    log.warning(f"Transfer interrupted ({e}). Resuming {filename} ({attempt}/{DOWNLOAD_RETRIES})...")
+                    time.sleep(attempt)
+            else:
+                raise IOError(f"Could not complete {filename} after {DOWNLOAD_RETRIES} attempts")
 
-            with open(save_path, "wb") as f:
-                for chunk in resp.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            if store:
+                store.ingest(part_path, save_path, url)
+            else:
+                os.replace(part_path, save_path)
+            discard_part(part_path)
 
         # Apply Timestamp (Organization)
         if timestamp:
@@ -187,15 +360,946 @@ def download_file(url, session, driver, output_dir, override_name=None, media_ty
         log.success(f"Saved: {filename}")
         return filename, save_path
 
+    except DownloadPaused:
+        log.warning(f"Paused: {filename} (partial data kept for the next run)")
     except Exception as e:
         log.error(f"Download Error: {e}")
     return None, None
 
 
+def save_post(job, session):
+    """
+    Downloads every media item of one post and writes its metadata JSON.
+    Runs on a DownloadPool worker, so it must not touch the driver: blob URLs
+    are resolved by the browser loop beforehand (see item["saved"]).
+    """
+    link = job["link"]
+    metadata = job["metadata"]
+    caption = job["caption"]
+    safe_caption = job["safe_caption"]
+    post_date = job["post_date"]
+    api_media_list = job["api_media"]
+    log_media = job["log_media"]
+    VIDEO_DIR = job["video_dir"]
+    IMAGE_DIR = job["image_dir"]
+    store = job.get("store")
+
+    # Format for FFMPEG
+    try:
+        dt_obj = datetime.datetime.fromtimestamp(post_date)
+        iso_date = dt_obj.strftime('%Y-%m-%d %H:%M:%S')
+    except:
+        iso_date = None
+
+    # Temp tracking
+    temp_files_to_clean = []
+    downloaded_any = False
+    expected_files = 1
+
+    try:
+        # PATH 1: API was successful (High Quality / Carousel)
+        if api_media_list:
+            log.debug(f"Method: API ({len(api_media_list)} items)")
+            for idx, item in enumerate(api_media_list):
+                # Use index in filename for carousels
+                suffix = "" if len(api_media_list) == 1 else f"_{idx+1}"
+
+                fname, _ = download_file(
+                    item["url"],
+                    session,
+                    None,
+                    VIDEO_DIR if item["type"] == "video" else IMAGE_DIR,
+                    override_name=f"{safe_caption}{suffix}.{'mp4' if item['type']=='video' else 'jpg'}",
+                    media_type=item["type"],
+                    timestamp=post_date,
+                    store=store
+                )
+                if fname:
+                    metadata["media_files"].append(fname)
+                    downloaded_any = True
+            if downloaded_any:
+                expected_files = len(api_media_list)
+
+        # PATH 2: Network Logs (Video Only - if API missed video or failed)
+        # Only use if we haven't downloaded a video yet OR if API failed entirely
+        if not downloaded_any and log_media and log_media["video"]:
+            log.debug("Method: Network Logs")
+            video_url = log_media["video"]
+            audio_url = log_media["audio"]
+
+            # Temp names carry the shortcode: several posts are in flight at once
+            temp_vid_name = f"temp_v_{job['short_code']}.mp4"
+            # Download temps with timestamp too (good practice)
+            v_file, v_path = download_file(video_url, session, None, VIDEO_DIR, override_name=temp_vid_name, media_type="video", timestamp=post_date, store=store)
+
+            if v_path: temp_files_to_clean.append(v_path)
+
+            final_filename = f"{safe_caption}.mp4"
+            final_path = os.path.join(VIDEO_DIR, final_filename)
+            merged = False
+
+            if audio_url:
+                temp_aud_name = f"temp_a_{job['short_code']}.mp4"
+                a_file, a_path = download_file(audio_url, session, None, VIDEO_DIR, override_name=temp_aud_name, media_type="video", timestamp=post_date, store=store)
+                if a_path: temp_files_to_clean.append(a_path)
+
+                if v_file and a_file:
+                    dur_v = action.get_media_duration(v_path)
+                    dur_a = action.get_media_duration(a_path)
+                    if abs(dur_v - dur_a) <= 2.0:
+                        log.debug("Merging streams...")
+                        # Add Metadata to FFMPEG
+                        cmd = [
+                            "ffmpeg", "-y",
+                            "-i", v_path,
+                            "-i", a_path,
+                            "-c", "copy",
+                            "-loglevel", "error"
+                        ]
+                        if iso_date:
+                            cmd.extend(["-metadata", f"creation_time={iso_date}"])
+
+                        # Add Description/Source Metadata
+                        if caption:
+                            # Sanitize slightly for metadata preventing huge breaks
+                            clean_desc = caption.replace('"', "'")[:255]
+                            cmd.extend(["-metadata", f"title={clean_desc}"])
+                            cmd.extend(["-metadata", f"description={clean_desc}"])
+
+                        cmd.extend(["-metadata", f"comment={link}"])
+                        artist_name = "@" + link.split('/')[3] if len(link.split('/')) > 3 else "Instagram"
+                        cmd.extend(["-metadata", f"artist={artist_name}"])
+
+                        cmd.append(final_path)
+
+                        try:
+                            subprocess.run(cmd, check=True)
+                            log.success(f"Merged: {final_filename}")
+                            # Update timestamp on merged file
+                            try: os.utime(final_path, (post_date, post_date))
+                            except: pass
+                            metadata["media_files"].append(final_filename)
+                            merged = True
+                        except Exception as e:
+                            log.error(f"Merge failed: {e}")
+
+            if not merged and v_path and os.path.exists(v_path):
+                if os.path.exists(final_path):
+                     pass
+                else:
+                    os.rename(v_path, final_path)
+                    log.success(f"Saved (Video Only): {final_filename}")
+                    # Update timestamp on renamed file (renaming keeps it, but safe to force)
+                    try: os.utime(final_path, (post_date, post_date))
+                    except: pass
+                    metadata["media_files"].append(final_filename)
+                    if v_path in temp_files_to_clean: temp_files_to_clean.remove(v_path)
+
+            downloaded_any = True
+
+        # PATH 3: DOM Fallback (Images/Carousel skipped by API)
+        if not downloaded_any:
+            media_items = job["dom_media"]
+            if not media_items:
+                log.warning(f"No downloadable media found for {link}")
+            else:
+                log.debug("Method: DOM extraction (Fallback)")
+            for idx, item in enumerate(media_items):
+                if "saved" in item:
+                    # Blob already fetched through the browser
+                    if item["saved"]: metadata["media_files"].append(item["saved"])
+                    continue
+                item_type = item.get("type", "image")
+                suffix = "" if len(media_items) == 1 else f"_{idx+1}"
+                target_dir = IMAGE_DIR if item_type == "image" else VIDEO_DIR
+                fname, _ = download_file(
+                    item["url"],
+                    session,
+                    None,
+                    target_dir,
+                    override_name=f"{safe_caption}{suffix}.{'mp4' if item_type=='video' else 'jpg'}",
+                    media_type=item_type,
+                    timestamp=post_date,
+                    store=store
+                )
+                if fname: metadata["media_files"].append(fname)
+
+        files = metadata["media_files"]
+        if files and len(files) >= expected_files:
+            status = "complete"
+        else:
+            status = "partial" if files else "failed"
+
+        # Save Metadata; the manifest entry waits until the sink's batch is
+        # on disk, so a crash can't leave a "complete" post without metadata
+        job["sink"].write(
+            job["short_code"], metadata,
+            on_flush=lambda: job["manifest"].mark(job["short_code"], status, files)
+        )
+
+    finally:
+        if temp_files_to_clean:
+            for tp in temp_files_to_clean:
+                if os.path.exists(tp):
+                    try: os.remove(tp)
+                    except: pass
+
+
+def enumerate_feed(args, target, session):
+    """
+    Lists the target's posts through the paginated feed API, honouring
+    --since and --max-posts (pages are paced by throttle.SCHEDULER).
+    Returns (post_links, feed_details) where
+    feed_details maps url -> parsed post (media + metrics).
+    Raises FeedError/IOError only if not a single page could be read.
+    """
+    post_links = []
+    feed_details = {}
+    try:
+        for entry in feed_api.iter_profile_posts(target, session, tagged=args.tagged):
+            if STOP_REQUESTED:
+                break
+            if args.since and entry["date"] < args.since:
+                # Pinned posts sit on top of the feed out of date order
+                if feed_api.is_pinned(entry["item"]):
+                    continue
+                log.info("Reached posts older than --since.")
+                break
+            details = action.parse_post_node(entry["item"])
+            details["url"] = entry["url"]
+            details["success"] = True
+            feed_details[entry["url"]] = details
+            post_links.append(entry["url"])
+            if len(post_links) % 120 == 0:
+                log.debug(f"Enumerated {len(post_links)} posts...")
+            if args.max_posts and len(post_links) >= args.max_posts:
+                break
+    except (feed_api.FeedError, IOError) as e:
+        if not post_links:
+            raise
+        log.warning(f"Feed API stopped early ({e}). Continuing with {len(post_links)} posts.")
+    return post_links, feed_details
+
+
+def sort_queue(posts_queue, sort, top=None):
+    """
+    Orders the download queue in place for --sort (keeping the `top` best
+    with likes/views). Posts without the metric (unscored) go last.
+    """
+    if sort in ["likes", "views"]:
+        posts_queue.sort(key=lambda x: (sort in x, x.get(sort, 0)), reverse=True)
+        if top:
+            del posts_queue[top:]
+        top_val = posts_queue[0].get(sort, 0) if posts_queue else 0
+        log.info(f"Sorting complete. Top post has {top_val} {sort}.")
+    elif sort == "reverse":
+        log.info("Sorting: Oldest First (Reverse)")
+        posts_queue.reverse()
+    elif sort == "random":
+        log.info("Sorting: Random (Shuffle)")
+        random.shuffle(posts_queue)
+
+
+def caption_names(caption, short_code):
+    """(caption, filesystem-safe caption) used to name a post's files."""
+    caption = caption.split("on Instagram")[0]
+    safe_caption = re.sub(r'[\\/*?:"<>|]', "", caption)[:60].strip()
+    return caption, safe_caption or f"post_{short_code}"
+
+
+class LoginRequired(Exception):
+    """Instagram wants a login that can't be completed in this run."""
+
+
+def read_targets(source):
+    """
+    Usernames from a targets file ('-' reads stdin): one per line, '@name'
+    and profile URLs accepted, blank lines and '#' comments ignored.
+    Unsafe names are reported and dropped, duplicates kept once.
+    """
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    targets = []
+    for line in lines:
+        name = line.split("#", 1)[0].strip()
+        if "instagram.com/" in name:
+            name = name.split("instagram.com/", 1)[1].split("/")[0]
+        name = name.lstrip("@")
+        if not name:
+            continue
+        if not is_safe_username(name):
+            log.error(f"Skipping invalid or unsafe target username: '{name}'")
+            continue
+        if name not in targets:
+            targets.append(name)
+    return targets
+
+
+def open_target(name, args, osint_root):
+    """
+    Output folders, metadata sink and manifest of one target, plus its
+    progress counters. Raises RuntimeError if the sink can't be opened.
+    """
+    # Use basename as an additional layer of protection
+    target_dir = os.path.join(osint_root, "targets", os.path.basename(name))
+    video_dir = os.path.join(target_dir, "instagram", "videos")
+    image_dir = os.path.join(target_dir, "instagram", "images")
+    data_dir = os.path.join(target_dir, "instagram", "data")
+
+    os.makedirs(video_dir, exist_ok=True)
+    os.makedirs(image_dir, exist_ok=True)
+    os.makedirs(data_dir, exist_ok=True)
+
+    sink = metadata_sink.open_sink(args.metadata_sink, data_dir)
+
+    manifest_path = os.path.join(target_dir, "instagram", "manifest.jsonl")
+    seed_manifest = not os.path.exists(manifest_path)
+    manifest = Manifest(manifest_path, media_dirs=[image_dir, video_dir])
+    if seed_manifest:
+        seeded = manifest.seed(sink.records())
+        if seeded:
+            log.info(f"Manifest: imported {seeded} previously archived posts of @{name}.")
+
+    return {
+        "target": name,
+        "target_dir": target_dir,
+        "video_dir": video_dir,
+        "image_dir": image_dir,
+        "sink": sink,
+        "manifest": manifest,
+        # Progress / failure isolation, see start_item and record_result
+        "lock": threading.Lock(),
+        "total": 0,
+        "position": 0,
+        "processed": 0,
+        "errors": 0,
+        "streak": 0,
+        "abandoned": False,
+        "failed": None,
+    }
+
+
+def configure_rates(args):
+    """Sets up throttle.SCHEDULER from --rpm, --api-rpm, --nav-rpm and --media-rate."""
+    scheduler = throttle.SCHEDULER
+    if args.rpm:
+        scheduler.total = throttle.TokenBucket.per_minute(args.rpm)
+        log.info(f"Request budget: {args.rpm:g}/min")
+    if args.api_rpm:
+        scheduler.limit("api", throttle.TokenBucket.per_minute(args.api_rpm))
+        log.info(f"API rate: {args.api_rpm:g}/min")
+    if args.nav_rpm:
+        scheduler.limit("nav", throttle.TokenBucket.per_minute(args.nav_rpm))
+        log.info(f"Navigation rate: {args.nav_rpm:g}/min")
+    if args.media_rate:
+        rate = args.media_rate * 1024 * 1024
+        # One second of burst, but never less than a chunk
+        scheduler.limit("media", throttle.TokenBucket(rate, capacity=max(rate, CHUNK_SIZE)))
+        log.info(f"Media rate: {args.media_rate:g} MB/s")
+    return scheduler
+
+
+def load_page(driver, url, ready, pace):
+    """
+    Navigates (under the 'nav' rate of throttle.SCHEDULER), waits for the
+    page to be usable (`ready(driver)`), then sleeps whatever is left of
+    the `pace` jitter budget.
+    """
+    started = time.monotonic()
+    throttle.SCHEDULER.acquire("nav")
+    driver.get(url)
+    if not ready(driver):
+        log.debug(f"Page not ready after {action.READY_TIMEOUT:g}s: {url}")
+    throttle.PACER.pause(pace, since=started)
+
+def drop_archived(post_links, ctx):
+    """Drops archived posts before any navigation or API call (unless --rescan)."""
+    if ctx["args"].rescan:
+        return post_links
+    manifest = ctx["manifest"]
+    new_links = [l for l in post_links if not manifest.is_done(l.strip("/").split("/")[-1])]
+    if len(new_links) < len(post_links):
+        log.info(f"Skipping {len(post_links) - len(new_links)} already archived posts (use --rescan to revisit).")
+    return new_links
+
+
+def collect_target(driver, ctx, sync_cookies):
+    """
+    Opens the target's profile, lists its posts and returns the sorted
+    queue of posts still to archive (None if they can't be listed).
+    Raises LoginRequired if Instagram asks for a login we can't complete.
+    """
+    args = ctx["args"]
+    session = ctx["session"]
+
+    # Navigation
+    target_url = f"https://www.instagram.com/{ctx['target']}/"
+    if args.tagged:
+        log.info("Switching to TAGGED feed...")
+        target_url += "tagged/"
+
+    log.info(f"Navigating to {target_url}...")
+    load_page(driver, target_url, action.wait_for_profile_ready, "profile")
+
+    # Login Check (Auto-Trigger)
+    if "Log In" in driver.title or "Entrar" in driver.title:
+        log.error("Redirected to login page. Session likely expired or invalid.")
+        # If headless, we might need to unhide to login? Difficult dynamically.
+        # Best effort: pause and hope user can interact if not headless.
+        if args.headless:
+            log.error("Cannot login interactively in headless mode! Rerun with --login (without headless).")
+            raise LoginRequired(target_url)
+        if not wait_for_login(driver):
+            raise LoginRequired(target_url)
+        # Navigate BACK to target after login
+        log.info(f"Re-navigating to {target_url}...")
+        load_page(driver, target_url, action.wait_for_profile_ready, "profile")
+
+    # Authenticate API and media calls with the browser's login
+    sync_cookies()
+
+    # Enumeration Phase: paginated feed API first, DOM scrolling as fallback
+    post_links = None
+    feed_details = {} # url -> details parsed from the feed page (media + metrics)
+    if args.enum in ["auto", "api"]:
+        log.info("Enumerating posts through the feed API...")
+        try:
+            post_links, feed_details = enumerate_feed(args, ctx["target"], session)
+        except (feed_api.FeedError, IOError) as e:
+            if args.enum == "api":
+                log.error(f"Feed API unavailable: {e}")
+                ctx["failed"] = str(e)
+                return None
+            log.warning(f"Feed API unavailable ({e}). Falling back to scrolling.")
+
+    if post_links is None:
+        # Scroll + Harvest Phase: links are collected after every scroll step
+        log.info("Scrolling feed to populate...")
+        post_links = action.harvest_post_links(driver, max_posts=args.max_posts, since=args.since)
+    log.info(f"Found {len(post_links)} unique posts.")
+
+    post_links = drop_archived(post_links, ctx)
+
+    # ==========================================================
+    # PRE-SCAN / SORTING PHASE
+    # ==========================================================
+    posts_queue = [] # List of dicts: {'url':..., 'data':...}
+
+    if args.sort in ["likes", "views"]:
+        log.info(f"Pre-scanning {len(post_links)} posts for sort: {args.sort.upper()} (Parallel Mode)...")
+
+        # The shared AIMD limiter decides how many scans run at once; the
+        # thread pool only caps it
+        limiter = ctx["concurrency"]
+
+        def scan_post(link):
+            # Metrics already came with the feed page
+            if link in feed_details:
+                return feed_details[link]
+            # Small random jitter to reduce block risk
+            throttle.PACER.pause("scan")
+            limiter.acquire()
+            det = action.get_post_details_api(link, session, cache=ctx["api_cache"])
+            status = det["status"]
+            # 429/5xx were retried (with Retry-After) by throttle.RETRY; any of
+            # them still means the server wants fewer requests in flight
+            throttled = status is None or status == 429 or status >= 500
+            limiter.release(ok=None if det["cached"] else not (throttled or det["retries"]), latency=det["latency"])
+            if throttled and not det["cached"]:
+                log.warning(f"Could not rank {link} (HTTP {status}), left unscored.")
+            det['url'] = link
+            return det
+
+        if args.top:
+            # Winners start downloading as soon as no unscanned post can outrank them
+            log.info(f"Keeping the top {args.top} by {args.sort}; downloads start as winners are confirmed.")
+
+            def scan_ranked(link):
+                # Unscored posts can't be placed in the ranking
+                det = scan_post(link)
+                return det if det.get("success") or link in feed_details else None
+
+            return ranking.TopKScan(
+                post_links, scan_ranked, args.top, key=lambda det: det.get(args.sort) or 0,
+                max_workers=limiter.max_limit, on_error=lambda e: log.error(f"Scan worker failed: {e}")
+            )
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=limiter.max_limit) as executor:
+            # Submit all
+            futures = {executor.submit(scan_post, link): link for link in post_links}
+
+            completed = 0
+            for future in concurrent.futures.as_completed(futures):
+                completed += 1
+                if completed % 10 == 0:
+                    log.debug(f"Scanned {completed}/{len(post_links)}...")
+
+                try:
+                    data = future.result()
+                    if not data.get("success") and data["url"] not in feed_details:
+                        # Unscored: no made-up zero metrics to sort on or save
+                        data = {"url": data["url"]}
+                    posts_queue.append(data)
+                except Exception as e:
+                    log.error(f"Scan worker failed: {e}")
+
+    else:
+        # Standard Modes
+        for link in post_links:
+            posts_queue.append(feed_details.get(link) or {'url': link})
+
+    sort_queue(posts_queue, args.sort, args.top)
+    return posts_queue
+
+
+def round_robin(queues):
+    """
+    Interleaves [(ctx, posts), ...] one post per target at a time, so every
+    target advances under the shared request budget. Yields (ctx, post)
+    lazily, so streamed queues (--top) are consumed as they fill.
+    """
+    iters = [(ctx, iter(posts)) for ctx, posts in queues]
+    while iters:
+        remaining = []
+        for ctx, it in iters:
+            post = next(it, None)
+            if post is not None:
+                yield ctx, post
+                remaining.append((ctx, it))
+        iters = remaining
+
+
+def start_item(ctx):
+    """Progress label of the target's next post: '3/40', or '@user 3/40' in batch runs."""
+    with ctx["lock"]:
+        ctx["position"] += 1
+        label = f"{ctx['position']}/{ctx['total']}"
+    return f"@{ctx['target']} {label}" if ctx["batch"] else label
+
+
+def record_result(ctx, error=None):
+    """
+    Per-target bookkeeping. In batch runs a target whose posts fail
+    TARGET_MAX_ERRORS times in a row is given up, the others carry on.
+    """
+    with ctx["lock"]:
+        if error is None:
+            ctx["processed"] += 1
+            ctx["streak"] = 0
+            return
+        ctx["errors"] += 1
+        ctx["streak"] += 1
+        give_up = ctx["batch"] and ctx["streak"] >= TARGET_MAX_ERRORS and not ctx["abandoned"]
+        if give_up:
+            ctx["abandoned"] = True
+    log.error(f"Item Error: {error}")
+    if give_up:
+        log.warning(f"@{ctx['target']}: {TARGET_MAX_ERRORS} failures in a row, skipping its remaining posts.")
+
+
+def finish_run(pool, contexts):
+    """Drains the download pool, closes every sink and summarizes batch runs."""
+    pending = pool.pending_count()
+    if pending:
+        log.info(f"Waiting for {pending} download job(s) to finish...")
+    # After Ctrl+C only in-flight transfers are completed
+    cancelled = pool.drain(cancel_pending=STOP_REQUESTED)
+    if cancelled:
+        log.warning(f"Dropped {cancelled} queued download job(s).")
+    for ctx in contexts:
+        ctx["sink"].close()
+    limiter = contexts[0].get("concurrency") if contexts else None
+    if limiter and (limiter.successes or limiter.failures):
+        stats = limiter.stats()
+        log.info(f"Pre-scan concurrency: limit {stats['limit']}, {stats['successes']} ok, "
+                 f"{stats['failures']} throttled/failed, {stats['backoffs']} back-offs")
+    for kind, policy in sorted(throttle.RETRY.items()):
+        stats = policy.stats()
+        if any(stats.values()):
+            log.info(f"{kind} retries: {stats['retries']}, gave up {stats['give_ups']} time(s), "
+                     f"circuit breaker tripped {stats['trips']} time(s)")
+    waited = throttle.SCHEDULER.waited
+    if waited:
+        log.info("Rate limits waited: " + ", ".join(f"{kind} {secs:.0f}s" for kind, secs in sorted(waited.items())))
+    cache = contexts[0].get("api_cache") if contexts else None
+    if cache:
+        log.debug(f"API cache: {cache.hits} hits, {cache.revalidated} revalidated, {cache.misses} misses")
+        cache.close()
+
+    if len(contexts) > 1:
+        log.info("Batch summary:")
+        for ctx in contexts:
+            if ctx["failed"]:
+                log.warning(f"  @{ctx['target']}: not listed ({ctx['failed']})")
+                continue
+            status = " (abandoned)" if ctx["abandoned"] else ""
+            log.info(f"  @{ctx['target']}: {ctx['processed']}/{ctx['total']} posts processed, {ctx['errors']} failed{status}")
+
+
+def process_post(driver, item_data, ctx, progress="", sync_cookies=None):
+    """
+    Browser work for one post: navigate, check the owner, read metadata and
+    media URLs, then queue the transfers on ctx["pool"].
+    Runs on whichever browser is handed in (the main one or a DriverPool
+    worker); driver failures propagate so the caller can recover it.
+    """
+    args = ctx["args"]
+    session = ctx["session"]
+    manifest = ctx["manifest"]
+    listener = getattr(driver, "media_listener", None)
+
+    link = item_data['url']
+    short_code = link.strip("/").split("/")[-1]
+
+    # Metrics logging
+    metrics_info = ""
+    if 'likes' in item_data:
+        metrics_info = f" | {item_data.get('likes')} Likes, {item_data.get('views')} Views"
+
+    log.info(f"[{progress}] Processing: {link}{metrics_info}")
+
+    # Forget media responses of the previous page
+    if listener:
+        listener.reset()
+    elif getattr(driver, "perf_logs", True):
+        _ = driver.get_log("performance")
+
+    load_page(driver, link, action.wait_for_post_ready, "post")
+    if sync_cookies:
+        sync_cookies()
+
+    # One page_source transfer and one parse for all DOM readers below
+    page = action.PageSnapshot(driver)
+
+    if not args.tagged:
+        if not action.verify_post_owner(driver, ctx["target"], snapshot=page):
+            log.debug(f"Skipping post (not owner)")
+            manifest.mark(short_code, "skipped")
+            return
+
+    # Extract Metadata
+    metadata = action.extract_metadata(driver, snapshot=page)
+    if 'likes' in item_data:
+        metadata['likes'] = item_data['likes']
+        metadata['views'] = item_data.get('views', 0)
+
+    # Consolidate Date/Timestamp
+    post_date = item_data.get('date') or metadata.get('date')
+    # If both fail, default to now or None (but None won't sort files)
+    if not post_date: post_date = time.time()
+
+    caption, safe_caption = caption_names(metadata.get("caption", ""), short_code)
+
+    action.unmute_video(driver)
+
+    # Setup Variables for Paths
+    api_media_list = item_data.get('media')
+    if not api_media_list:
+        details_now = action.get_post_details_api(link, session, cache=ctx["api_cache"])
+        api_media_list = details_now.get('media', [])
+        if details_now.get('date'): post_date = details_now['date'] # Update date if found now
+
+    log_media = action.get_video_url_from_network_logs(driver, session, listener=listener)
+
+    # The DOM is only readable while the browser is still on this
+    # post, so the fallback list is captured up front: the API URLs can
+    # still fail (403, expired) once the worker gets to them. Blob URLs
+    # need the driver as well; they are fetched right here when the API
+    # has nothing, and left out otherwise.
+    dom_media = []
+    if not (log_media and log_media["video"]):
+        dom_media = action.extract_media_from_post(driver, snapshot=page)
+        if api_media_list:
+            dom_media = [item for item in dom_media if not item["url"].startswith("blob:")]
+        for idx, item in enumerate(dom_media):
+            if item["url"].startswith("blob:"):
+                suffix = "" if len(dom_media) == 1 else f"_{idx+1}"
+                item["saved"], _ = download_file(
+                    item["url"],
+                    session,
+                    driver,
+                    ctx["video_dir"],
+                    override_name=f"{safe_caption}{suffix}.mp4",
+                    media_type="video",
+                    timestamp=post_date
+                )
+
+    metadata["url"] = link
+    metadata["media_files"] = []
+
+    ctx["pool"].submit(save_post, {
+        "link": link,
+        "short_code": short_code,
+        "metadata": metadata,
+        "caption": caption,
+        "safe_caption": safe_caption,
+        "post_date": post_date,
+        "api_media": api_media_list,
+        "log_media": log_media,
+        "dom_media": dom_media,
+        "video_dir": ctx["video_dir"],
+        "image_dir": ctx["image_dir"],
+        "sink": ctx["sink"],
+        "manifest": manifest,
+        "store": ctx["store"],
+    }, session)
+
+
+def prefetch_details(job):
+    ctx, item_data = job
+    return action.get_post_details_api(item_data["url"], ctx["session"], cache=ctx["api_cache"])
+
+
+def needs_details(job):
+    """Only URL-only queue entries are worth an API call ahead of time."""
+    ctx, item_data = job
+    return not item_data.get("media") and not ctx["abandoned"]
+
+
+def with_prefetched(prefetcher, index, item_data):
+    """item_data completed with the prefetched API details of job `index`, if any."""
+    details = prefetcher.get(index) if prefetcher else None
+    if not details or not details.get("success"):
+        return item_data
+    merged = dict(item_data)
+    for key in ("media", "date"):
+        if details.get(key) and not merged.get(key):
+            merged[key] = details[key]
+    # 0 is a real count (views of an image post), not a missing one
+    for key in ("likes", "views"):
+        if key in details:
+            merged.setdefault(key, details[key])
+    return merged
+
+
+def run_driver_pool(args, jobs, driver, listener, prefetcher=None):
+    """
+    --workers N: processes the (ctx, post) jobs on N headless browsers
+    running on clones of the profile. The enumeration browser (launched by
+    this run; --attach is refused with --workers) is closed first so the
+    profile on disk holds its latest cookies when it is cloned.
+    """
+    log.info(f"Starting {args.workers} browser workers on cloned profiles...")
+    if listener:
+        listener.close()
+    try:
+        driver.quit()
+    except:
+        pass
+
+    browser_errors = (InvalidSessionIdException, WebDriverException)
+
+    def handle(worker_driver, job):
+        index, (ctx, item_data) = job
+        if ctx["abandoned"]:
+            return
+        try:
+            item_data = with_prefetched(prefetcher, index, item_data)
+            process_post(worker_driver, item_data, ctx, progress=start_item(ctx))
+        except browser_errors:
+            raise # DriverPool relaunches the browser and retries
+        except Exception as item_error:
+            record_result(ctx, item_error)
+        else:
+            record_result(ctx)
+
+    drivers = driver_pool.DriverPool(
+        size=args.workers,
+        base_profile=driver_setup.PROFILE_DIR,
+        clone_root=driver_setup.PROFILE_DIR + "_workers",
+        launch=lambda profile: driver_setup.get_driver(
+            headless=True, mute_audio=args.mute, cdp_capture=not args.perf_logs, profile_dir=profile, block=args.block
+        ),
+        crash_errors=browser_errors,
+        on_error=lambda e: log.error(f"Item Error: {e}"),
+    )
+    try:
+        drivers.start()
+        left = drivers.run(list(enumerate(jobs)), handle, should_stop=lambda: STOP_REQUESTED)
+        if left:
+            log.warning(f"{left} post(s) were not processed.")
+    finally:
+        drivers.close()
+
+
+def attach_browser(args):
+    """
+    --attach: connects to the long-lived browser at HOST:PORT. The local
+    daemon is (re)launched first if it doesn't answer its health check.
+    Returns the driver, or None.
+    """
+    address = args.attach
+    if not browser_daemon.health(address):
+        host, _, port = address.rpartition(":")
+        if host not in ("127.0.0.1", "localhost") or not port.isdigit():
+            log.error(f"No browser answering on {address}.")
+            return None
+        log.info(f"No browser on {address}, starting the daemon...")
+        try:
+            browser_daemon.start(int(port), headless=args.headless, mute_audio=args.mute)
+        except RuntimeError as e:
+            log.error(f"Browser daemon failed to start: {e}")
+            return None
+    log.debug(f"Attaching to browser at {address}")
+    return driver_setup.attach_driver(address, cdp_capture=not args.perf_logs, block=args.block)
+
+
+def browser_login(args, cookie_path, force_login=False):
+    """
+    Starts Chrome on the profile just long enough to export its Instagram
+    cookies, asking the user to log in (or clear a challenge) if needed.
+    Returns the cookie snapshot, or None if no session could be obtained.
+    """
+    interactive = force_login or args.login
+    driver = driver_setup.get_driver(headless=args.headless and not interactive, mute_audio=True, cdp_capture=False)
+    try:
+        load_page(driver, "https://www.instagram.com/", action.wait_for_page_ready, "profile")
+        state = session_bridge.export_cookies(driver)
+        if interactive or not session_bridge.is_logged_in(state):
+            if args.headless and not interactive:
+                log.error("Cannot login interactively in headless mode! Rerun with --login (without headless).")
+                return None
+            if not wait_for_login(driver):
+                return None
+            load_page(driver, "https://www.instagram.com/", action.wait_for_page_ready, "profile")
+            state = session_bridge.export_cookies(driver)
+        if not session_bridge.is_logged_in(state):
+            return None
+        session_bridge.save_state(cookie_path, state)
+        return state
+    finally:
+        try:
+            driver.quit()
+        except:
+            pass
+
+
+def queue_api_post(details, ctx, progress=""):
+    """
+    Browserless counterpart of process_post: hands a post's feed/API
+    details straight to the download pool.
+    """
+    args = ctx["args"]
+    session = ctx["session"]
+    manifest = ctx["manifest"]
+    link = details["url"]
+    short_code = link.strip("/").split("/")[-1]
+    log.info(f"[{progress}] Processing: {link} | {details.get('likes')} Likes, {details.get('views')} Views")
+
+    if not args.tagged and details.get("owner") and details["owner"].lower() != ctx["target"].lower():
+        log.debug(f"Skipping post (owner @{details['owner']})")
+        manifest.mark(short_code, "skipped")
+        return
+
+    media = details.get("media")
+    if not media or any(not item.get("url") for item in media):
+        # Some feed nodes omit playable versions; ask the post endpoint
+        fresh = action.get_post_details_api(link, session, cache=ctx["api_cache"])
+        if fresh.get("success"):
+            details = dict(fresh, url=link)
+            media = details["media"]
+    if not media or any(not item.get("url") for item in media):
+        log.warning(f"No downloadable media for {link}")
+        manifest.mark(short_code, "failed")
+        return
+
+    caption, safe_caption = caption_names(details.get("caption") or "", short_code)
+    metadata = {
+        "url": link,
+        "date": details.get("date"),
+        "caption": details.get("caption", ""),
+        "owner": details.get("owner"),
+        "likes": details.get("likes"),
+        "views": details.get("views"),
+        "media_files": [],
+    }
+    ctx["pool"].submit(save_post, {
+        "link": link,
+        "short_code": short_code,
+        "metadata": metadata,
+        "caption": caption,
+        "safe_caption": safe_caption,
+        "post_date": details.get("date") or time.time(),
+        "api_media": media,
+        "log_media": None,
+        "dom_media": [],
+        "video_dir": ctx["video_dir"],
+        "image_dir": ctx["image_dir"],
+        "sink": ctx["sink"],
+        "manifest": manifest,
+        "store": ctx["store"],
+    }, session)
+
+
+def run_browserless(args, session, cookie_path, contexts):
+    """
+    --browserless: enumerate -> post details -> download over HTTP only,
+    for every target. Chrome is launched only to (re)obtain the cookies.
+    """
+    state = None if args.login else session_bridge.load_state(cookie_path)
+    if state:
+        log.info("Using cached session cookies.")
+    else:
+        log.info("Exporting session cookies from the browser profile...")
+        state = browser_login(args, cookie_path)
+        if not state:
+            log.error("Login required. Stopping.")
+            return
+    session_bridge.apply_state(session, state)
+    relogged = False
+
+    queues = []
+    for ctx in contexts:
+        if STOP_REQUESTED:
+            break
+        try:
+            try:
+                post_links, feed_details = enumerate_feed(args, ctx["target"], session)
+            except feed_api.FeedError as e:
+                if relogged or not e.login_required:
+                    raise
+                log.warning(f"Feed API refused the session ({e}). Opening the browser to log in again...")
+                relogged = True
+                state = browser_login(args, cookie_path, force_login=True)
+                if not state:
+                    raise
+                session_bridge.apply_state(session, state)
+                post_links, feed_details = enumerate_feed(args, ctx["target"], session)
+        except (feed_api.FeedError, IOError) as e:
+            log.error(f"@{ctx['target']}: could not list posts: {e}")
+            ctx["failed"] = str(e)
+            continue
+        log.info(f"@{ctx['target']}: found {len(post_links)} unique posts.")
+
+        # Feed pages already carry media and metrics for every post
+        posts_queue = [feed_details[link] for link in drop_archived(post_links, ctx)]
+        sort_queue(posts_queue, args.sort, args.top)
+        ctx["total"] = len(posts_queue)
+        queues.append((ctx, posts_queue))
+
+    for ctx, details in round_robin(queues):
+        if STOP_REQUESTED:
+            log.warning("Stopping loop as requested.")
+            break
+        if ctx["abandoned"]:
+            continue
+        try:
+            queue_api_post(details, ctx, progress=start_item(ctx))
+        except Exception as item_error:
+            record_result(ctx, item_error)
+        else:
+            record_result(ctx)
+
+
 def main():
     global log, STOP_REQUESTED
     parser = argparse.ArgumentParser(description="Instagram OSINT Scraper")
-    parser.add_argument("target", help="Username of the target account")
+    parser.add_argument("target", nargs="?", help="Username of the target account")
+    parser.add_argument("--targets-file", metavar="PATH", help="Batch mode: file with one username per line ('-' reads stdin)")
     parser.add_argument("--login", action="store_true", help="Interactive login mode before scraping")
     parser.add_argument("--tagged", action="store_true", help="Scrape 'tagged' feed")
     parser.add_argument("--debug", action="store_true", help="Enable verbose debug output")
@@ -203,43 +1307,143 @@ def main():
     parser.add_argument("--mute", action="store_true", default=True, help="Mute browser audio (default: True)")
     parser.add_argument("--no-mute", action="store_false", dest="mute", help="Enable browser audio")
     parser.add_argument("--sort", choices=["default", "reverse", "random", "likes", "views"], default="default", help="Sort order of scraped posts")
+    parser.add_argument("--store", nargs="?", const="", default=None, metavar="DIR", help="Deduplicate media across targets in a content-addressed store (default DIR: targets/.media_store)")
+    parser.add_argument("--metadata-sink", choices=metadata_sink.SINK_CHOICES, default="files", help="Where post metadata goes: one JSON per post (default), an append-only JSONL index, or SQLite")
+    parser.add_argument("--top", type=int, default=None, metavar="N", help="With --sort likes/views: only the N best posts, downloading each one as soon as its rank is certain")
+    parser.add_argument("--enum", choices=["auto", "api", "scroll"], default="auto", help="How posts are listed: paginated feed API with scroll fallback (auto), API only, or DOM scrolling only")
+    parser.add_argument("--max-posts", type=int, default=None, help="Stop enumerating after this many posts")
+    parser.add_argument("--since", type=parse_since, default=None, metavar="YYYY-MM-DD", help="Only posts published on or after this date")
+    parser.add_argument("--api-cache-ttl", type=float, default=24, metavar="HOURS", help="Reuse post API responses cached on disk for this long (revalidated after); 0 disables the cache (default: 24)")
+    parser.add_argument("--rpm", type=float, default=None, help="Global budget of Instagram requests (page loads, API calls) per minute, shared by all targets")
+    parser.add_argument("--api-rpm", type=float, default=None, help="Separate limit on API calls (feed pages, post details) per minute")
+    parser.add_argument("--nav-rpm", type=float, default=None, help="Separate limit on browser page loads per minute")
+    parser.add_argument("--media-rate", type=float, default=None, metavar="MB/S", help="Cap on CDN media transfer speed in megabytes per second, all downloads combined")
+    parser.add_argument("--attach", nargs="?", const=browser_daemon.DEFAULT_ADDRESS, default=None, metavar="HOST:PORT", help=f"Attach to a running browser (browser_daemon.py) instead of launching Chrome (default: {browser_daemon.DEFAULT_ADDRESS})")
+    parser.add_argument("--browserless", action="store_true", help="Scrape over HTTP only with the profile's exported cookies; Chrome opens only to log in")
+    parser.add_argument("--rescan", action="store_true", help="Revisit posts already recorded as archived in the manifest")
+    parser.add_argument("--pace", type=float, default=1.0, metavar="FACTOR", help="Scale of the randomized delays between browser actions; 0 keeps only the page readiness waits (default: 1.0)")
+    parser.add_argument("--block", type=parse_block, default=(), metavar="CATEGORIES", help="Resources the browser skips: comma-separated images,fonts,css,trackers,video, or all / none (default: none)")
+    parser.add_argument("--perf-logs", action="store_true", help="Capture media URLs by polling Chrome's performance log instead of CDP events")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel headless browsers on cloned profiles for the per-post work (default: 1)")
+    parser.add_argument("--prefetch", type=int, default=prefetch.DEFAULT_AHEAD, metavar="K", help=f"Fetch API details of the next K posts in the background while the browser works; 0 disables (default: {prefetch.DEFAULT_AHEAD})")
+    parser.add_argument("--download-workers", type=int, default=4, help="Parallel media downloads while the browser moves on (default: 4)")
     args = parser.parse_args()
 
     # Init Logger
     log = Logger(debug_mode=args.debug)
     log.banner()
 
-    # Validate target username
-    if not is_safe_username(args.target):
-        log.error(f"Invalid or unsafe target username: '{args.target}'")
+    # Validate target username(s)
+    targets = []
+    if args.target:
+        if not is_safe_username(args.target):
+            log.error(f"Invalid or unsafe target username: '{args.target}'")
+            sys.exit(1)
+        targets.append(args.target)
+    if args.targets_file:
+        try:
+            targets += [t for t in read_targets(args.targets_file) if t not in targets]
+        except OSError as e:
+            log.error(f"Cannot read targets file: {e}")
+            sys.exit(1)
+    if not targets:
+        log.error("No target given: pass a username or --targets-file.")
         sys.exit(1)
 
     # Paths
     SCRAPER_DIR = os.path.dirname(os.path.abspath(__file__))
     OSINT_ROOT = os.path.dirname(SCRAPER_DIR)
-    # Use basename as an additional layer of protection
-    safe_target = os.path.basename(args.target)
-    TARGET_DIR = os.path.join(OSINT_ROOT, "targets", safe_target)
-
-    VIDEO_DIR = os.path.join(TARGET_DIR, "instagram", "videos")
-    IMAGE_DIR = os.path.join(TARGET_DIR, "instagram", "images")
-    DATA_DIR = os.path.join(TARGET_DIR, "instagram", "data")
-
-    os.makedirs(VIDEO_DIR, exist_ok=True)
-    os.makedirs(IMAGE_DIR, exist_ok=True)
-    os.makedirs(DATA_DIR, exist_ok=True)
 
-    log.info(f"Target: @{args.target}")
-    log.info(f"Output: {TARGET_DIR}")
-
-    # 1. Start Driver
-    # Pass mute/headless options (requires updating driver_setup.py to accept them)
+    contexts = []
     try:
-        driver = driver_setup.get_driver(headless=args.headless, mute_audio=args.mute)
-    except TypeError:
-        # Fallback if driver_setup isn't updated yet (safety net)
-        log.debug("driver_setup.get_driver doesn't accept mute_audio yet.")
-        driver = driver_setup.get_driver(headless=args.headless)
+        for name in targets:
+            contexts.append(open_target(name, args, OSINT_ROOT))
+    except RuntimeError as e:
+        log.error(f"Metadata sink unavailable: {e}")
+        sys.exit(1)
+
+    store = None
+    if args.store is not None:
+        store = media_store.MediaStore(args.store or os.path.join(OSINT_ROOT, "targets", ".media_store"))
+        log.info(f"Media store: {store.root}")
+
+    if args.top is not None and (args.top < 1 or args.sort not in ["likes", "views"]):
+        parser.error("--top needs a positive N and --sort likes or views")
+    if args.pace < 0:
+        parser.error("--pace must be >= 0")
+    if args.workers > 1 and args.attach:
+        # The pool would quit the shared browser and clone a profile it still has open
+        parser.error("--workers can't be combined with --attach")
+    throttle.PACER.scale = args.pace
+
+    cache = None
+    if args.api_cache_ttl > 0:
+        cache = ApiCache(os.path.join(OSINT_ROOT, "targets", ".api_cache.sqlite"), ttl=args.api_cache_ttl * 3600)
+
+    configure_rates(args)
+
+    if len(contexts) == 1:
+        log.info(f"Target: @{targets[0]}")
+        log.info(f"Output: {contexts[0]['target_dir']}")
+    else:
+        log.info(f"Batch: {len(contexts)} targets, posts interleaved round-robin")
+
+    # Shared by every target: one session, one download pool, one rate scheduler.
+    # The browser only extracts URLs and metadata; transfers, merges and
+    # the metadata JSON are handed to the pool so the next post can load
+    # while the previous one is still streaming to disk.
+    session = requests.Session()
+    pool = download_pool.DownloadPool(
+        max_workers=args.download_workers,
+        on_error=lambda e: log.error(f"Download worker failed: {e}")
+    )
+    # One AIMD limit for every target's pre-scan: they all hit the same server
+    limiter = throttle.AdaptiveConcurrency(initial=SCAN_WORKERS, max_limit=SCAN_MAX_WORKERS)
+    for ctx in contexts:
+        ctx.update({
+            "args": args,
+            "session": session,
+            "pool": pool,
+            "store": store,
+            "api_cache": cache,
+            "concurrency": limiter,
+            "batch": len(contexts) > 1,
+        })
+
+    if args.browserless:
+        if args.enum == "scroll":
+            log.warning("--browserless lists posts through the feed API; ignoring --enum scroll.")
+        cookie_path = os.path.join(SCRAPER_DIR, "chrome_profile", session_bridge.COOKIE_CACHE)
+        try:
+            run_browserless(args, session, cookie_path, contexts)
+        except KeyboardInterrupt:
+            log.warning("User interrupted session.")
+        except Exception as e:
+            log.error(f"Critical Error: {e}")
+        finally:
+            finish_run(pool, contexts)
+        return
+
+    # 1. Start Driver (or attach to the browser daemon)
+    if args.attach:
+        driver = attach_browser(args)
+        if driver is None:
+            finish_run(pool, contexts)
+            sys.exit(1)
+    else:
+        # Pass mute/headless options (requires updating driver_setup.py to accept them)
+        try:
+            driver = driver_setup.get_driver(headless=args.headless, mute_audio=args.mute, cdp_capture=not args.perf_logs, block=args.block)
+        except TypeError:
+            # Fallback if driver_setup isn't updated yet (safety net)
+            log.debug("driver_setup.get_driver doesn't accept mute_audio yet.")
+            driver = driver_setup.get_driver(headless=args.headless)
+
+    listener = getattr(driver, "media_listener", None)
+    if listener:
+        log.debug("Network capture: CDP media listener")
+    else:
+        log.debug("Network capture: performance log polling")
 
     # 2. Login Flow (Seamless)
     if args.login:
@@ -247,324 +1451,85 @@ def main():
             log.warning("Login mode with Headless is difficult. If it fails, try without --headless.")
         if not wait_for_login(driver):
             log.info("Exiting...")
+            finish_run(pool, contexts)
             driver.quit()
             return
 
-    # 3. Setup Session
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": driver.execute_script("return navigator.userAgent")
-    })
+    # 3. Session cookies follow the browser, see sync_cookies below
+    bridge = session_bridge.SessionBridge(driver, session)
 
-    try:
-        # Navigation
-        target_url = f"https://www.instagram.com/{args.target}/"
-        if args.tagged:
-            log.info("Switching to TAGGED feed...")
-            target_url += "tagged/"
-
-        log.info(f"Navigating to {target_url}...")
-        driver.get(target_url)
-        action.human_sleep(3, 5)
-
-        # Login Check (Auto-Trigger)
-        if "Log In" in driver.title or "Entrar" in driver.title:
-            log.error("Redirected to login page. Session likely expired or invalid.")
-            # If headless, we might need to unhide to login? Difficult dynamically.
-            # Best effort: pause and hope user can interact if not headless.
-            if args.headless:
-                log.error("Cannot login interactively in headless mode! Rerun with --login (without headless).")
-                START_LOGIN_MODE = False
-            else:
-                START_LOGIN_MODE = True
+    def sync_cookies():
+        pulled, pushed = bridge.sync()
+        if pulled or pushed:
+            log.debug(f"Cookies synced: {pulled} from browser, {pushed} to browser")
 
-            if START_LOGIN_MODE and wait_for_login(driver):
-                # Navigate BACK to target after login
-                log.info(f"Re-navigating to {target_url}...")
-                driver.get(target_url)
-                action.human_sleep(3, 5)
-            else:
+    prefetcher = None
+    queues = []
+    try:
+        # Collection Phase: list every target's pending posts
+        for ctx in contexts:
+            if STOP_REQUESTED:
+                break
+            if ctx["batch"]:
+                log.info(f"--- @{ctx['target']} ---")
+            try:
+                posts_queue = collect_target(driver, ctx, sync_cookies)
+            except LoginRequired:
                 log.error("Login required. Stopping.")
                 return
-
-        # Scroll Phase
-        log.info("Scrolling feed to populate...")
-        action.scroll_human(driver, scroll_count=3)
-
-        # Harvest
-        post_links = action.get_post_links(driver)
-        log.info(f"Found {len(post_links)} unique posts.")
-
-
-        # ==========================================================
-        # PRE-SCAN / SORTING PHASE
-        # ==========================================================
-        posts_queue = [] # List of dicts: {'url':..., 'data':...}
-
-        if args.sort in ["likes", "views"]:
-            log.info(f"Pre-scanning {len(post_links)} posts for sort: {args.sort.upper()} (Parallel Mode)...")
-
-            import concurrent.futures
-            import time
-
-            # Rate limiting / Worker handling
-            # We use a wrapper to add specific handling if needed
-            def scan_post(link):
-                # Small random jitter to reduce block risk
-                time.sleep(random.uniform(0.05, 0.2))
-                det = action.get_post_details_api(link, session)
-                det['url'] = link
-                return det
-
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                # Submit all
-                futures = {executor.submit(scan_post, link): link for link in post_links}
-
-                completed = 0
-                for future in concurrent.futures.as_completed(futures):
-                    completed += 1
-                    if completed % 10 == 0:
-                        log.debug(f"Scanned {completed}/{len(post_links)}...")
-
-                    try:
-                        data = future.result()
-                        posts_queue.append(data)
-                    except Exception as e:
-                        log.error(f"Scan worker failed: {e}")
-
-            if args.sort == "likes":
-                posts_queue.sort(key=lambda x: x.get('likes', 0), reverse=True)
-            elif args.sort == "views":
-                posts_queue.sort(key=lambda x: x.get('views', 0), reverse=True)
-
-            top_val = posts_queue[0].get(args.sort, 0) if posts_queue else 0
-            log.info(f"Sorting complete. Top post has {top_val} {args.sort}.")
-
-        else:
-            # Standard Modes
-            for link in post_links:
-                posts_queue.append({'url': link})
-
-            if args.sort == "reverse":
-                log.info("Sorting: Oldest First (Reverse)")
-                posts_queue.reverse()
-            elif args.sort == "random":
-                log.info("Sorting: Random (Shuffle)")
-                random.shuffle(posts_queue)
+            except (InvalidSessionIdException, WebDriverException):
+                raise
+            except Exception as e:
+                # One broken target must not take the batch down
+                log.error(f"@{ctx['target']}: could not list posts: {e}")
+                ctx["failed"] = str(e)
+                continue
+            if posts_queue is not None:
+                ctx["total"] = len(posts_queue)
+                queues.append((ctx, posts_queue))
 
         # ==========================================================
         # DOWNLOAD PHASE
         # ==========================================================
-        for i, item_data in enumerate(posts_queue):
-            if STOP_REQUESTED:
-                log.warning("Stopping loop as requested.")
-                break
-
-            link = item_data['url']
-
-            # Metrics logging
-            metrics_info = ""
-            if 'likes' in item_data:
-                metrics_info = f" | {item_data.get('likes')} Likes, {item_data.get('views')} Views"
-
-            log.info(f"[{i+1}/{len(posts_queue)}] Processing: {link}{metrics_info}")
-
-            # Temp tracking
-            temp_files_to_clean = []
-
-            try:
-                # Flush logs
-                _ = driver.get_log("performance")
-
-                driver.get(link)
-                action.human_sleep(2, 4)
-
-                if not args.tagged:
-                    if not action.verify_post_owner(driver, args.target):
-                        log.debug(f"Skipping post (not owner)")
-                        continue
-
-                # Extract Metadata
-                metadata = action.extract_metadata(driver)
-                if 'likes' in item_data:
-                    metadata['likes'] = item_data['likes']
-                    metadata['views'] = item_data['views']
-
-                # Consolidate Date/Timestamp
-                post_date = item_data.get('date') or metadata.get('date')
-                # If both fail, default to now or None (but None won't sort files)
-                if not post_date: post_date = time.time()
+        # --top winners are processed while the pre-scan still runs; the
+        # browser pool shards a fixed list, so it waits for the full ranking
+        streaming = bool(args.top) and args.workers <= 1
+        jobs = round_robin(queues)
+        if not streaming:
+            jobs = list(jobs)
+
+        # API details of the next posts resolve while the browser works
+        if args.prefetch > 0 and not streaming:
+            prefetcher = prefetch.Prefetcher(jobs, prefetch_details, ahead=args.prefetch, wanted=needs_details)
+
+        if args.workers > 1 and len(jobs) > 1:
+            # Parallel browsers on cloned profiles
+            run_driver_pool(args, jobs, driver, listener, prefetcher)
+        else:
+            for index, (ctx, item_data) in enumerate(jobs):
+                if STOP_REQUESTED:
+                    log.warning("Stopping loop as requested.")
+                    break
+                if ctx["abandoned"]:
+                    continue
 
-                # Format for FFMPEG
                 try:
-                    dt_obj = datetime.datetime.fromtimestamp(post_date)
-                    iso_date = dt_obj.strftime('%Y-%m-%d %H:%M:%S')
-                except:
-                    iso_date = None
-
-                caption = metadata.get("caption", "").split("on Instagram")[0]
-                safe_caption = re.sub(r'[\\/*?:"<>|]', "", caption)[:60].strip()
-                if not safe_caption:
-                    safe_caption = f"post_{link.strip('/').split('/')[-1]}"
-
-                action.unmute_video(driver)
-
-                # Setup Variables for Paths
-                api_media_list = item_data.get('media')
-                if not api_media_list:
-                    details_now = action.get_post_details_api(link, session)
-                    api_media_list = details_now.get('media', [])
-                    if details_now.get('date'): post_date = details_now['date'] # Update date if found now
-
-                log_media = action.get_video_url_from_network_logs(driver)
-
-                metadata["url"] = link
-                metadata["media_files"] = []
-                downloaded_any = False
-
-                # PATH 1: API was successful (High Quality / Carousel)
-                if api_media_list:
-                    log.debug(f"Method: API ({len(api_media_list)} items)")
-                    for idx, item in enumerate(api_media_list):
-                       # Use index in filename for carousels
-                       suffix = "" if len(api_media_list) == 1 else f"_{idx+1}"
-
-                       fname, _ = download_file(
-                           item["url"],
-                           session,
-                           driver,
-                           VIDEO_DIR if item["type"] == "video" else IMAGE_DIR,
-                           override_name=f"{safe_caption}{suffix}.{'mp4' if item['type']=='video' else 'jpg'}",
-                           media_type=item["type"],
-                           timestamp=post_date
-                       )
-                       if fname:
-                           metadata["media_files"].append(fname)
-                           downloaded_any = True
-
-                # PATH 2: Network Logs (Video Only - if API missed video or failed)
-                # Only use if we haven't downloaded a video yet OR if API failed entirely
-                if not downloaded_any and log_media and log_media["video"]:
-                    log.debug("Method: Network Logs")
-                    # ... same video logic ...
-                    video_url = log_media["video"]
-                    audio_url = log_media["audio"]
-
-                    temp_vid_name = f"temp_v_{safe_caption[:10]}.mp4"
-                    # Download temps with timestamp too (good practice)
-                    v_file, v_path = download_file(video_url, session, driver, VIDEO_DIR, override_name=temp_vid_name, media_type="video", timestamp=post_date)
-
-                    if v_path: temp_files_to_clean.append(v_path)
-
-                    final_filename = f"{safe_caption}.mp4"
-                    final_path = os.path.join(VIDEO_DIR, final_filename)
-                    merged = False
-
-                    if audio_url:
-                        temp_aud_name = f"temp_a_{safe_caption[:10]}.mp4"
-                        a_file, a_path = download_file(audio_url, session, driver, VIDEO_DIR, override_name=temp_aud_name, media_type="video", timestamp=post_date)
-                        if a_path: temp_files_to_clean.append(a_path)
-
-                        if v_file and a_file:
-                            dur_v = action.get_media_duration(v_path)
-                            dur_a = action.get_media_duration(a_path)
-                            if abs(dur_v - dur_a) <= 2.0:
-                                log.debug("Merging streams...")
-                                # Add Metadata to FFMPEG
-                                cmd = [
-                                    "ffmpeg", "-y",
-                                    "-i", v_path,
-                                    "-i", a_path,
-                                    "-c", "copy",
-                                    "-loglevel", "error"
-                                ]
-                                if iso_date:
-                                    cmd.extend(["-metadata", f"creation_time={iso_date}"])
-
-                                # Add Description/Source Metadata
-                                if caption:
-                                    # Sanitize slightly for metadata preventing huge breaks
-                                    clean_desc = caption.replace('"', "'")[:255]
-                                    cmd.extend(["-metadata", f"title={clean_desc}"])
-                                    cmd.extend(["-metadata", f"description={clean_desc}"])
-
-                                cmd.extend(["-metadata", f"comment={link}"])
-                                artist_name = "@" + link.split('/')[3] if len(link.split('/')) > 3 else "Instagram"
-                                cmd.extend(["-metadata", f"artist={artist_name}"])
-
-                                cmd.append(final_path)
-
-                                try:
-                                    subprocess.run(cmd, check=True)
-                                    log.success(f"Merged: {final_filename}")
-                                    # Update timestamp on merged file
-                                    try: os.utime(final_path, (post_date, post_date))
-                                    except: pass
-                                    metadata["media_files"].append(final_filename)
-                                    merged = True
-                                except Exception as e:
-                                    log.error(f"Merge failed: {e}")
-
-                    if not merged and v_path and os.path.exists(v_path):
-                        if os.path.exists(final_path):
-                             pass
-                        else:
-                            os.rename(v_path, final_path)
-                            log.success(f"Saved (Video Only): {final_filename}")
-                            # Update timestamp on renamed file (renaming keeps it, but safe to force)
-                            try: os.utime(final_path, (post_date, post_date))
-                            except: pass
-                            metadata["media_files"].append(final_filename)
-                            if v_path in temp_files_to_clean: temp_files_to_clean.remove(v_path)
-
-                    downloaded_any = True
-
-                # PATH 3: DOM Fallback (Images/Carousel skipped by API)
-                if not downloaded_any:
-                     log.debug("Method: DOM extraction (Fallback)")
-                     media_items = action.extract_media_from_post(driver)
-                     for idx, item in enumerate(media_items):
-                        item_type = item.get("type", "image")
-                        suffix = "" if len(media_items) == 1 else f"_{idx+1}"
-                        target_dir = IMAGE_DIR if item_type == "image" else VIDEO_DIR
-                        fname, _ = download_file(
-                            item["url"],
-                            session,
-                            driver,
-                            target_dir,
-                            override_name=f"{safe_caption}{suffix}.{'mp4' if item_type=='video' else 'jpg'}",
-                            media_type=item_type,
-                            timestamp=post_date
-                        )
-                        if fname: metadata["media_files"].append(fname)
-
-            # Save Metadata
-
-                # Save Metadata
-                short_code = link.strip("/").split("/")[-1]
-                json_path = os.path.join(DATA_DIR, f"{short_code}.json")
-                with open(json_path, "w", encoding="utf-8") as f:
-                    json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-            except (InvalidSessionIdException, WebDriverException) as driver_err:
-                log.error(f"Browser connection lost: {driver_err}")
-                log.warning("The browser window might have been closed or crashed.")
-                STOP_REQUESTED = True
-                break
-            except Exception as item_error:
-                err_str = str(item_error)
-                # Suppress connection errors if we are trying to stop
-                if STOP_REQUESTED and ("HTTPConnectionPool" in err_str or "Max retries exceeded" in err_str or "Connection refused" in err_str):
-                    pass
-                else:
-                    log.error(f"Item Error: {item_error}")
-
-            finally:
-                if temp_files_to_clean:
-                    for tp in temp_files_to_clean:
-                        if os.path.exists(tp):
-                            try: os.remove(tp)
-                            except: pass
+                    item_data = with_prefetched(prefetcher, index, item_data)
+                    process_post(driver, item_data, ctx, progress=start_item(ctx), sync_cookies=sync_cookies)
+                    record_result(ctx)
+
+                except (InvalidSessionIdException, WebDriverException) as driver_err:
+                    log.error(f"Browser connection lost: {driver_err}")
+                    log.warning("The browser window might have been closed or crashed.")
+                    STOP_REQUESTED = True
+                    break
+                except Exception as item_error:
+                    err_str = str(item_error)
+                    # Suppress connection errors if we are trying to stop
+                    if STOP_REQUESTED and ("HTTPConnectionPool" in err_str or "Max retries exceeded" in err_str or "Connection refused" in err_str):
+                        pass
+                    else:
+                        record_result(ctx, item_error)
 
     except KeyboardInterrupt:
         log.warning("User interrupted session.")
@@ -576,7 +1541,16 @@ def main():
         else:
             log.error(f"Critical Error: {e}")
     finally:
+        if prefetcher:
+            prefetcher.close()
+        for _, posts_queue in queues:
+            if isinstance(posts_queue, ranking.TopKScan):
+                posts_queue.close()
+        finish_run(pool, contexts)
+
         log.info("Closing driver...")
+        if listener:
+            listener.close()
         try:
             driver.quit()
         except:
@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import threading
+
+# Statuses that let a post be skipped on the next run
+DONE_STATUSES = ("complete", "skipped")
+
+
+class Manifest:
+    """
+    Per-target record of processed shortcodes, so a re-run can drop already
+    archived posts before any navigation or API call.
+
+    Stored as append-only JSON Lines next to the media folders; the last line
+    for a shortcode wins. Each entry carries its status ("complete",
+    "partial", "failed", "skipped") and media file names. A "complete" post
+    whose files were deleted from disk is scraped again.
+    """
+
+    def __init__(self, path, media_dirs=()):
+        self.path = path
+        self.media_dirs = list(media_dirs)
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        lines = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self.entries[entry["shortcode"]] = entry
+                    lines += 1
+                except (ValueError, KeyError):
+                    continue  # torn line after a crash
+        # Daily re-runs keep appending; rewrite once superseded lines dominate
+        if lines > 2 * len(self.entries) + 100:
+            self.compact()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _file_exists(self, name):
+        return any(os.path.exists(os.path.join(d, name)) for d in self.media_dirs)
+
+    def is_done(self, shortcode):
+        entry = self.entries.get(shortcode)
+        if not entry or entry.get("status") not in DONE_STATUSES:
+            return False
+        if entry["status"] == "complete" and self.media_dirs:
+            return all(self._file_exists(name) for name in entry.get("media_files", []))
+        return True
+
+    def mark(self, shortcode, status, media_files=()):
+        entry = {
+            "shortcode": shortcode,
+            "status": status,
+            "media_files": list(media_files),
+            "updated": int(time.time()),
+        }
+        with self._lock:
+            self.entries[shortcode] = entry
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def seed(self, records):
+        """
+        Imports posts archived before the manifest existed, e.g. from a
+        metadata sink. Only posts whose media is still on disk count.
+        Returns the number of imported shortcodes.
+        """
+        count = 0
+        for shortcode, metadata in records:
+            files = metadata.get("media_files") or []
+            if shortcode in self.entries or not files:
+                continue
+            if all(self._file_exists(name) for name in files):
+                self.mark(shortcode, "complete", files)
+                count += 1
+        return count
+
+    def compact(self):
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
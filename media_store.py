@@ -0,0 +1,138 @@
+import os
+import errno
+import shutil
+import hashlib
+from urllib.parse import urlparse, parse_qs
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl(FICLONE): copy-on-write clone on btrfs/xfs (Linux only)
+FICLONE = 0x40049409
+HASH_CHUNK = 1024 * 1024
+
+
+def asset_key(url):
+    """
+    Derives a stable asset id from a CDN URL.
+    The file name identifies the asset and `stp` the rendition (size/crop),
+    while the signature params (oh, oe, _nc_*) rotate and are ignored.
+    """
+    parsed = urlparse(url)
+    name = os.path.basename(parsed.path)
+    if not name:
+        return None
+    stp = parse_qs(parsed.query).get("stp", [""])[0]
+    return hashlib.sha1(f"{name}|{stp}".encode("utf-8")).hexdigest()
+
+
+def hash_file(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def reflink(src, dst):
+    """Copy-on-write clone. Raises OSError where the filesystem can't do it."""
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflink not supported")
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.remove(dst)
+            raise
+
+
+def place(src, dst):
+    """
+    Materializes src at dst without duplicating data when possible:
+    hardlink, then reflink, then a plain copy as last resort.
+    Returns the method used.
+    """
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except FileExistsError:
+        raise
+    except OSError:
+        pass
+    try:
+        reflink(src, dst)
+        return "reflink"
+    except OSError:
+        pass
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+class MediaStore:
+    """
+    Content-addressed blob store shared by every target.
+
+    Layout under `root`:
+        objects/<sha256[:2]>/<sha256>   one blob per unique content
+        assets/<key[:2]>/<key>          hardlink per CDN asset id (see asset_key)
+
+    Target trees keep their usual `targets/<user>/instagram/...` names, but
+    the files are links into `objects/`, so a post that shows up under several
+    targets is fetched and stored once. Hardlinks need the store and the
+    targets on the same filesystem; otherwise files are reflinked or copied.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.assets_dir = os.path.join(root, "assets")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.assets_dir, exist_ok=True)
+
+    def _fanout(self, base, name):
+        return os.path.join(base, name[:2], name)
+
+    def lookup(self, url):
+        """Returns the stored path for this CDN asset, or None."""
+        key = asset_key(url)
+        if not key:
+            return None
+        path = self._fanout(self.assets_dir, key)
+        return path if os.path.exists(path) else None
+
+    def link_into(self, blob_path, save_path):
+        """Places an already stored blob at save_path. Returns the method used."""
+        try:
+            return place(blob_path, save_path)
+        except FileExistsError:
+            return "exists"
+
+    def ingest(self, src_path, save_path, url=None):
+        """
+        Moves a finished download into the store and links it back to
+        save_path. Identical content from a different URL is deduplicated by
+        hash. Returns the sha256 of the content.
+        """
+        digest = hash_file(src_path)
+        blob_path = self._fanout(self.objects_dir, digest)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+
+        if os.path.exists(blob_path):
+            os.remove(src_path)
+        else:
+            os.replace(src_path, blob_path)
+
+        self.link_into(blob_path, save_path)
+
+        key = asset_key(url) if url else None
+        if key:
+            asset_path = self._fanout(self.assets_dir, key)
+            os.makedirs(os.path.dirname(asset_path), exist_ok=True)
+            try:
+                place(blob_path, asset_path)
+            except FileExistsError:
+                pass
+        return digest
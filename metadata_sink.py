@@ -0,0 +1,246 @@
+import os
+import io
+import json
+import sqlite3
+import argparse
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SINK_CHOICES = ["files", "jsonl", "jsonl.zst", "sqlite"]
+
+
+class MetadataSink:
+    """
+    Base class for post metadata storage.
+    Writes are buffered and flushed every `batch_size` posts (and on close),
+    so the download workers never pay an open/write/close per post.
+    Safe to call from several DownloadPool workers at once.
+    """
+
+    def __init__(self, batch_size=50):
+        self.batch_size = max(1, batch_size)
+        self._buffer = []
+        self._on_flush = []
+        self._lock = threading.Lock()
+
+    def write(self, shortcode, metadata, on_flush=None):
+        """Buffers one post; `on_flush()` runs once it has reached storage."""
+        with self._lock:
+            self._buffer.append((shortcode, metadata))
+            if on_flush:
+                self._on_flush.append(on_flush)
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buffer:
+            batch, self._buffer = self._buffer, []
+            callbacks, self._on_flush = self._on_flush, []
+            self._write_batch(batch)
+            for callback in callbacks:
+                callback()
+
+    def _write_batch(self, batch):
+        raise NotImplementedError
+
+    def records(self):
+        """Yields (shortcode, metadata) for every stored post, latest write wins."""
+        raise NotImplementedError
+
+    def get(self, shortcode):
+        for code, metadata in self.records():
+            if code == shortcode:
+                return metadata
+        return None
+
+    def shortcodes(self):
+        return [code for code, _ in self.records()]
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonFilesSink(MetadataSink):
+    """The classic layout: one indented `<shortcode>.json` per post."""
+
+    def __init__(self, data_dir, batch_size=1):
+        super().__init__(batch_size)
+        self.path = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+
+    def _write_batch(self, batch):
+        for shortcode, metadata in batch:
+            json_path = os.path.join(self.path, f"{shortcode}.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+    def records(self):
+        self.flush()
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.path, name), encoding="utf-8") as f:
+                    yield name[:-len(".json")], json.load(f)
+            except (OSError, ValueError):
+                continue
+
+    def get(self, shortcode):
+        self.flush()
+        try:
+            with open(os.path.join(self.path, f"{shortcode}.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+class JsonlSink(MetadataSink):
+    """
+    Append-only JSON Lines index, one `{"shortcode": ..., **metadata}` per line.
+    With compress=True every flush appends an independent zstd frame, which
+    keeps the file appendable and readable as a single stream.
+    """
+
+    def __init__(self, path, compress=False, batch_size=50):
+        super().__init__(batch_size)
+        if compress and zstandard is None:
+            raise RuntimeError("zstandard is not installed (pip install zstandard)")
+        self.path = path
+        self.compress = compress
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _write_batch(self, batch):
+        lines = "".join(
+            json.dumps(dict(metadata, shortcode=shortcode), ensure_ascii=False) + "\n"
+            for shortcode, metadata in batch
+        ).encode("utf-8")
+        if self.compress:
+            lines = zstandard.ZstdCompressor().compress(lines)
+        with open(self.path, "ab") as f:
+            f.write(lines)
+
+    def _lines(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as raw:
+            if self.compress:
+                reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+                stream = io.TextIOWrapper(reader, encoding="utf-8")
+            else:
+                stream = io.TextIOWrapper(raw, encoding="utf-8")
+            for line in stream:
+                if line.strip():
+                    yield line
+
+    def records(self):
+        self.flush()
+        latest = {}
+        for line in self._lines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            shortcode = record.pop("shortcode", None)
+            if shortcode:
+                latest[shortcode] = record
+        yield from latest.items()
+
+
+class SqliteSink(MetadataSink):
+    """SQLite database with one row per post; re-scraped posts replace their row."""
+
+    def __init__(self, path, batch_size=50):
+        super().__init__(batch_size)
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS posts ("
+            " shortcode TEXT PRIMARY KEY,"
+            " url TEXT,"
+            " date TEXT,"
+            " caption TEXT,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL DEFAULT (strftime('%s','now')))"
+        )
+        self._db.commit()
+
+    def _write_batch(self, batch):
+        rows = [
+            (shortcode, metadata.get("url"), str(metadata.get("date") or ""),
+             metadata.get("caption"), json.dumps(metadata, ensure_ascii=False))
+            for shortcode, metadata in batch
+        ]
+        self._db.executemany(
+            "INSERT OR REPLACE INTO posts (shortcode, url, date, caption, data) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        self._db.commit()
+
+    def records(self):
+        self.flush()
+        with self._lock:
+            rows = self._db.execute("SELECT shortcode, data FROM posts ORDER BY rowid").fetchall()
+        for shortcode, data in rows:
+            yield shortcode, json.loads(data)
+
+    def get(self, shortcode):
+        self.flush()
+        with self._lock:
+            row = self._db.execute("SELECT data FROM posts WHERE shortcode = ?", (shortcode,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self):
+        super().close()
+        self._db.close()
+
+
+def open_sink(kind, data_dir):
+    """Opens the sink selected with --metadata-sink inside DATA_DIR."""
+    if kind == "files":
+        return JsonFilesSink(data_dir)
+    if kind == "jsonl":
+        return JsonlSink(os.path.join(data_dir, "posts.jsonl"))
+    if kind == "jsonl.zst":
+        return JsonlSink(os.path.join(data_dir, "posts.jsonl.zst"), compress=True)
+    if kind == "sqlite":
+        return SqliteSink(os.path.join(data_dir, "posts.sqlite"))
+    raise ValueError(f"Unknown metadata sink: {kind}")
+
+
+def export_json_files(sink, data_dir):
+    """Writes every post of `sink` out in the per-file layout. Returns the count."""
+    exporter = JsonFilesSink(data_dir)
+    count = 0
+    for shortcode, metadata in sink.records():
+        exporter.write(shortcode, metadata)
+        count += 1
+    exporter.close()
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a metadata index to one JSON file per post")
+    parser.add_argument("data_dir", help="targets/<user>/instagram/data")
+    parser.add_argument("--sink", choices=SINK_CHOICES[1:], default="jsonl", help="Index to read")
+    parser.add_argument("--out", help="Output directory (default: data_dir)")
+    args = parser.parse_args()
+
+    with open_sink(args.sink, args.data_dir) as source:
+        n = export_json_files(source, args.out or args.data_dir)
+    print(f"[+] Exported {n} posts")
@@ -0,0 +1,268 @@
+"""
+Minimal ISO-BMFF (MP4) reader: codec type, resolution and duration straight
+from the `moov` box, without forking ffprobe.
+
+Only the handful of boxes we need are decoded:
+    moov/mvhd        movie timescale + duration
+    moov/mvex/mehd   fragment duration (fragmented MP4 / DASH)
+    moov/trak/tkhd   track width/height (16.16 fixed point)
+    moov/trak/mdia/hdlr, mdhd   handler type ('vide'/'soun') + track duration
+    sidx             segment index, duration of DASH representations
+"""
+import os
+import struct
+
+# Refuse to load absurd moov boxes into memory
+MAX_MOOV_SIZE = 64 * 1024 * 1024
+
+
+class TruncatedBox(Exception):
+    """The buffer ends before the box does (need more bytes)."""
+
+
+def iter_boxes(data, start=0, end=None):
+    """
+    Yields (type, payload_start, box_end) for each box in data[start:end].
+    Raises TruncatedBox if the last box runs past the buffer.
+    """
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                raise TruncatedBox(box_type)
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return  # corrupt, stop quietly
+        if pos + size > end:
+            raise TruncatedBox(box_type)
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def _full_box_times(data, pos):
+    """(timescale, duration) from an mvhd/mdhd payload."""
+    version = data[pos]
+    if version == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, pos + 20)
+    else:
+        timescale, duration = struct.unpack_from(">II", data, pos + 12)
+    return timescale, duration
+
+
+def _tkhd_size(data, pos, end):
+    version = data[pos]
+    # ver/flags + times + track_id + reserved + duration, then 52 bytes up to width
+    offset = pos + (36 if version == 1 else 24) + 52
+    if offset + 8 > end:
+        return 0, 0
+    width, height = struct.unpack_from(">II", data, offset)
+    return width >> 16, height >> 16
+
+
+def _sidx_duration(data, pos, end):
+    version = data[pos]
+    timescale = struct.unpack_from(">I", data, pos + 8)[0]
+    offset = pos + (28 if version == 1 else 20)
+    count = struct.unpack_from(">H", data, offset + 2)[0]
+    offset += 4
+    total = 0
+    for _ in range(count):
+        if offset + 12 > end:
+            break
+        total += struct.unpack_from(">I", data, offset + 4)[0]
+        offset += 12
+    return total / timescale if timescale else 0.0
+
+
+def parse_moov(data, start=0, end=None):
+    """
+    Parses a moov box payload. Returns
+    {'type': 'video'|'audio'|None, 'width': int, 'height': int, 'duration': float}
+    """
+    meta = {'type': None, 'width': 0, 'height': 0, 'duration': 0.0}
+    movie_duration = 0.0
+    fragment_duration = 0
+    movie_timescale = 0
+    track_durations = []
+
+    for box, pos, box_end in iter_boxes(data, start, end):
+        if box == b"mvhd":
+            movie_timescale, duration = _full_box_times(data, pos)
+            if movie_timescale:
+                movie_duration = duration / movie_timescale
+        elif box == b"mvex":
+            for sub, sub_pos, _ in iter_boxes(data, pos, box_end):
+                if sub == b"mehd":
+                    fmt = ">Q" if data[sub_pos] == 1 else ">I"
+                    fragment_duration = struct.unpack_from(fmt, data, sub_pos + 4)[0]
+        elif box == b"trak":
+            track = _parse_trak(data, pos, box_end)
+            if track['duration']:
+                track_durations.append(track['duration'])
+            if track['handler'] == b"vide" and meta['type'] != 'video':
+                meta['type'] = 'video'
+                meta['width'], meta['height'] = track['width'], track['height']
+            elif track['handler'] == b"soun" and meta['type'] is None:
+                meta['type'] = 'audio'
+
+    if movie_duration:
+        meta['duration'] = movie_duration
+    elif fragment_duration and movie_timescale:
+        meta['duration'] = fragment_duration / movie_timescale
+    elif track_durations:
+        meta['duration'] = max(track_durations)
+    return meta
+
+
+def _parse_trak(data, start, end):
+    track = {'handler': None, 'width': 0, 'height': 0, 'duration': 0.0}
+    for box, pos, box_end in iter_boxes(data, start, end):
+        if box == b"tkhd":
+            track['width'], track['height'] = _tkhd_size(data, pos, box_end)
+        elif box == b"mdia":
+            for sub, sub_pos, _ in iter_boxes(data, pos, box_end):
+                if sub == b"hdlr":
+                    track['handler'] = data[sub_pos + 8:sub_pos + 12]
+                elif sub == b"mdhd":
+                    timescale, duration = _full_box_times(data, sub_pos)
+                    if timescale:
+                        track['duration'] = duration / timescale
+    return track
+
+
+def probe_bytes(data):
+    """
+    Probes an in-memory MP4 prefix (or the whole file).
+    Returns the metadata dict, or None if no complete moov box is present.
+    """
+    meta = None
+    sidx = 0.0
+    try:
+        for box, pos, end in iter_boxes(data):
+            if box == b"moov":
+                meta = parse_moov(data, pos, end)
+            elif box == b"sidx" and not sidx:
+                sidx = _sidx_duration(data, pos, end)
+    except (TruncatedBox, struct.error, IndexError):
+        pass
+    if meta and not meta['duration'] and sidx:
+        meta['duration'] = sidx
+    return meta
+
+
+def probe_file(path):
+    """
+    Probes a local MP4 by seeking over top-level boxes, so `mdat` is never
+    read. Returns the metadata dict, or None if the file isn't a readable MP4.
+    """
+    try:
+        file_size = os.path.getsize(path)
+        meta = None
+        sidx = 0.0
+        with open(path, "rb") as f:
+            pos = 0
+            while pos + 8 <= file_size:
+                f.seek(pos)
+                header = f.read(16)
+                size, box_type = struct.unpack_from(">I4s", header)
+                header_len = 8
+                if size == 1:
+                    size = struct.unpack_from(">Q", header, 8)[0]
+                    header_len = 16
+                elif size == 0:
+                    size = file_size - pos
+                if size < header_len:
+                    break
+
+                if box_type in (b"moov", b"sidx"):
+                    if size > MAX_MOOV_SIZE:
+                        break
+                    f.seek(pos + header_len)
+                    payload = f.read(size - header_len)
+                    if box_type == b"moov":
+                        meta = parse_moov(payload)
+                    elif not sidx:
+                        sidx = _sidx_duration(payload, 0, len(payload))
+                pos += size
+        if meta and not meta['duration'] and sidx:
+            meta['duration'] = sidx
+        return meta
+    except (OSError, TruncatedBox, struct.error, IndexError):
+        return None
+
+
+def probe_ranges(fetch, chunk_size=64 * 1024, max_fetches=4):
+    """
+    Probes a remote MP4 by reading only box headers and the moov box.
+
+    `fetch(start, length)` must return up to `length` bytes from absolute
+    offset `start` (an HTTP Range request, typically); fewer bytes mean EOF.
+    The first chunk usually holds ftyp+moov(+sidx) for DASH and faststart
+    files. If moov sits after a large mdat, the mdat is skipped via its size
+    field and the next fetch starts right at the trailing moov.
+    Returns the metadata dict, or None.
+    """
+    fetches = 0
+
+    def get(start, length):
+        nonlocal fetches
+        fetches += 1
+        data = fetch(start, length) or b""
+        return data, start, len(data) < length
+
+    buf, buf_start, eof = get(0, chunk_size)
+    pos = 0
+    meta = None
+    sidx = 0.0
+
+    try:
+        while True:
+            rel = pos - buf_start
+            if rel + 16 > len(buf) and not eof:
+                # Header not (fully) in the buffer: fetch from here on
+                if meta or fetches >= max_fetches:
+                    break
+                buf, buf_start, eof = get(pos, chunk_size)
+                continue
+            if rel + 8 > len(buf):
+                break
+
+            size, box_type = struct.unpack_from(">I4s", buf, rel)
+            header_len = 8
+            if size == 1:
+                size = struct.unpack_from(">Q", buf, rel + 8)[0]
+                header_len = 16
+            elif size == 0:
+                if not eof:
+                    break
+                size = len(buf) - rel
+            if size < header_len:
+                break
+
+            if box_type in (b"moov", b"sidx"):
+                if rel + size > len(buf):
+                    if meta or size > MAX_MOOV_SIZE or fetches >= max_fetches:
+                        break
+                    buf, buf_start, eof = get(pos, size)
+                    continue
+                if box_type == b"moov":
+                    meta = parse_moov(buf, rel + header_len, rel + size)
+                    if meta['duration']:
+                        break
+                elif not sidx:
+                    sidx = _sidx_duration(buf, rel + header_len, rel + size)
+                    if meta:
+                        break
+            pos += size
+    except (TruncatedBox, struct.error, IndexError):
+        pass
+
+    if meta and not meta['duration'] and sidx:
+        meta['duration'] = sidx
+    return meta
@@ -0,0 +1,185 @@
+import json
+import threading
+from urllib.request import urlopen
+
+try:
+    import websocket  # websocket-client, installed alongside selenium
+except ImportError:
+    websocket = None
+
+# Cheap substring checks run on the raw frame before any JSON decoding
+MEDIA_MARKERS = ('video/', 'audio/', '.mp4')
+MAX_CANDIDATES = 200
+
+# URL patterns (Network.setBlockedURLs wildcards) per --block category
+BLOCK_PATTERNS = {
+    "images": ["*.jpg*", "*.jpeg*", "*.png*", "*.webp*", "*.gif*", "*.heic*"],
+    "fonts": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*"],
+    "css": ["*.css*"],
+    "trackers": [
+        "*graph.instagram.com/logging*", "*/logging_client_events*", "*/ajax/bz*",
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*connect.facebook.net*", "*facebook.com/tr*",
+    ],
+}
+# "video" isn't URL-blocked: media requests are paused once their response
+# headers arrive (recorded for the sniffer), then the body is refused
+BLOCK_CATEGORIES = tuple(BLOCK_PATTERNS) + ("video",)
+MEDIA_INTERCEPT_PATTERNS = [
+    {"resourceType": "Media", "requestStage": "Response"},
+    {"urlPattern": "*.mp4*", "requestStage": "Response"},
+]
+
+
+def blocked_patterns(categories):
+    """Network.setBlockedURLs patterns for the given --block categories."""
+    patterns = []
+    for category in categories:
+        patterns += BLOCK_PATTERNS.get(category, [])
+    return patterns
+
+
+class MediaResponseListener:
+    """
+    Watches `Network.responseReceived` on the driver's tab through a
+    dedicated DevTools websocket and keeps only video/audio responses.
+
+    Replaces polling driver.get_log("performance"): Chrome no longer buffers
+    every network event for chromedriver, non-media frames are dropped
+    before being decoded, and callers can block until media shows up
+    instead of sleeping and re-polling.
+    """
+
+    def __init__(self, debugger_address, target_id=None):
+        self.debugger_address = debugger_address
+        self.target_id = target_id
+        self._responses = {}  # url -> mime, insertion ordered
+        self._cond = threading.Condition()
+        self._ws = None
+        self._thread = None
+        self._next_id = 0
+        self._send_lock = threading.Lock()
+        self.block_media_bodies = False
+        self.running = False
+
+    def start(self):
+        if websocket is None:
+            raise RuntimeError("websocket-client is not installed")
+
+        with urlopen(f"http://{self.debugger_address}/json", timeout=5) as resp:
+            targets = json.loads(resp.read().decode("utf-8"))
+        pages = [t for t in targets if t.get("type") == "page"]
+        page = next((t for t in pages if t.get("id") == self.target_id), pages[0] if pages else None)
+        if not page:
+            raise RuntimeError("No page target to attach to")
+
+        # No Origin header: Chrome refuses foreign origins on DevTools sockets
+        self._ws = websocket.create_connection(page["webSocketDebuggerUrl"], suppress_origin=True, timeout=5)
+        self._ws.settimeout(1)
+        self.send("Network.enable")
+        self.running = True
+        self._thread = threading.Thread(target=self._read_loop, name="cdp-media", daemon=True)
+        self._thread.start()
+        return self
+
+    def send(self, method, params=None):
+        # Called from the caller's thread and from the reader (Fetch replies)
+        with self._send_lock:
+            self._next_id += 1
+            self._ws.send(json.dumps({"id": self._next_id, "method": method, "params": params or {}}))
+
+    def intercept_media(self, block_bodies=True):
+        """
+        Pauses media requests at the response stage: their headers are
+        recorded like a Network.responseReceived event, and with
+        `block_bodies` the transfer is then aborted so Chrome never
+        downloads video we fetch ourselves anyway.
+        """
+        self.block_media_bodies = block_bodies
+        self.send("Fetch.enable", {"patterns": MEDIA_INTERCEPT_PATTERNS})
+
+    def _read_loop(self):
+        while self.running:
+            try:
+                raw = self._ws.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+            except Exception:
+                break
+            self.handle_message(raw)
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+
+    def handle_message(self, raw):
+        """Records the response if `raw` is a media Network.responseReceived frame."""
+        if '"Fetch.requestPaused"' in raw:
+            self._handle_paused(raw)
+            return
+        if '"Network.responseReceived"' not in raw or not any(m in raw for m in MEDIA_MARKERS):
+            return
+        try:
+            response = json.loads(raw).get("params", {}).get("response", {})
+        except ValueError:
+            return
+        self._record(response.get("url", ""), response.get("mimeType", ""))
+
+    def _handle_paused(self, raw):
+        try:
+            params = json.loads(raw).get("params", {})
+        except ValueError:
+            return
+        request_id = params.get("requestId")
+        if not request_id:
+            return
+        headers = {h.get("name", "").lower(): h.get("value", "") for h in params.get("responseHeaders") or []}
+        mime = headers.get("content-type", "").split(";")[0].strip()
+        status = params.get("responseStatusCode") or 0
+        if 200 <= status < 300:
+            self._record(params.get("request", {}).get("url", ""), mime)
+
+        # Every paused request must be answered or the page hangs on it
+        try:
+            if self.block_media_bodies:
+                self.send("Fetch.failRequest", {"requestId": request_id, "errorReason": "BlockedByClient"})
+            else:
+                self.send("Fetch.continueRequest", {"requestId": request_id})
+        except Exception:
+            pass
+
+    def _record(self, url, mime):
+        if not url.startswith("http"):
+            return
+        if not ("video" in mime or "audio" in mime or ".mp4" in url):
+            return
+        with self._cond:
+            if url not in self._responses and len(self._responses) < MAX_CANDIDATES:
+                self._responses[url] = mime
+                self._cond.notify_all()
+
+    def reset(self):
+        """Forgets responses of the previous page (call before navigating)."""
+        with self._cond:
+            self._responses.clear()
+
+    def responses(self):
+        """List of (url, mime) seen since the last reset."""
+        with self._cond:
+            return list(self._responses.items())
+
+    def wait_for_new(self, known, timeout):
+        """
+        Blocks until more than `known` media responses were seen, or timeout.
+        Returns the current count.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: len(self._responses) > known or not self.running, timeout)
+            return len(self._responses)
+
+    def close(self):
+        self.running = False
+        if self._ws:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
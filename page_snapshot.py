@@ -0,0 +1,44 @@
+from bs4 import BeautifulSoup
+
+# lxml parses Instagram's multi-megabyte pages several times faster than
+# the stdlib parser; it is optional (pip install lxml).
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+
+class PageSnapshot:
+    """
+    The current page, serialized over WebDriver and parsed exactly once.
+
+    Take one snapshot per navigation and hand it to verify_post_owner,
+    extract_metadata and extract_media_from_post instead of letting each of
+    them pull `driver.page_source` and build its own soup.
+    """
+
+    def __init__(self, driver=None, html=None):
+        self.url = driver.current_url if driver is not None else None
+        self.html = html if html is not None else driver.page_source
+        self.soup = BeautifulSoup(self.html, PARSER)
+
+    @property
+    def title(self):
+        tag = self.soup.find("title")
+        return tag.get_text(strip=True) if tag else ""
+
+    def meta(self, prop):
+        """Content of <meta property=prop>, or None."""
+        tag = self.soup.find("meta", property=prop)
+        return tag.get("content") if tag else None
+
+    def header_links(self):
+        """hrefs of the links in the post header (owner, location, ...)."""
+        return [a["href"] for a in self.soup.select("header a[href]")]
+
+    def find(self, *args, **kwargs):
+        return self.soup.find(*args, **kwargs)
+
+    def find_all(self, *args, **kwargs):
+        return self.soup.find_all(*args, **kwargs)
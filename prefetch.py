@@ -0,0 +1,71 @@
+import threading
+import concurrent.futures
+
+# Posts resolved ahead of the one the browser is on
+DEFAULT_AHEAD = 4
+DEFAULT_WORKERS = 2
+
+
+class Prefetcher:
+    """
+    Look-ahead over an ordered list of items.
+
+    get(i) returns fetch(items[i]) and, on the way, schedules fetch() for the
+    next `ahead` items on background threads, so their API latency is hidden
+    behind the browser work on item i. Items for which `wanted(item)` is
+    false (already resolved, target abandoned...) are never fetched.
+    Safe to call from several browser workers at once.
+    """
+
+    def __init__(self, items, fetch, ahead=DEFAULT_AHEAD, max_workers=DEFAULT_WORKERS, wanted=None):
+        self.items = list(items)
+        self.fetch = fetch
+        self.ahead = max(0, int(ahead))
+        self.wanted = wanted or (lambda item: True)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, int(max_workers)),
+            thread_name_prefix="prefetch"
+        )
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._next = 0  # first index not scheduled yet
+
+    def _schedule_locked(self, upto):
+        upto = min(upto, len(self.items))
+        while self._next < upto:
+            item = self.items[self._next]
+            if self.wanted(item):
+                self._futures[self._next] = self._executor.submit(self.fetch, item)
+            self._next += 1
+
+    def get(self, index):
+        """
+        The fetch result of item `index` (scheduled now if it wasn't ahead
+        of time), or None if it wasn't wanted or the fetch failed.
+        """
+        with self._lock:
+            self._schedule_locked(index + 1 + self.ahead)
+            future = self._futures.pop(index, None)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            return None
+        except Exception as e:
+            print(f"    [!] Prefetch failed: {e}")
+            return None
+
+    def close(self):
+        """Drops look-ahead work that hasn't started (e.g. after Ctrl+C)."""
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
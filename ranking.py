@@ -0,0 +1,122 @@
+"""
+Streaming top-N selection for --sort likes|views --top N.
+
+Instead of scanning every post, sorting the whole list and only then
+downloading, scan results go through a bounded heap of the N best posts so
+far. A post is a confirmed winner as soon as it can no longer be pushed out:
+its rank among the posts kept, plus the number of posts not scanned yet, is
+at most N. Confirmed winners are handed to the browser while the scan goes
+on. Only N scanned dicts (with their media lists) are ever held.
+"""
+import heapq
+import queue
+import threading
+import itertools
+import concurrent.futures
+
+_DONE = object()
+
+
+class TopK:
+    """
+    Keeps the `n` items with the highest `key` out of `total` expected ones.
+    On ties the item added first wins.
+    """
+
+    def __init__(self, n, total, key):
+        self.slots = n  # winners not handed out yet
+        self.remaining = total
+        self.key = key
+        self._heap = []  # min-heap of (score, -seq, item): the weakest kept item on top
+        self._seq = itertools.count()
+
+    def add(self, item):
+        self.remaining -= 1
+        if self.slots <= 0:
+            return
+        entry = (self.key(item), -next(self._seq), item)
+        if len(self._heap) < self.slots:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def skip(self):
+        """An expected item that will never come (failed scan)."""
+        self.remaining -= 1
+
+    def pop_confirmed(self):
+        """Removes and returns, best first, the kept items no unscanned item can displace."""
+        count = min(len(self._heap), self.slots - max(0, self.remaining))
+        if count <= 0:
+            return []
+        best = heapq.nlargest(count, self._heap)
+        if count == len(self._heap):
+            self._heap = []
+        else:
+            self._heap = heapq.nsmallest(len(self._heap) - count, self._heap)
+            heapq.heapify(self._heap)
+        self.slots -= count
+        return [item for _, _, item in best]
+
+
+class TopKScan:
+    """
+    Scans `items` with `scan(item)` on a thread pool and iterates over the
+    `n` best results by `key`, best first within each confirmed batch.
+    Scanning starts right away and keeps going while the consumer works;
+    iteration blocks only until the next winner is confirmed.
+    """
+
+    def __init__(self, items, scan, n, key, max_workers=5, on_error=None):
+        items = list(items)
+        self.total = min(n, len(items))
+        self.scanned = 0
+        self._scan = scan
+        self._on_error = on_error
+        self._top = TopK(n, len(items), key)
+        self._lock = threading.Lock()
+        self._ready = queue.Queue()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="topk")
+        self._pending = len(items)
+        if not items:
+            self._ready.put(_DONE)
+        # _run keeps results to itself, so the futures stay small
+        self._futures = [self._executor.submit(self._run, item) for item in items]
+
+    def _run(self, item):
+        try:
+            result = self._scan(item)
+        except Exception as e:
+            result = None
+            if self._on_error:
+                self._on_error(e)
+        with self._lock:
+            self.scanned += 1
+            if result is None:
+                self._top.skip()
+            else:
+                self._top.add(result)
+            for winner in self._top.pop_confirmed():
+                self._ready.put(winner)
+            self._pending -= 1
+            if self._pending == 0:
+                self._ready.put(_DONE)
+
+    def __len__(self):
+        return self.total
+
+    def __iter__(self):
+        try:
+            while True:
+                item = self._ready.get()
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        """Stops scanning posts that haven't started."""
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=False)
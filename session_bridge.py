@@ -0,0 +1,146 @@
+"""
+Carries an Instagram login from Chrome over to plain HTTP.
+
+Chrome is only needed to log in and to clear challenges. Once the profile
+holds a session, its cookies (plus the browser's User-Agent) are enough to
+drive the feed/post APIs and the CDN with a requests.Session.
+"""
+import os
+import json
+import time
+
+import throttle
+
+# Written inside chrome_profile/, which is already private (chmod 700)
+COOKIE_CACHE = "session_cookies.json"
+AUTH_COOKIE = "sessionid"
+
+
+def is_instagram_domain(domain):
+    """instagram.com and its subdomains, but not the CDN (cdninstagram.com)."""
+    domain = (domain or "").lstrip(".")
+    return domain == "instagram.com" or domain.endswith(".instagram.com")
+
+
+def export_cookies(driver):
+    """
+    Snapshot of the driver's Instagram login:
+    {'user_agent': str, 'cookies': [selenium cookie dicts], 'exported_at': float}
+    """
+    if "instagram.com" not in (driver.current_url or ""):
+        throttle.SCHEDULER.acquire("nav")
+        driver.get("https://www.instagram.com/")
+    cookies = [c for c in driver.get_cookies() if is_instagram_domain(c.get("domain"))]
+    return {
+        "user_agent": driver.execute_script("return navigator.userAgent"),
+        "cookies": cookies,
+        "exported_at": time.time(),
+    }
+
+
+def is_logged_in(state, now=None):
+    """True if the snapshot holds an unexpired session cookie."""
+    now = time.time() if now is None else now
+    for cookie in (state or {}).get("cookies", []):
+        if cookie.get("name") == AUTH_COOKIE and cookie.get("value"):
+            expiry = cookie.get("expiry")
+            return expiry is None or expiry > now
+    return False
+
+
+def save_state(path, state):
+    os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+    tmp = path + ".tmp"
+    # Session cookies are credentials: never world-readable, not even briefly
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def load_state(path):
+    """The cached snapshot, or None if missing, unreadable or logged out."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if is_logged_in(state) else None
+
+
+def apply_state(session, state):
+    """Loads the snapshot's cookies and User-Agent into a requests.Session."""
+    if state.get("user_agent"):
+        session.headers["User-Agent"] = state["user_agent"]
+    for cookie in state.get("cookies", []):
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ".instagram.com"),
+            path=cookie.get("path", "/"),
+        )
+        if cookie["name"] == "csrftoken":
+            # Instagram checks the header against the cookie on API calls
+            session.headers["X-CSRFToken"] = cookie["value"]
+    return session
+
+
+class SessionBridge:
+    """
+    Keeps the driver's Instagram cookies and a requests.Session in step.
+
+    sync() copies whatever the browser set or rotated (sessionid, csrftoken,
+    ds_user_id, rur...) into the session, so API calls run authenticated,
+    then pushes back cookies that only the session received (rotations
+    answered to API calls), so the browser doesn't fall behind.
+    Call it from the browser thread after each navigation.
+    """
+
+    def __init__(self, driver, session):
+        self.driver = driver
+        self.session = session
+        self._driver_seen = {}  # name -> value last read from the browser
+        session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+
+    def sync(self):
+        """Returns (pulled, pushed): how many cookies moved in each direction."""
+        driver_now = {
+            c["name"]: c for c in self.driver.get_cookies() if is_instagram_domain(c.get("domain"))
+        }
+        changed = [c for name, c in driver_now.items() if self._driver_seen.get(name) != c.get("value")]
+        if changed:
+            apply_state(self.session, {"cookies": changed})
+        self._driver_seen = {name: c.get("value") for name, c in driver_now.items()}
+        return len(changed), self._push()
+
+    def _push(self):
+        # add_cookie only works while the browser is on the cookie's site
+        if "instagram.com" not in (self.driver.current_url or ""):
+            return 0
+        try:
+            session_cookies = [c for c in list(self.session.cookies) if is_instagram_domain(c.domain)]
+        except RuntimeError:
+            # Jar grown by a download worker mid-iteration; retry next sync
+            return 0
+
+        pushed = 0
+        for cookie in session_cookies:
+            if self._driver_seen.get(cookie.name) == cookie.value:
+                continue
+            browser_cookie = {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path or "/",
+                "secure": bool(cookie.secure),
+            }
+            if cookie.expires:
+                browser_cookie["expiry"] = int(cookie.expires)
+            try:
+                self.driver.add_cookie(browser_cookie)
+            except Exception as e:
+                print(f"    [!] Could not hand cookie '{cookie.name}' to the browser: {e}")
+                continue
+            self._driver_seen[cookie.name] = cookie.value
+            pushed += 1
+        return pushed
@@ -0,0 +1,83 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api_cache
+from api_cache import ApiCache
+
+POST = {"items": [{"code": "ABC", "like_count": 3}]}
+
+
+class FakeClock:
+    def __init__(self, now=1700000000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_fresh_then_stale_without_validator(tmp_path):
+    clock = FakeClock()
+    cache = ApiCache(str(tmp_path / "c.sqlite"), ttl=60, clock=clock)
+    assert cache.lookup("ABC") is None
+    cache.store("ABC", POST)
+    entry = cache.lookup("ABC")
+    assert entry["fresh"] and entry["data"] == POST
+    clock.now += 61
+    # No ETag / Last-Modified to revalidate with: dropped
+    assert cache.lookup("ABC") is None
+    assert cache.count() == 0
+    assert (cache.hits, cache.misses) == (1, 2)
+    cache.close()
+
+
+def test_stale_with_etag_is_revalidated(tmp_path):
+    clock = FakeClock()
+    cache = ApiCache(str(tmp_path / "c.sqlite"), ttl=60, clock=clock)
+    cache.store("ABC", POST, etag='"v1"')
+    clock.now += 61
+    entry = cache.lookup("ABC")
+    assert not entry["fresh"] and entry["etag"] == '"v1"'
+    cache.touch("ABC")
+    assert cache.lookup("ABC")["fresh"]
+    cache.close()
+
+
+def test_signed_url_expiry_caps_ttl(tmp_path):
+    clock = FakeClock()
+    cache = ApiCache(str(tmp_path / "c.sqlite"), ttl=7 * 86400, clock=clock)
+    oe = format(int(clock.now) + 3600, "08X")
+    post = {"items": [{"image_versions2": {"candidates": [{"url": f"https://cdn.example/a.jpg?x=1&oe={oe}"}]}}]}
+    assert api_cache.url_expiry(f"?oe={oe}") == int(clock.now) + 3600
+    cache.store("ABC", post, etag='"v1"')
+    assert cache.lookup("ABC")["fresh"]
+    clock.now += 3600
+    # Dead media URLs aren't worth revalidating
+    assert cache.lookup("ABC") is None
+    cache.close()
+
+
+def test_lru_eviction_and_persistence(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "c.sqlite")
+    cache = ApiCache(path, max_entries=2, clock=clock)
+    cache.store("A", POST)
+    clock.now += 1
+    cache.store("B", POST)
+    clock.now += 1
+    cache.lookup("A")  # B is now the least recently used
+    clock.now += 1
+    cache.store("C", POST)
+    assert cache.lookup("B") is None
+    cache.close()
+
+    reopened = ApiCache(path, clock=clock)
+    assert reopened.lookup("A")["data"] == POST and reopened.lookup("C")
+    reopened.close()
+
+
+def test_shortcode_of():
+    assert api_cache.shortcode_of("https://www.instagram.com/p/AbC-1_/?img_index=2") == "AbC-1_"
+    assert api_cache.shortcode_of("https://www.instagram.com/reel/XyZ/") == "XyZ"
+    assert api_cache.shortcode_of("https://www.instagram.com/someone/") is None
@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import browser_daemon
+
+
+class DevTools(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/json/version":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps({"Browser": "Chrome/130.0", "webSocketDebuggerUrl": "ws://x"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def devtools():
+    httpd = HTTPServer(("127.0.0.1", 0), DevTools)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd.server_port
+    httpd.shutdown()
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    path = str(tmp_path / ".browser_daemon.json")
+    with patch.object(browser_daemon, "STATE_FILE", path):
+        yield path
+
+
+def test_health(devtools):
+    assert browser_daemon.health(f"127.0.0.1:{devtools}")["Browser"] == "Chrome/130.0"
+
+
+def test_health_nothing_listening(devtools):
+    # Port of a server that was just shut down
+    httpd = HTTPServer(("127.0.0.1", 0), DevTools)
+    port = httpd.server_port
+    httpd.server_close()
+    assert browser_daemon.health(f"127.0.0.1:{port}") is None
+
+
+def test_start_reuses_running_browser(devtools, state_file):
+    with patch.object(browser_daemon, "launch") as launch:
+        info = browser_daemon.start(port=devtools)
+    assert info["Browser"] == "Chrome/130.0"
+    launch.assert_not_called()
+
+
+def test_chrome_command_binds_localhost():
+    with patch.object(browser_daemon.shutil, "which", return_value="/usr/bin/google-chrome"):
+        cmd = browser_daemon.chrome_command(port=9333, headless=True, profile_dir="/p")
+    assert cmd[0] == "/usr/bin/google-chrome"
+    assert "--remote-debugging-port=9333" in cmd
+    assert "--remote-debugging-address=127.0.0.1" in cmd
+    assert "--user-data-dir=/p" in cmd
+    assert "--headless=new" in cmd
+
+
+def test_stop_without_daemon(state_file):
+    assert browser_daemon.stop() is False
+    browser_daemon.write_state({"pid": None, "port": 9222})
+    assert browser_daemon.stop() is False
+    assert not os.path.exists(state_file)
@@ -0,0 +1,64 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from download_pool import DownloadPool
+
+
+def test_submit_runs_jobs_in_background():
+    pool = DownloadPool(max_workers=2)
+    results = []
+    futures = [pool.submit(results.append, n) for n in range(5)]
+    pool.drain()
+    assert sorted(results) == [0, 1, 2, 3, 4]
+    assert all(f.done() for f in futures)
+    assert pool.pending_count() == 0
+
+
+def test_submit_blocks_when_saturated():
+    release = threading.Event()
+    pool = DownloadPool(max_workers=1, max_pending=1)
+    pool.submit(release.wait)
+
+    submitted = threading.Event()
+    def second():
+        pool.submit(lambda: None)
+        submitted.set()
+    t = threading.Thread(target=second)
+    t.start()
+
+    # No free slot: the second submit has to wait for the first job
+    assert not submitted.wait(0.2)
+    release.set()
+    assert submitted.wait(2)
+    t.join()
+    pool.drain()
+
+
+def test_drain_cancels_queued_jobs():
+    release = threading.Event()
+    ran = []
+    pool = DownloadPool(max_workers=1, max_pending=4)
+    pool.submit(release.wait)
+    for n in range(3):
+        pool.submit(ran.append, n)
+
+    threading.Timer(0.1, release.set).start()
+    cancelled = pool.drain(cancel_pending=True)
+
+    assert cancelled == 3
+    assert ran == []
+
+
+def test_errors_reported_to_callback():
+    errors = []
+    pool = DownloadPool(max_workers=1, on_error=errors.append)
+    def boom():
+        raise ValueError("broken stream")
+    pool.submit(boom)
+    pool.drain()
+    assert len(errors) == 1
+    assert "broken stream" in str(errors[0])
@@ -0,0 +1,124 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import driver_pool
+
+
+class BrowserCrashed(Exception):
+    pass
+
+
+class FakeDriver:
+    def __init__(self, profile):
+        self.profile = profile
+        self.quit_called = False
+        self.media_listener = None
+
+    def quit(self):
+        self.quit_called = True
+
+
+def make_profile(root):
+    profile = root / "chrome_profile"
+    (profile / "Default" / "Cache").mkdir(parents=True)
+    (profile / "Default" / "Cache" / "data_0").write_bytes(b"x" * 100)
+    (profile / "Default" / "Cookies").write_bytes(b"cookie db")
+    (profile / "Local State").write_text("{}")
+    os.symlink("host-1234", profile / "SingletonLock")
+    return profile
+
+
+def test_clone_profile_skips_caches_and_locks(tmp_path):
+    src = make_profile(tmp_path)
+    dst = driver_pool.clone_profile(str(src), str(tmp_path / "clone"))
+
+    assert open(os.path.join(dst, "Default", "Cookies"), "rb").read() == b"cookie db"
+    assert os.path.exists(os.path.join(dst, "Local State"))
+    assert not os.path.exists(os.path.join(dst, "Default", "Cache"))
+    assert not os.path.lexists(os.path.join(dst, "SingletonLock"))
+    assert os.stat(dst).st_mode & 0o777 == 0o700
+
+
+def make_pool(tmp_path, size, launched, **kwargs):
+    def launch(profile):
+        driver = FakeDriver(profile)
+        launched.append(driver)
+        return driver
+
+    return driver_pool.DriverPool(
+        size=size,
+        base_profile=str(make_profile(tmp_path)),
+        clone_root=str(tmp_path / "workers"),
+        launch=launch,
+        crash_errors=(BrowserCrashed,),
+        min_interval=0,
+        **kwargs
+    )
+
+
+def test_items_are_spread_over_workers(tmp_path):
+    launched = []
+    pool = make_pool(tmp_path, 3, launched).start()
+    assert len({d.profile for d in launched}) == 3
+
+    seen = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(3, timeout=5)
+
+    def handle(driver, item):
+        if item < 3:
+            barrier.wait()  # proves three items run at once
+        with lock:
+            seen.append((driver.profile, item))
+
+    assert pool.run(range(9), handle) == 0
+    assert sorted(item for _, item in seen) == list(range(9))
+    assert len({profile for profile, _ in seen}) == 3
+
+    pool.close()
+    assert all(d.quit_called for d in launched)
+    assert not os.path.exists(tmp_path / "workers")
+
+
+def test_crashed_worker_is_relaunched_and_item_retried(tmp_path):
+    launched = []
+    errors = []
+    pool = make_pool(tmp_path, 1, launched, on_error=errors.append).start()
+    done = []
+
+    def handle(driver, item):
+        if item == "bad" and driver is launched[0]:
+            raise BrowserCrashed("tab crashed")
+        if item == "poison":
+            raise BrowserCrashed("again")
+        if item == "broken":
+            raise ValueError("parse error")
+        done.append(item)
+
+    assert pool.run(["bad", "ok", "poison", "broken"], handle) == 0
+    assert sorted(done) == ["bad", "ok"]
+    # Initial launch + one relaunch per crash ("bad" once, "poison" twice)
+    assert len(launched) == 4
+    assert launched[0].quit_called
+    assert sorted(type(e).__name__ for e in errors) == ["BrowserCrashed", "ValueError"]
+    pool.close()
+
+
+def test_stop_leaves_items_queued(tmp_path):
+    pool = make_pool(tmp_path, 2, []).start()
+    assert pool.run(range(5), lambda d, i: None, should_stop=lambda: True) == 5
+    pool.close()
+
+
+def test_no_worker_starts(tmp_path):
+    def launch(profile):
+        raise OSError("chrome not found")
+
+    pool = driver_pool.DriverPool(1, str(make_profile(tmp_path)), str(tmp_path / "w"), launch)
+    with pytest.raises(RuntimeError):
+        pool.start()
@@ -0,0 +1,33 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+sys.modules.setdefault('undetected_chromedriver', MagicMock())
+
+import driver_setup
+import network_capture
+
+
+@patch.object(driver_setup, "apply_blocking")
+def test_failed_listener_falls_back_to_performance_log(mock_blocking, tmp_path):
+    """Without a listener the browser is relaunched with the log get_log() needs."""
+    launched = []
+
+    def chrome(options, version_main=None):
+        driver = MagicMock()
+        driver.capabilities = {"goog:chromeOptions": {"debuggerAddress": "127.0.0.1:1"}}
+        launched.append((options, driver))
+        return driver
+
+    with patch.object(driver_setup.uc, "Chrome", side_effect=chrome), \
+         patch.object(network_capture, "websocket", MagicMock()), \
+         patch.object(network_capture.MediaResponseListener, "start", side_effect=OSError("no devtools")):
+        driver = driver_setup.get_driver(profile_dir=str(tmp_path))
+
+    assert len(launched) == 2
+    launched[0][1].quit.assert_called_once()
+    assert driver is launched[1][1]
+    assert driver.media_listener is None and driver.perf_logs
+    launched[1][0].set_capability.assert_called_once_with("goog:loggingPrefs", {"performance": "ALL"})
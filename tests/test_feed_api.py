@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feed_api
+
+USER_ID = "4242"
+# max_id cursor -> canned page
+PAGES = {
+    None: {"items": [{"code": "AAA", "taken_at": 3}, {"code": "BBB", "taken_at": 2}], "more_available": True, "next_max_id": "c1"},
+    "c1": {"items": [{"code": "BBB", "taken_at": 2}, {"code": "CCC", "taken_at": 1}], "more_available": True, "next_max_id": "c2"},
+    "c2": {"items": [{"code": "DDD", "taken_at": 0}], "more_available": False},
+}
+
+
+class CannedInstagram(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+        query = dict(urllib.parse.parse_qsl(parsed.query))
+        CannedInstagram.requests.append((parsed.path, query, self.headers.get("x-ig-app-id")))
+
+        if parsed.path == "/api/v1/users/web_profile_info/":
+            if query.get("username") != "someone":
+                return self.reply(404, {"status": "fail"})
+            return self.reply(200, {"data": {"user": {"id": USER_ID}}})
+        if parsed.path in (f"/api/v1/feed/user/{USER_ID}/", f"/api/v1/usertags/{USER_ID}/feed/"):
+            return self.reply(200, PAGES[query.get("max_id")])
+        self.reply(404, {})
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class UrllibResponse:
+    def __init__(self, status, body):
+        self.status_code = status
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class UrllibSession:
+    """The slice of requests.Session that feed_api uses, over urllib."""
+
+    def get(self, url, params=None, headers=None, timeout=None, allow_redirects=True):
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        req = urllib.request.Request(url, headers=headers or {})
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                return UrllibResponse(resp.status, resp.read())
+        except urllib.error.HTTPError as e:
+            return UrllibResponse(e.code, e.read())
+
+
+@pytest.fixture
+def server():
+    CannedInstagram.requests = []
+    httpd = HTTPServer(("127.0.0.1", 0), CannedInstagram)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def test_pages_through_cursor(server):
+    posts = list(feed_api.iter_profile_posts("someone", UrllibSession(), base_url=server, pace=False))
+
+    assert [p["shortcode"] for p in posts] == ["AAA", "BBB", "CCC", "DDD"]
+    assert posts[0]["url"] == "https://www.instagram.com/p/AAA/"
+    assert posts[0]["date"] == 3
+    cursors = [q.get("max_id") for path, q, _ in CannedInstagram.requests if "/feed/" in path]
+    assert cursors == [None, "c1", "c2"]
+    assert all(app_id == feed_api.IG_APP_ID for _, _, app_id in CannedInstagram.requests)
+
+
+def test_streams_lazily(server):
+    posts = feed_api.iter_profile_posts("someone", UrllibSession(), base_url=server, pace=False)
+    assert next(posts)["shortcode"] == "AAA"
+    feed_calls = [path for path, _, _ in CannedInstagram.requests if "/feed/" in path]
+    assert len(feed_calls) == 1
+
+
+def test_tagged_feed(server):
+    posts = list(feed_api.iter_profile_posts("someone", UrllibSession(), tagged=True, base_url=server, pace=False))
+    assert len(posts) == 4
+    assert any(path.startswith("/api/v1/usertags/") for path, _, _ in CannedInstagram.requests)
+
+
+def test_unknown_user_raises(server):
+    with pytest.raises(feed_api.FeedError):
+        list(feed_api.iter_profile_posts("nobody", UrllibSession(), base_url=server, pace=False))
+
+
+def test_is_pinned():
+    assert feed_api.is_pinned({"code": "AAA", "timeline_pinned_user_ids": [int(USER_ID)]})
+    assert not feed_api.is_pinned({"code": "BBB", "timeline_pinned_user_ids": []})
+    assert not feed_api.is_pinned({"code": "CCC"})
+
+
+def test_login_wall_is_flagged(server):
+    with pytest.raises(feed_api.FeedError) as err:
+        feed_api.get_user_id("nobody", UrllibSession(), base_url=server)
+    assert err.value.status == 404
+    assert not err.value.login_required
+    assert feed_api.FeedError("redirect", 302).login_required
@@ -57,5 +57,214 @@ class TestInstagramActions(unittest.TestCase):
         file_path_index = call_args.index(file_path)
         self.assertLess(dash_dash_index, file_path_index, "'--' must appear before the file path")
 
+    def test_probe_remote_stream_uses_range_requests(self):
+        """
+        Verify that remote candidates are classified from a ranged prefix
+        fetched on the shared session instead of a full download.
+        """
+        from test_mp4_probe import make_mp4, trak
+        data = make_mp4(trak(b"vide", 720, 1280)) + bytes(1024 * 1024)
+
+        def get(url, headers=None, **kwargs):
+            start, end = map(int, headers["Range"][len("bytes="):].split("-"))
+            resp = MagicMock()
+            resp.status_code = 206
+            resp.iter_content.return_value = [data[start:end + 1]]
+            return resp
+
+        session = MagicMock()
+        session.get.side_effect = get
+
+        meta = instagram_actions.probe_remote_stream("https://cdn.example/v.mp4", session)
+
+        self.assertEqual(meta['type'], 'video')
+        self.assertEqual((meta['width'], meta['height']), (720, 1280))
+        self.assertEqual(session.get.call_count, 1)
+        self.assertEqual(session.get.call_args[1]["headers"], {"Range": "bytes=0-65535"})
+
+    def test_probe_remote_stream_not_mp4(self):
+        """Unparseable candidates return None so the caller falls back to ffprobe."""
+        session = MagicMock()
+        session.get.return_value.status_code = 200
+        session.get.return_value.iter_content.return_value = [b"\0" * 10]
+        self.assertIsNone(instagram_actions.probe_remote_stream("https://cdn.example/v.mp4", session))
+
+    @staticmethod
+    def _log_entry(url, mime="video/mp4"):
+        import json
+        return {"message": json.dumps({"message": {
+            "method": "Network.responseReceived",
+            "params": {"response": {"url": url, "mimeType": mime}}
+        }})}
+
+    def test_network_log_candidates_probed_in_parallel(self):
+        """
+        Verify that candidates are probed concurrently and each URL only once,
+        even when the pair only completes on a later attempt.
+        """
+        import time
+        import threading
+        urls = [f"https://cdn.example/v{n}.mp4" for n in range(4)]
+        driver = MagicMock()
+        driver.get_log.side_effect = [
+            [self._log_entry(u) for u in urls[:3]],
+            [self._log_entry(u) for u in urls],
+        ]
+        calls = []
+
+        def probe(url, session):
+            calls.append(url)
+            threading.Event().wait(0.3) # time.sleep is patched below
+            if url == urls[3]:
+                return {'type': 'audio', 'width': 0, 'height': 0, 'duration': 10.0}
+            n = int(url[-5])
+            return {'type': 'video', 'width': 360 * (n + 1), 'height': 640 * (n + 1), 'duration': 10.0}
+
+        started = time.monotonic()
+        with patch.object(instagram_actions, "probe_remote_stream", side_effect=probe), \
+             patch.object(instagram_actions.time, "sleep"):
+            result = instagram_actions.get_video_url_from_network_logs(driver, MagicMock())
+
+        self.assertEqual(result, {"video": urls[2], "audio": urls[3]})
+        self.assertEqual(sorted(calls), sorted(urls))
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_parse_post_node_v1_carousel(self):
+        """Feed/v1 items yield the same media list as the GraphQL shape."""
+        node = {
+            "code": "ABC", "taken_at": 1700000000, "like_count": 12, "play_count": 0,
+            "carousel_media": [
+                {"image_versions2": {"candidates": [
+                    {"url": "https://cdn.example/small.jpg", "width": 320},
+                    {"url": "https://cdn.example/big.jpg", "width": 1440},
+                ]}},
+                {"media_type": 2, "video_versions": [
+                    {"url": "https://cdn.example/low.mp4", "width": 480, "height": 854},
+                    {"url": "https://cdn.example/high.mp4", "width": 1080, "height": 1920},
+                ]},
+            ],
+        }
+        result = instagram_actions.parse_post_node(node)
+        self.assertEqual(result["date"], 1700000000)
+        self.assertEqual(result["likes"], 12)
+        self.assertEqual(result["media"], [
+            {"type": "image", "url": "https://cdn.example/big.jpg"},
+            {"type": "video", "url": "https://cdn.example/high.mp4"},
+        ])
+
+    def test_network_scan_without_capture_path(self):
+        driver = MagicMock(perf_logs=False)
+        self.assertIsNone(instagram_actions.get_video_url_from_network_logs(driver, MagicMock()))
+        driver.get_log.assert_not_called()
+
+    def test_post_details_served_from_cache(self):
+        """A cached post costs no request; a stale one is revalidated with its ETag."""
+        import tempfile
+        import api_cache
+        clock = [1700000000.0]
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = api_cache.ApiCache(os.path.join(tmp, "c.sqlite"), ttl=60, clock=lambda: clock[0])
+            session = MagicMock()
+            session.get.return_value = MagicMock(status_code=200, headers={"ETag": '"v1"'})
+            session.get.return_value.json.return_value = {"items": [{"code": "ABC", "like_count": 7}]}
+            url = "https://www.instagram.com/p/ABC/"
+
+            first = instagram_actions.get_post_details_api(url, session, cache=cache)
+            second = instagram_actions.get_post_details_api(url, session, cache=cache)
+            self.assertEqual((first["likes"], second["likes"]), (7, 7))
+            self.assertEqual(session.get.call_count, 1)
+
+            clock[0] += 61
+            session.get.return_value = MagicMock(status_code=304, headers={})
+            third = instagram_actions.get_post_details_api(url, session, cache=cache)
+            self.assertTrue(third["success"])
+            self.assertEqual(session.get.call_args.kwargs["headers"]["If-None-Match"], '"v1"')
+            self.assertEqual(cache.revalidated, 1)
+            cache.close()
+
+    def test_parse_post_node_owner_and_caption(self):
+        graphql = {"owner": {"username": "someone"}, "edge_media_to_caption": {"edges": [{"node": {"text": "hello"}}]}}
+        v1 = {"user": {"username": "someone"}, "caption": {"text": "hello"}}
+        for node in (graphql, v1):
+            result = instagram_actions.parse_post_node(node)
+            self.assertEqual((result["owner"], result["caption"]), ("someone", "hello"))
+        self.assertEqual(instagram_actions.parse_post_node({"caption": None})["caption"], "")
+
+    def test_shortcode_to_timestamp(self):
+        self.assertAlmostEqual(instagram_actions.shortcode_to_timestamp(shortcode_at(1700000000)), 1700000000, places=2)
+        self.assertIsNone(instagram_actions.shortcode_to_timestamp("bad!code"))
+
+    def test_harvest_collects_every_step_until_stall(self):
+        """Rows scrolled out of the virtualized grid are kept; 3 empty steps end the harvest."""
+        driver = FakeGrid([["/p/A1/", "/p/A2/"], ["/p/A2/", "/reel/A3/"], ["/p/A3/"]])
+        with patch.object(instagram_actions.throttle.PACER, "scale", 0):
+            links = instagram_actions.harvest_post_links(driver, settle_timeout=0)
+        self.assertEqual(links, [f"https://www.instagram.com/p/{c}/" for c in ("A1", "A2", "A3")])
+        self.assertEqual(driver.scrolls, 4)
+
+    def test_harvest_max_posts(self):
+        driver = FakeGrid([["/p/A1/", "/p/A2/"], ["/p/A3/"]])
+        with patch.object(instagram_actions.throttle.PACER, "scale", 0):
+            links = instagram_actions.harvest_post_links(driver, max_posts=2, settle_timeout=0)
+        self.assertEqual(len(links), 2)
+        self.assertEqual(driver.scrolls, 0)
+
+    def test_harvest_stops_at_since(self):
+        """A step revealing only older posts stops the scroll; an old pinned post doesn't."""
+        pinned, new1, new2, old1, old2 = (shortcode_at(ts) for ts in (1500000000, 1700000300, 1700000200, 1600000000, 1599999999))
+        driver = FakeGrid([[f"/p/{pinned}/", f"/p/{new1}/"], [f"/p/{new2}/"], [f"/p/{old1}/", f"/p/{old2}/"], ["/p/never/"]])
+        with patch.object(instagram_actions.throttle.PACER, "scale", 0):
+            links = instagram_actions.harvest_post_links(driver, since=1650000000, settle_timeout=0)
+        self.assertEqual(links, [f"https://www.instagram.com/p/{c}/" for c in (new1, new2)])
+        self.assertEqual(driver.scrolls, 2)
+
+    def test_harvest_waits_for_grid_to_render(self):
+        """A scroll whose rows render late is waited for instead of counted as a stall."""
+        driver = FakeGrid([["/p/A1/"], ["/p/A2/"]], render_delay=2)
+        with patch.object(instagram_actions.throttle.PACER, "scale", 0), patch.object(instagram_actions, "READY_POLL", 0):
+            links = instagram_actions.harvest_post_links(driver, stall_limit=1, settle_timeout=5)
+        self.assertEqual(links, [f"https://www.instagram.com/p/{c}/" for c in ("A1", "A2")])
+
+    def test_wait_until_polls_until_truthy(self):
+        driver = MagicMock()
+        driver.execute_script.side_effect = [False, None, True]
+        self.assertTrue(instagram_actions.wait_until(driver, "return 1;", timeout=5, poll=0))
+        self.assertEqual(driver.execute_script.call_count, 3)
+
+    def test_wait_until_times_out(self):
+        driver = MagicMock()
+        driver.execute_script.return_value = False
+        self.assertFalse(instagram_actions.wait_for_post_ready(driver, timeout=0))
+
+
+def shortcode_at(timestamp):
+    """Shortcode of a media id uploaded at `timestamp` (inverse of shortcode_to_timestamp)."""
+    media_id = (int(timestamp * 1000) - instagram_actions.IG_EPOCH_MS) << 23
+    code = ""
+    while media_id:
+        media_id, idx = divmod(media_id, 64)
+        code = instagram_actions.SHORTCODE_ALPHABET[idx] + code
+    return code
+
+
+class FakeGrid:
+    """Virtualized profile grid: each scroll replaces the rendered links with the next batch."""
+
+    def __init__(self, batches, render_delay=0):
+        self.batches = batches
+        self.render_delay = render_delay  # reads after a scroll that still return the old rows
+        self.scrolls = 0
+        self._stale = 0
+
+    def execute_script(self, script):
+        if "scrollBy" in script:
+            self.scrolls += 1
+            self._stale = self.render_delay
+            return None
+        if self._stale:
+            self._stale -= 1
+            return self.batches[self.scrolls - 1]
+        return self.batches[self.scrolls] if self.scrolls < len(self.batches) else []
+
 if __name__ == '__main__':
     unittest.main()
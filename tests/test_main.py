@@ -97,16 +97,25 @@ def test_logger_banner(logger_instance):
         all_calls = "".join([str(call) for call in mock_print.call_args_list])
         assert "INSTAGRAM OSINT" in all_calls
 
+def make_response(chunks, status=200, headers=None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.headers = headers or {}
+    resp.iter_content.return_value = chunks
+    return resp
+
 @patch('main.log')
 @patch('main.requests.Session')
 @patch('main.os.path.exists')
+@patch('main.os.path.getsize')
+@patch('main.os.replace')
 @patch('main.os.utime')
 @patch('main.action.download_blob_video')
-def test_download_file_success(mock_blob, mock_utime, mock_exists, mock_session_class, mock_log):
+def test_download_file_success(mock_blob, mock_utime, mock_replace, mock_getsize, mock_exists, mock_session_class, mock_log):
     mock_exists.return_value = False
+    mock_getsize.return_value = 12
     mock_session = mock_session_class.return_value
-    mock_response = MagicMock()
-    mock_response.iter_content.return_value = [b"chunk1", b"chunk2"]
+    mock_response = make_response([b"chunk1", b"chunk2"], headers={"Content-Length": "12"})
     mock_session.get.return_value = mock_response
 
     with patch('builtins.open', mock_open()) as mocked_file:
@@ -117,9 +126,100 @@ def test_download_file_success(mock_blob, mock_utime, mock_exists, mock_session_
         assert save_path == "/tmp/image.jpg"
         mock_session.get.assert_called_once_with(url, stream=True, timeout=20)
         mock_response.raise_for_status.assert_called_once()
-        mocked_file.assert_called_once_with("/tmp/image.jpg", "wb")
+        mocked_file.assert_called_once_with("/tmp/image.jpg.part", "wb")
+        mock_replace.assert_called_once_with("/tmp/image.jpg.part", "/tmp/image.jpg")
         mock_log.success.assert_called_once()
 
+@patch('main.log')
+@patch('main.time.sleep')
+def test_download_file_resumes_part(mock_sleep, mock_log, tmp_path):
+    url = "https://example.com/reel.mp4"
+    (tmp_path / "reel.mp4.part").write_bytes(b"abc")
+    (tmp_path / "reel.mp4.part.validator").write_text('"v1"')
+    session = MagicMock()
+    session.get.return_value = make_response([b"defgh"], status=206, headers={"Content-Range": "bytes 3-7/8"})
+
+    filename, save_path = main.download_file(url, session, None, str(tmp_path), media_type="video")
+
+    assert filename == "reel.mp4"
+    session.get.assert_called_once_with(url, stream=True, timeout=20, headers={"Range": "bytes=3-", "If-Range": '"v1"'})
+    assert (tmp_path / "reel.mp4").read_bytes() == b"abcdefgh"
+    assert not (tmp_path / "reel.mp4.part").exists()
+    assert not (tmp_path / "reel.mp4.part.validator").exists()
+
+@patch('main.log')
+def test_download_file_stale_part_of_other_asset(mock_log, tmp_path):
+    """If-Range mismatch: the server sends the whole new asset, which replaces the old bytes."""
+    url = "https://example.com/reel.mp4"
+    (tmp_path / "reel.mp4.part").write_bytes(b"old")
+    (tmp_path / "reel.mp4.part.validator").write_text('"old"')
+    session = MagicMock()
+    session.get.return_value = make_response([b"newbody"], headers={"Content-Length": "7", "ETag": '"new"'})
+
+    filename, _ = main.download_file(url, session, None, str(tmp_path), media_type="video")
+
+    assert filename == "reel.mp4"
+    assert session.get.call_args[1]["headers"]["If-Range"] == '"old"'
+    assert (tmp_path / "reel.mp4").read_bytes() == b"newbody"
+
+@patch('main.log')
+def test_download_file_part_without_validator_starts_over(mock_log, tmp_path):
+    url = "https://example.com/reel.mp4"
+    (tmp_path / "reel.mp4.part").write_bytes(b"old")
+    session = MagicMock()
+    session.get.return_value = make_response([b"newbody"], headers={"Content-Length": "7"})
+
+    filename, _ = main.download_file(url, session, None, str(tmp_path), media_type="video")
+
+    session.get.assert_called_once_with(url, stream=True, timeout=20)
+    assert (tmp_path / "reel.mp4").read_bytes() == b"newbody"
+
+@patch('main.log')
+def test_download_file_retries_throttled_cdn(mock_log, tmp_path):
+    url = "https://example.com/img.jpg"
+    session = MagicMock()
+    session.get.side_effect = [
+        make_response([], status=429, headers={"Retry-After": "3"}),
+        make_response([b"abcd"], headers={"Content-Length": "4"}),
+    ]
+    policy = main.throttle.RETRY["media"]
+    with patch.object(policy, "sleep") as mock_sleep:
+        filename, _ = main.download_file(url, session, None, str(tmp_path))
+
+    assert filename == "img.jpg"
+    mock_sleep.assert_called_once_with(3.0)
+    assert (tmp_path / "img.jpg").read_bytes() == b"abcd"
+
+@patch('main.log')
+@patch('main.time.sleep')
+def test_download_file_short_read_is_resumed(mock_sleep, mock_log, tmp_path):
+    url = "https://example.com/reel.mp4"
+    session = MagicMock()
+    session.get.side_effect = [
+        make_response([b"abc"], headers={"Content-Length": "8", "Last-Modified": "Wed, 01 May 2024 10:00:00 GMT"}),
+        make_response([b"defgh"], status=206, headers={"Content-Range": "bytes 3-7/8"}),
+    ]
+
+    filename, _ = main.download_file(url, session, None, str(tmp_path), media_type="video")
+
+    assert filename == "reel.mp4"
+    assert session.get.call_count == 2
+    assert session.get.call_args[1]["headers"] == {"Range": "bytes=3-", "If-Range": "Wed, 01 May 2024 10:00:00 GMT"}
+    assert (tmp_path / "reel.mp4").read_bytes() == b"abcdefgh"
+
+@patch('main.log')
+@patch('main.time.sleep')
+def test_download_file_incomplete_never_renamed(mock_sleep, mock_log, tmp_path):
+    url = "https://example.com/reel.mp4"
+    session = MagicMock()
+    session.get.side_effect = lambda *a, **kw: make_response([], status=206, headers={"Content-Range": "bytes 3-7/8"}) if "headers" in kw else make_response([b"abc"], headers={"Content-Length": "8", "ETag": '"v1"'})
+
+    filename, save_path = main.download_file(url, session, None, str(tmp_path), media_type="video")
+
+    assert filename is None
+    assert not (tmp_path / "reel.mp4").exists()
+    assert (tmp_path / "reel.mp4.part").read_bytes() == b"abc"
+
 @patch('main.log')
 @patch('main.os.path.exists')
 def test_download_file_exists(mock_exists, mock_log):
@@ -153,16 +253,16 @@ def test_download_file_blob(mock_exists, mock_blob, mock_log):
         mocked_file().write.assert_called_once_with(b"blob_content")
 
 @patch('main.log')
+@patch('main.os.replace')
+@patch('main.os.path.getsize')
 @patch('main.os.path.exists')
-def test_download_file_filename_logic(mock_exists, mock_log):
+def test_download_file_filename_logic(mock_exists, mock_getsize, mock_replace, mock_log):
     mock_exists.return_value = False
 
     # Test deduction and extension
     with patch('main.requests.Session') as mock_session_class:
         mock_session = mock_session_class.return_value
-        mock_response = MagicMock()
-        mock_response.iter_content.return_value = []
-        mock_session.get.return_value = mock_response
+        mock_session.get.return_value = make_response([])
 
         with patch('builtins.open', mock_open()):
             # No extension in URL, media_type image
@@ -177,9 +277,7 @@ def test_download_file_filename_logic(mock_exists, mock_log):
     long_name = "a" * 250
     with patch('main.requests.Session') as mock_session_class:
         mock_session = mock_session_class.return_value
-        mock_response = MagicMock()
-        mock_response.iter_content.return_value = []
-        mock_session.get.return_value = mock_response
+        mock_session.get.return_value = make_response([])
         with patch('builtins.open', mock_open()):
             fname, save_path = main.download_file("https://example.com/img", mock_session, None, "/tmp", override_name=long_name)
             assert len(fname) == 200
@@ -248,3 +346,110 @@ def test_signal_handler(mock_log):
 ])
 def test_is_safe_username(username, expected):
     assert main.is_safe_username(username) == expected
+
+@patch('main.log')
+def test_read_targets(mock_log, tmp_path):
+    path = tmp_path / "targets.txt"
+    path.write_text(
+        "# accounts to archive\n"
+        "alice\n"
+        "@bob  # with a comment\n"
+        "\n"
+        "https://www.instagram.com/carol/\n"
+        "alice\n"
+        "../etc\n"
+    )
+    assert main.read_targets(str(path)) == ["alice", "bob", "carol"]
+    mock_log.error.assert_called_once()
+
+    with patch('main.sys.stdin') as stdin:
+        stdin.read.return_value = "dave\n@erin\n"
+        assert main.read_targets("-") == ["dave", "erin"]
+
+def make_target_ctx(name, batch=True, total=0):
+    return {"target": name, "batch": batch, "lock": main.threading.Lock(), "total": total, "position": 0,
+            "processed": 0, "errors": 0, "streak": 0, "abandoned": False, "failed": None}
+
+def test_round_robin_interleaves_targets():
+    a, b, c = make_target_ctx("a"), make_target_ctx("b"), make_target_ctx("c")
+    jobs = main.round_robin([(a, [1, 2, 3]), (b, [4]), (c, [5, 6])])
+    assert [(ctx["target"], post) for ctx, post in jobs] == [
+        ("a", 1), ("b", 4), ("c", 5), ("a", 2), ("c", 6), ("a", 3)
+    ]
+
+@patch('main.log')
+def test_progress_and_failure_isolation(mock_log):
+    ctx = make_target_ctx("alice", total=10)
+    assert main.start_item(ctx) == "@alice 1/10"
+    assert main.start_item(make_target_ctx("bob", batch=False, total=2)) == "1/2"
+
+    for _ in range(main.TARGET_MAX_ERRORS - 1):
+        main.record_result(ctx, ValueError("boom"))
+    main.record_result(ctx)
+    assert not ctx["abandoned"]  # a success resets the streak
+    for _ in range(main.TARGET_MAX_ERRORS):
+        main.record_result(ctx, ValueError("boom"))
+    assert ctx["abandoned"]
+    assert (ctx["processed"], ctx["errors"]) == (1, 2 * main.TARGET_MAX_ERRORS - 1)
+
+    single = make_target_ctx("bob", batch=False)
+    for _ in range(main.TARGET_MAX_ERRORS + 1):
+        main.record_result(single, ValueError("boom"))
+    assert not single["abandoned"]
+
+def test_parse_block():
+    assert main.parse_block("none") == ()
+    assert main.parse_block("images, fonts") == ("images", "fonts")
+    assert "video" in main.parse_block("all")
+    with pytest.raises(main.argparse.ArgumentTypeError):
+        main.parse_block("images,scripts")
+
+def test_with_prefetched_fills_missing_details():
+    ctx = make_target_ctx("alice")
+    media = [{"type": "image", "url": "https://cdn.example/a.jpg"}]
+    details = {"success": True, "media": media, "date": 1700000000, "likes": 5, "views": 0}
+    jobs = [(ctx, {"url": "https://www.instagram.com/p/A/"}), (ctx, {"url": "https://www.instagram.com/p/B/", "media": ["kept"]})]
+    with main.prefetch.Prefetcher(jobs, lambda job: details, wanted=main.needs_details) as prefetcher:
+        first = main.with_prefetched(prefetcher, 0, jobs[0][1])
+        second = main.with_prefetched(prefetcher, 1, jobs[1][1])
+    assert first == {"url": "https://www.instagram.com/p/A/", "media": media, "date": 1700000000, "likes": 5, "views": 0}
+    assert second is jobs[1][1]
+    assert main.with_prefetched(None, 0, jobs[0][1]) is jobs[0][1]
+
+@patch('main.log')
+def test_sort_queue_top(mock_log):
+    queue = [{"url": str(i), "likes": likes} for i, likes in enumerate([5, 50, 20, 40])]
+    main.sort_queue(queue, "likes", top=2)
+    assert [post["likes"] for post in queue] == [50, 40]
+
+@patch('main.log')
+def test_sort_queue_puts_unscored_posts_last(mock_log):
+    queue = [{"url": "a"}, {"url": "b", "likes": 0}, {"url": "c", "likes": 7}]
+    main.sort_queue(queue, "likes")
+    assert [post["url"] for post in queue] == ["c", "b", "a"]
+
+@patch('main.log')
+def test_save_post_falls_back_to_dom_when_api_downloads_fail(mock_log, tmp_path):
+    sink, manifest = MagicMock(), MagicMock()
+    job = {
+        "link": "https://www.instagram.com/p/A/", "short_code": "A", "metadata": {"media_files": []},
+        "caption": "", "safe_caption": "A", "post_date": 1700000000,
+        "api_media": [{"type": "image", "url": "https://cdn.example/expired.jpg"}],
+        "log_media": None,
+        "dom_media": [{"type": "image", "url": "https://cdn.example/dom.jpg"}],
+        "video_dir": str(tmp_path), "image_dir": str(tmp_path), "sink": sink, "manifest": manifest,
+    }
+    def fake_download(url, *args, **kwargs):
+        return ("A.jpg", "A.jpg") if "dom" in url else (None, None)
+    with patch('main.download_file', side_effect=fake_download) as download:
+        main.save_post(job, MagicMock())
+    assert [c.args[0] for c in download.call_args_list] == ["https://cdn.example/expired.jpg", "https://cdn.example/dom.jpg"]
+    assert job["metadata"]["media_files"] == ["A.jpg"]
+
+def test_workers_refused_with_attach():
+    argv = ["main.py", "alice", "--workers", "2", "--attach"]
+    with patch.object(sys, "argv", argv), patch('main.Logger'), patch('main.log'), patch('main.open_target') as open_target:
+        with pytest.raises(SystemExit) as exit_info:
+            main.main()
+    assert exit_info.value.code == 2
+    open_target.assert_called_once()
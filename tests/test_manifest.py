@@ -0,0 +1,65 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from manifest import Manifest
+
+
+def test_mark_and_reload(tmp_path):
+    path = str(tmp_path / "manifest.jsonl")
+    m = Manifest(path)
+    m.mark("AAA", "complete", ["a.jpg"])
+    m.mark("BBB", "failed")
+    m.mark("CCC", "skipped")
+
+    reloaded = Manifest(path)
+    assert len(reloaded) == 3
+    assert reloaded.is_done("AAA")
+    assert not reloaded.is_done("BBB")
+    assert reloaded.is_done("CCC")
+    assert not reloaded.is_done("DDD")
+
+
+def test_last_entry_wins(tmp_path):
+    path = str(tmp_path / "manifest.jsonl")
+    m = Manifest(path)
+    m.mark("AAA", "partial", ["a_1.jpg"])
+    m.mark("AAA", "complete", ["a_1.jpg", "a_2.jpg"])
+    assert Manifest(path).entries["AAA"]["media_files"] == ["a_1.jpg", "a_2.jpg"]
+
+
+def test_deleted_media_is_scraped_again(tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    (images / "a.jpg").write_bytes(b"x")
+    m = Manifest(str(tmp_path / "manifest.jsonl"), media_dirs=[str(images)])
+    m.mark("AAA", "complete", ["a.jpg"])
+    assert m.is_done("AAA")
+
+    os.remove(images / "a.jpg")
+    assert not m.is_done("AAA")
+
+
+def test_seed_from_existing_metadata(tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    (images / "a.jpg").write_bytes(b"x")
+    m = Manifest(str(tmp_path / "manifest.jsonl"), media_dirs=[str(images)])
+
+    seeded = m.seed([
+        ("AAA", {"media_files": ["a.jpg"]}),
+        ("BBB", {"media_files": ["gone.jpg"]}),
+        ("CCC", {"media_files": []}),
+    ])
+    assert seeded == 1
+    assert m.is_done("AAA") and not m.is_done("BBB")
+
+
+def test_compacts_superseded_lines(tmp_path):
+    path = tmp_path / "manifest.jsonl"
+    m = Manifest(str(path))
+    for _ in range(150):
+        m.mark("AAA", "complete")
+    Manifest(str(path))
+    assert len(path.read_text().splitlines()) == 1
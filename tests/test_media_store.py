@@ -0,0 +1,60 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from media_store import MediaStore, asset_key
+
+CDN = "https://scontent.cdninstagram.com/v/t51.2885-15/123_456_n.jpg"
+
+
+def test_asset_key_ignores_signature_params():
+    a = asset_key(CDN + "?stp=dst-jpg_e35_p1080x1080&_nc_ht=x&oh=aaa&oe=111")
+    b = asset_key(CDN + "?stp=dst-jpg_e35_p1080x1080&_nc_ht=y&oh=bbb&oe=222")
+    smaller = asset_key(CDN + "?stp=dst-jpg_e35_p640x640&oh=aaa")
+    assert a == b
+    assert a != smaller
+
+
+def test_ingest_links_into_target_tree(tmp_path):
+    store = MediaStore(str(tmp_path / "store"))
+    (tmp_path / "alice").mkdir()
+    part = tmp_path / "alice" / "pic.jpg.part"
+    part.write_bytes(b"pixels")
+    save_path = str(tmp_path / "alice" / "pic.jpg")
+
+    digest = store.ingest(str(part), save_path, CDN)
+
+    assert not part.exists()
+    assert open(save_path, "rb").read() == b"pixels"
+    blob = tmp_path / "store" / "objects" / digest[:2] / digest
+    assert os.path.samefile(save_path, blob)
+
+
+def test_lookup_reuses_blob_for_other_target(tmp_path):
+    store = MediaStore(str(tmp_path / "store"))
+    assert store.lookup(CDN) is None
+
+    (tmp_path / "alice").mkdir()
+    (tmp_path / "bob").mkdir()
+    part = tmp_path / "alice" / "pic.jpg.part"
+    part.write_bytes(b"pixels")
+    store.ingest(str(part), str(tmp_path / "alice" / "pic.jpg"), CDN)
+
+    stored = store.lookup(CDN + "?oh=rotated")
+    assert stored
+    method = store.link_into(stored, str(tmp_path / "bob" / "tagged.jpg"))
+    assert method == "hardlink"
+    assert os.path.samefile(tmp_path / "alice" / "pic.jpg", tmp_path / "bob" / "tagged.jpg")
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = MediaStore(str(tmp_path / "store"))
+    for name in ("a", "b"):
+        part = tmp_path / f"{name}.part"
+        part.write_bytes(b"same bytes")
+        store.ingest(str(part), str(tmp_path / f"{name}.mp4"), f"https://cdn.example/{name}.mp4")
+
+    blobs = [f for _, _, files in os.walk(tmp_path / "store" / "objects") for f in files]
+    assert len(blobs) == 1
+    assert os.path.samefile(tmp_path / "a.mp4", tmp_path / "b.mp4")
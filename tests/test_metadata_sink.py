@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metadata_sink
+from metadata_sink import JsonFilesSink, JsonlSink, SqliteSink, open_sink, export_json_files
+
+POST = {"url": "https://www.instagram.com/p/ABC/", "caption": "hello", "media_files": ["a.jpg"]}
+
+
+@pytest.mark.parametrize("kind", ["files", "jsonl", "sqlite"])
+def test_roundtrip(kind, tmp_path):
+    with open_sink(kind, str(tmp_path)) as sink:
+        sink.write("ABC", POST)
+        sink.write("DEF", dict(POST, caption="second"))
+        # Re-scraped post: latest write wins
+        sink.write("ABC", dict(POST, caption="updated"))
+
+    sink = open_sink(kind, str(tmp_path))
+    assert sorted(sink.shortcodes()) == ["ABC", "DEF"]
+    assert sink.get("ABC")["caption"] == "updated"
+    assert sink.get("missing") is None
+    sink.close()
+
+
+def test_jsonl_batches_writes(tmp_path):
+    path = tmp_path / "posts.jsonl"
+    sink = JsonlSink(str(path), batch_size=3)
+    sink.write("A", POST)
+    sink.write("B", POST)
+    assert not path.exists()
+
+    sink.write("C", POST)
+    lines = path.read_text().splitlines()
+    assert [json.loads(l)["shortcode"] for l in lines] == ["A", "B", "C"]
+    sink.close()
+
+
+def test_on_flush_runs_after_batch_is_written(tmp_path):
+    path = tmp_path / "posts.jsonl"
+    sink = JsonlSink(str(path), batch_size=2)
+    flushed = []
+    sink.write("A", POST, on_flush=lambda: flushed.append(path.read_text().count("\n")))
+    assert flushed == []
+
+    sink.write("B", POST)
+    assert flushed == [2]
+    sink.close()
+
+
+def test_jsonl_skips_torn_line(tmp_path):
+    path = tmp_path / "posts.jsonl"
+    path.write_text(json.dumps(dict(POST, shortcode="A")) + "\n" + '{"shortcode": "B", "ur')
+    assert JsonlSink(str(path)).shortcodes() == ["A"]
+
+
+def test_jsonl_zstd_frames_append(tmp_path):
+    pytest.importorskip("zstandard")
+    path = str(tmp_path / "posts.jsonl.zst")
+    for code in ("A", "B"):
+        with JsonlSink(path, compress=True) as sink:
+            sink.write(code, POST)
+    assert JsonlSink(path, compress=True).shortcodes() == ["A", "B"]
+
+
+def test_zstd_missing_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(metadata_sink, "zstandard", None)
+    with pytest.raises(RuntimeError):
+        JsonlSink(str(tmp_path / "posts.jsonl.zst"), compress=True)
+
+
+def test_sqlite_row_per_post(tmp_path):
+    path = str(tmp_path / "posts.sqlite")
+    with SqliteSink(path) as sink:
+        sink.write("A", POST)
+        sink.write("A", POST)
+        sink.write("B", POST)
+    import sqlite3
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM posts").fetchone()[0] == 2
+
+
+def test_export_to_per_file_layout(tmp_path):
+    with SqliteSink(str(tmp_path / "posts.sqlite")) as sink:
+        sink.write("ABC", POST)
+        count = export_json_files(sink, str(tmp_path / "export"))
+
+    assert count == 1
+    with open(tmp_path / "export" / "ABC.json", encoding="utf-8") as f:
+        assert json.load(f) == POST
+    assert JsonFilesSink(str(tmp_path / "export")).shortcodes() == ["ABC"]
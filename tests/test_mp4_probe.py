@@ -0,0 +1,134 @@
+import os
+import sys
+import struct
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mp4_probe
+
+
+def box(kind, payload=b""):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def full_box(kind, version, payload):
+    return box(kind, bytes([version, 0, 0, 0]) + payload)
+
+
+def mvhd(timescale, duration, version=0):
+    if version == 1:
+        return full_box(b"mvhd", 1, struct.pack(">QQIQ", 0, 0, timescale, duration) + bytes(80))
+    return full_box(b"mvhd", 0, struct.pack(">IIII", 0, 0, timescale, duration) + bytes(80))
+
+
+def trak(handler, width=0, height=0, timescale=1000, duration=0):
+    tkhd = full_box(b"tkhd", 0, struct.pack(">IIIII", 0, 0, 1, 0, duration) + bytes(52)
+                    + struct.pack(">II", width << 16, height << 16))
+    mdhd = full_box(b"mdhd", 0, struct.pack(">IIII", 0, 0, timescale, duration) + bytes(4))
+    hdlr = full_box(b"hdlr", 0, bytes(4) + handler + bytes(12) + b"\0")
+    return box(b"trak", tkhd + box(b"mdia", mdhd + hdlr))
+
+
+def make_mp4(*traks, movie_duration=15000, timescale=1000, moov_last=False, extra=b""):
+    ftyp = box(b"ftyp", b"isom" + bytes(4) + b"isomiso2")
+    moov = box(b"moov", mvhd(timescale, movie_duration) + b"".join(traks) + extra)
+    mdat = box(b"mdat", bytes(4096))
+    return ftyp + (mdat + moov if moov_last else moov + mdat)
+
+
+def write(tmp_path, data, name="clip.mp4"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_video_track(tmp_path):
+    data = make_mp4(trak(b"vide", 1080, 1920), trak(b"soun"))
+    meta = mp4_probe.probe_file(write(tmp_path, data))
+    assert meta == {'type': 'video', 'width': 1080, 'height': 1920, 'duration': 15.0}
+
+
+def test_audio_only_with_moov_at_end(tmp_path):
+    data = make_mp4(trak(b"soun"), movie_duration=14500, moov_last=True)
+    meta = mp4_probe.probe_file(write(tmp_path, data))
+    assert meta['type'] == 'audio'
+    assert meta['duration'] == 14.5
+
+
+def test_64bit_mvhd_and_largesize_box(tmp_path):
+    moov_payload = mvhd(90000, 90000 * 7, version=1) + trak(b"vide", 640, 360)
+    moov = struct.pack(">I4sQ", 1, b"moov", 16 + len(moov_payload)) + moov_payload
+    meta = mp4_probe.probe_bytes(moov)
+    assert meta['duration'] == 7.0
+    assert (meta['width'], meta['height']) == (640, 360)
+
+
+def test_fragmented_duration_from_mehd(tmp_path):
+    mehd = full_box(b"mehd", 0, struct.pack(">I", 12000))
+    data = make_mp4(trak(b"vide", 720, 1280), movie_duration=0, extra=box(b"mvex", mehd))
+    assert mp4_probe.probe_file(write(tmp_path, data))['duration'] == 12.0
+
+
+def test_dash_duration_from_sidx():
+    sidx = full_box(b"sidx", 0, struct.pack(">IIIIHH", 1, 1000, 0, 0, 0, 2)
+                    + struct.pack(">III", 100, 4000, 0) + struct.pack(">III", 100, 5500, 0))
+    data = box(b"moov", mvhd(1000, 0) + trak(b"soun")) + sidx
+    meta = mp4_probe.probe_bytes(data)
+    assert meta['type'] == 'audio'
+    assert meta['duration'] == 9.5
+
+
+def test_truncated_prefix_returns_none():
+    data = make_mp4(trak(b"vide", 1080, 1080))
+    assert mp4_probe.probe_bytes(data[:60]) is None
+
+
+def test_not_an_mp4(tmp_path):
+    assert mp4_probe.probe_file(write(tmp_path, b"<html>nope</html>", "page.mp4")) is None
+    assert mp4_probe.probe_file(str(tmp_path / "missing.mp4")) is None
+
+
+class RangeServer:
+    """Serves a bytes object like an HTTP server honouring Range requests."""
+
+    def __init__(self, data):
+        self.data = data
+        self.requests = []
+
+    def fetch(self, start, length):
+        self.requests.append((start, length))
+        return self.data[start:start + length]
+
+
+def test_ranges_moov_first_needs_one_request():
+    data = make_mp4(trak(b"vide", 1080, 1920), trak(b"soun")) + bytes(500000)
+    server = RangeServer(data)
+    meta = mp4_probe.probe_ranges(server.fetch)
+    assert meta['type'] == 'video' and meta['height'] == 1920
+    assert server.requests == [(0, 64 * 1024)]
+
+
+def test_ranges_skip_mdat_to_trailing_moov():
+    ftyp = box(b"ftyp", b"isom" + bytes(4))
+    mdat = box(b"mdat", bytes(300000))
+    moov = box(b"moov", mvhd(1000, 8000) + trak(b"soun"))
+    server = RangeServer(ftyp + mdat + moov)
+
+    meta = mp4_probe.probe_ranges(server.fetch)
+
+    assert meta == {'type': 'audio', 'width': 0, 'height': 0, 'duration': 8.0}
+    assert server.requests[1][0] == len(ftyp) + len(mdat)
+    assert sum(length for _, length in server.requests) < 200 * 1024
+
+
+def test_ranges_large_moov_fetched_whole():
+    padding = box(b"free", bytes(100000))
+    moov = box(b"moov", mvhd(1000, 3000) + trak(b"vide", 640, 640) + padding)
+    server = RangeServer(box(b"ftyp", b"isom") + moov)
+    meta = mp4_probe.probe_ranges(server.fetch)
+    assert meta['duration'] == 3.0
+    assert server.requests[1] == (12, len(moov))
+
+
+def test_ranges_not_mp4():
+    assert mp4_probe.probe_ranges(RangeServer(b"<html></html>").fetch) is None
@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import network_capture
+from network_capture import MediaResponseListener
+
+
+def frame(url, mime, method="Network.responseReceived"):
+    return json.dumps({"method": method, "params": {"response": {"url": url, "mimeType": mime}}})
+
+
+def make_listener():
+    listener = MediaResponseListener("127.0.0.1:0")
+    listener.running = True  # no socket: frames are fed by hand
+    return listener
+
+
+def test_only_media_responses_are_kept():
+    listener = make_listener()
+    listener.handle_message(frame("https://www.instagram.com/p/x/", "text/html"))
+    listener.handle_message(frame("https://cdn.example/a.js", "application/javascript"))
+    listener.handle_message(frame("https://cdn.example/v.mp4", "video/mp4", method="Network.requestWillBeSent"))
+    listener.handle_message(frame("https://cdn.example/v.mp4?bytestart=0", "video/mp4"))
+    listener.handle_message(frame("https://cdn.example/a.mp4", "audio/mp4"))
+    listener.handle_message(frame("https://cdn.example/a.mp4", "audio/mp4"))
+    listener.handle_message(frame("blob:https://www.instagram.com/1", "video/mp4"))
+
+    assert listener.responses() == [
+        ("https://cdn.example/v.mp4?bytestart=0", "video/mp4"),
+        ("https://cdn.example/a.mp4", "audio/mp4"),
+    ]
+
+    listener.reset()
+    assert listener.responses() == []
+
+
+def test_wait_for_new_wakes_on_event():
+    listener = make_listener()
+    listener.handle_message(frame("https://cdn.example/v.mp4", "video/mp4"))
+    threading.Timer(0.05, listener.handle_message, [frame("https://cdn.example/a.mp4", "audio/mp4")]).start()
+    assert listener.wait_for_new(1, timeout=2) == 2
+
+
+def test_wait_for_new_times_out():
+    listener = make_listener()
+    listener.handle_message(frame("https://cdn.example/v.mp4", "video/mp4"))
+    assert listener.wait_for_new(1, timeout=0.05) == 1
+
+
+class SentFrames:
+    """Stands in for the DevTools websocket, keeps what was sent."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(json.loads(data))
+
+
+def paused(request_id, url, content_type, status=200):
+    return json.dumps({"method": "Fetch.requestPaused", "params": {
+        "requestId": request_id,
+        "request": {"url": url},
+        "resourceType": "Media",
+        "responseStatusCode": status,
+        "responseHeaders": [{"name": "Content-Type", "value": content_type}],
+    }})
+
+
+def test_intercepted_media_headers_recorded_and_body_refused():
+    listener = make_listener()
+    listener._ws = SentFrames()
+    listener.intercept_media(block_bodies=True)
+    assert listener._ws.sent[0]["method"] == "Fetch.enable"
+
+    listener.handle_message(paused("1", "https://cdn.example/v.mp4?bytestart=0", "video/mp4; codecs=avc1"))
+    listener.handle_message(paused("2", "https://cdn.example/gone.mp4", "video/mp4", status=404))
+
+    assert listener.responses() == [("https://cdn.example/v.mp4?bytestart=0", "video/mp4")]
+    replies = listener._ws.sent[1:]
+    assert [(r["method"], r["params"]["requestId"]) for r in replies] == [("Fetch.failRequest", "1"), ("Fetch.failRequest", "2")]
+    assert replies[0]["params"]["errorReason"] == "BlockedByClient"
+
+
+def test_intercepted_media_continues_without_blocking():
+    listener = make_listener()
+    listener._ws = SentFrames()
+    listener.intercept_media(block_bodies=False)
+    listener.handle_message(paused("7", "https://cdn.example/a.mp4", "audio/mp4"))
+    assert listener.responses() == [("https://cdn.example/a.mp4", "audio/mp4")]
+    assert listener._ws.sent[-1] == {"id": 2, "method": "Fetch.continueRequest", "params": {"requestId": "7"}}
+
+
+def test_blocked_patterns():
+    patterns = network_capture.blocked_patterns(("fonts", "trackers", "video"))
+    assert "*.woff2*" in patterns
+    assert "*google-analytics.com*" in patterns
+    assert not any("jpg" in p for p in patterns)
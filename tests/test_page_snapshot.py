@@ -0,0 +1,92 @@
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("bs4")
+for name in ("selenium", "selenium.webdriver", "selenium.webdriver.common",
+             "selenium.webdriver.common.by", "selenium.webdriver.common.action_chains"):
+    sys.modules.setdefault(name, MagicMock())
+
+import page_snapshot
+import instagram_actions
+from page_snapshot import PageSnapshot
+
+POST_HTML = """<html><head>
+<title>Alice on Instagram</title>
+<meta property="og:title" content="Alice (@alice) on Instagram">
+<meta property="og:description" content="12 likes - A day at the beach">
+</head><body><main><article>
+<header><a href="/alice/">alice</a><a href="/explore/locations/1/">Beach</a></header>
+<time datetime="2024-05-01T10:00:00.000Z">May 1</time>
+<video src="https://cdn.example/clip.mp4" poster="https://cdn.example/poster.jpg"></video>
+<img alt="photo" srcset="https://cdn.example/small.jpg 320w, https://cdn.example/big.jpg 1080w">
+</article></main></body></html>"""
+
+
+@pytest.fixture(params=["html.parser", "lxml"])
+def parser(request, monkeypatch):
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+    monkeypatch.setattr(page_snapshot, "PARSER", request.param)
+    return request.param
+
+
+class CountingDriver:
+    """Driver stub that counts WebDriver page_source round trips."""
+
+    current_url = "https://www.instagram.com/p/ABC/"
+    title = "fallback title"
+
+    def __init__(self, html):
+        self._html = html
+        self.reads = 0
+
+    @property
+    def page_source(self):
+        self.reads += 1
+        return self._html
+
+
+def test_snapshot_accessors(parser):
+    page = PageSnapshot(html=POST_HTML)
+    assert page.url is None
+    assert page.title == "Alice on Instagram"
+    assert page.meta("og:title") == "Alice (@alice) on Instagram"
+    assert page.meta("og:image") is None
+    assert page.header_links() == ["/alice/", "/explore/locations/1/"]
+    assert page.find("time")["datetime"] == "2024-05-01T10:00:00.000Z"
+    assert [v["src"] for v in page.find_all("video")] == ["https://cdn.example/clip.mp4"]
+
+
+def test_snapshot_of_empty_page(parser):
+    page = PageSnapshot(html="")
+    assert page.title == ""
+    assert page.header_links() == []
+    assert page.find("time") is None
+
+
+def test_extractors_share_one_page_source_read(parser):
+    driver = CountingDriver(POST_HTML)
+    page = PageSnapshot(driver)
+    assert page.url == driver.current_url
+
+    assert instagram_actions.verify_post_owner(driver, "alice", snapshot=page)
+    assert not instagram_actions.verify_post_owner(driver, "bob", snapshot=page)
+    metadata = instagram_actions.extract_metadata(driver, snapshot=page)
+    media = instagram_actions.extract_media_from_post(driver, snapshot=page)
+
+    assert driver.reads == 1
+    assert metadata["date"] == "2024-05-01T10:00:00.000Z"
+    assert metadata["caption"] == "12 likes - A day at the beach"
+    assert [m["url"] for m in media][:2] == ["https://cdn.example/clip.mp4", "https://cdn.example/big.jpg"]
+
+
+def test_extractors_snapshot_the_page_themselves(parser):
+    driver = CountingDriver(POST_HTML)
+    instagram_actions.extract_metadata(driver)
+    instagram_actions.extract_media_from_post(driver)
+    assert driver.reads == 2
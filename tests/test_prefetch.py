@@ -0,0 +1,55 @@
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prefetch import Prefetcher
+
+
+def test_results_in_order_and_look_ahead_is_bounded():
+    fetched = []
+    lock = threading.Lock()
+
+    def fetch(item):
+        with lock:
+            fetched.append(item)
+        return item * 10
+
+    with Prefetcher(range(10), fetch, ahead=2) as prefetcher:
+        assert prefetcher.get(0) == 0
+        # Item 0 plus the two after it, nothing further
+        assert prefetcher._next == 3
+        assert [prefetcher.get(i) for i in range(1, 10)] == [i * 10 for i in range(1, 10)]
+    assert sorted(fetched) == list(range(10))
+
+
+def test_unwanted_items_are_not_fetched():
+    fetched = []
+
+    def fetch(item):
+        fetched.append(item["id"])
+        return item["id"]
+
+    items = [{"id": 0}, {"id": 1, "media": ["x"]}, {"id": 2}]
+    with Prefetcher(items, fetch, ahead=5, wanted=lambda item: not item.get("media")) as prefetcher:
+        assert [prefetcher.get(i) for i in range(3)] == [0, None, 2]
+    assert sorted(fetched) == [0, 2]
+
+
+def test_failed_fetch_returns_none():
+    def fetch(item):
+        if item == 1:
+            raise IOError("boom")
+        return item
+
+    with Prefetcher(range(3), fetch, ahead=1) as prefetcher:
+        assert [prefetcher.get(i) for i in range(3)] == [0, None, 2]
+
+
+def test_out_of_order_get_from_workers():
+    """Browser workers may ask for a later item before an earlier one."""
+    with Prefetcher(range(6), lambda item: item, ahead=1) as prefetcher:
+        assert prefetcher.get(4) == 4
+        assert prefetcher.get(1) == 1
+        assert prefetcher.get(5) == 5
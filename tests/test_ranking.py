@@ -0,0 +1,68 @@
+import os
+import sys
+import random
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ranking import TopK, TopKScan
+
+
+def test_topk_confirms_only_when_no_unscanned_item_can_displace():
+    top = TopK(2, total=4, key=lambda x: x)
+    top.add(50)
+    assert top.pop_confirmed() == []  # 3 posts left, any could beat it
+    top.add(10)
+    top.add(40)
+    # 1 post left: only the best kept post (rank 1) is safe
+    assert top.pop_confirmed() == [50]
+    top.add(45)
+    assert top.pop_confirmed() == [45]
+    assert top.pop_confirmed() == []
+
+
+def test_topk_matches_full_sort():
+    values = [random.randint(0, 30) for _ in range(200)]
+    top = TopK(15, total=len(values), key=lambda item: item[1])
+    out = []
+    for seq, value in enumerate(values):
+        top.add((seq, value))
+        out.extend(top.pop_confirmed())
+    expected = sorted(enumerate(values), key=lambda item: (-item[1], item[0]))[:15]
+    assert sorted(out, key=lambda item: (-item[1], item[0])) == expected
+    assert len(top._heap) <= 15
+
+
+def test_skipped_items_count_as_scanned():
+    top = TopK(1, total=2, key=lambda x: x)
+    top.add(3)
+    top.skip()
+    assert top.pop_confirmed() == [3]
+
+
+def test_scan_streams_winners_before_the_scan_ends():
+    release = threading.Event()
+    posts = list(range(6))
+
+    def scan(post):
+        if post == 5:
+            # The last post stays unscanned until the first winner is out
+            assert release.wait(5)
+        if post == 3:
+            raise IOError("boom")
+        return {"url": post, "likes": post * 10}
+
+    errors = []
+    scan_run = TopKScan(posts, scan, n=3, key=lambda det: det["likes"], max_workers=6, on_error=errors.append)
+    assert len(scan_run) == 3
+    it = iter(scan_run)
+    # With one post left, ranks 1-2 of the 3 kept posts are already certain
+    early = [next(it)["url"], next(it)["url"]]
+    assert sorted(early) == [2, 4]
+    release.set()
+    assert [det["url"] for det in it] == [5]
+    assert len(errors) == 1
+
+
+def test_scan_of_nothing():
+    assert list(TopKScan([], lambda post: post, n=5, key=lambda det: det)) == []
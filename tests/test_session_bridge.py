@@ -0,0 +1,127 @@
+import os
+import sys
+import stat
+import http.cookiejar
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import session_bridge
+
+STATE = {
+    "user_agent": "Mozilla/5.0 Test",
+    "cookies": [
+        {"name": "sessionid", "value": "s3cr3t", "domain": ".instagram.com", "path": "/", "expiry": 4102444800},
+        {"name": "csrftoken", "value": "tok", "domain": ".instagram.com", "path": "/"},
+    ],
+    "exported_at": 0,
+}
+
+
+class FakeSession:
+    """requests.Session stand-in: a real cookie jar with requests' set() signature."""
+
+    class Jar(http.cookiejar.CookieJar):
+        def set(self, name, value, domain="", path="/"):
+            self.set_cookie(http.cookiejar.Cookie(
+                0, name, value, None, False, domain, True, domain.startswith("."),
+                path, True, False, None, False, None, None, {}
+            ))
+
+    def __init__(self):
+        self.headers = {}
+        self.cookies = self.Jar()
+
+
+class FakeDriver:
+    current_url = "https://www.instagram.com/someone/"
+
+    def get_cookies(self):
+        return STATE["cookies"] + [{"name": "other", "value": "x", "domain": ".example.com"}]
+
+    def execute_script(self, script):
+        return STATE["user_agent"]
+
+
+def test_export_keeps_instagram_cookies():
+    state = session_bridge.export_cookies(FakeDriver())
+    assert [c["name"] for c in state["cookies"]] == ["sessionid", "csrftoken"]
+    assert state["user_agent"] == "Mozilla/5.0 Test"
+    assert session_bridge.is_logged_in(state)
+
+
+def test_is_logged_in():
+    assert not session_bridge.is_logged_in(None)
+    assert not session_bridge.is_logged_in({"cookies": [{"name": "csrftoken", "value": "tok"}]})
+    assert not session_bridge.is_logged_in(STATE, now=4102444801)
+
+
+def test_state_roundtrip_is_private(tmp_path):
+    path = str(tmp_path / "profile" / session_bridge.COOKIE_CACHE)
+    session_bridge.save_state(path, STATE)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert session_bridge.load_state(path) == STATE
+
+
+def test_load_state_rejects_missing_and_logged_out(tmp_path):
+    path = str(tmp_path / session_bridge.COOKIE_CACHE)
+    assert session_bridge.load_state(path) is None
+    session_bridge.save_state(path, {"cookies": []})
+    assert session_bridge.load_state(path) is None
+
+
+def test_apply_state():
+    session = session_bridge.apply_state(FakeSession(), STATE)
+    assert session.headers["User-Agent"] == "Mozilla/5.0 Test"
+    assert session.headers["X-CSRFToken"] == "tok"
+    assert {c.name: c.value for c in session.cookies} == {"sessionid": "s3cr3t", "csrftoken": "tok"}
+
+
+class BrowserTab:
+    """Driver stand-in holding a cookie store the test can rotate."""
+
+    def __init__(self, cookies, url="https://www.instagram.com/p/AAA/"):
+        self.cookies = {c["name"]: dict(c) for c in cookies}
+        self.current_url = url
+        self.added = []
+
+    def get_cookies(self):
+        return list(self.cookies.values())
+
+    def add_cookie(self, cookie):
+        self.added.append(cookie)
+        self.cookies[cookie["name"]] = cookie
+
+    def execute_script(self, script):
+        return "Mozilla/5.0 Test"
+
+
+def test_bridge_pulls_login_and_rotations():
+    tab = BrowserTab(STATE["cookies"] + [{"name": "cdn", "value": "x", "domain": ".cdninstagram.com"}])
+    session = FakeSession()
+    bridge = session_bridge.SessionBridge(tab, session)
+    assert session.headers["User-Agent"] == "Mozilla/5.0 Test"
+
+    assert bridge.sync() == (2, 0)
+    assert {c.name for c in session.cookies} == {"sessionid", "csrftoken"}
+    assert bridge.sync() == (0, 0)
+
+    tab.cookies["csrftoken"]["value"] = "rotated"
+    assert bridge.sync() == (1, 0)
+    assert session.headers["X-CSRFToken"] == "rotated"
+    assert tab.added == []
+
+
+def test_bridge_pushes_session_cookies_to_browser():
+    tab = BrowserTab(STATE["cookies"])
+    session = FakeSession()
+    bridge = session_bridge.SessionBridge(tab, session)
+    bridge.sync()
+
+    # An API response rotated a cookie on the session side
+    session.cookies.set("rur", "NEW", domain=".instagram.com")
+    tab.current_url = "about:blank"
+    assert bridge.sync() == (0, 0)  # can't set cookies off-site, retried later
+    tab.current_url = "https://www.instagram.com/someone/"
+    assert bridge.sync() == (0, 1)
+    assert tab.added[0]["name"] == "rur" and tab.added[0]["value"] == "NEW"
+    assert bridge.sync() == (0, 0)
@@ -0,0 +1,246 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import throttle
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_bucket_paces_after_burst():
+    clock = FakeClock()
+    bucket = throttle.TokenBucket(2.0, capacity=2, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    # Empty: the next token arrives after 1/rate seconds
+    assert bucket.acquire() == 0.5
+    assert clock.now == 0.5
+    assert not bucket.try_acquire()
+    clock.now += 10
+    assert bucket.try_acquire() and bucket.try_acquire() and not bucket.try_acquire()
+
+
+def test_per_minute_and_timeout():
+    clock = FakeClock()
+    bucket = throttle.TokenBucket.per_minute(30, clock=clock, sleep=clock.sleep)
+    assert bucket.rate == 0.5 and bucket.capacity == 1
+    bucket.acquire()
+    assert bucket.acquire(timeout=1.0) is None
+    assert clock.now == 0
+    assert bucket.acquire() == 2.0
+
+
+def test_bucket_is_shared_between_threads():
+    bucket = throttle.TokenBucket(1000.0, capacity=5)
+    taken = []
+
+    def worker():
+        for _ in range(20):
+            bucket.acquire()
+            taken.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(taken) == 80
+
+
+def test_pacer_deducts_time_spent_waiting():
+    clock = FakeClock()
+    pacer = throttle.Pacer(delays={"post": (2.0, 2.0)}, clock=clock, sleep=clock.sleep, rng=lambda lo, hi: hi)
+    started = clock()
+    clock.now += 0.5  # page took 0.5 s to become ready
+    assert pacer.pause("post", since=started) == 1.5
+    assert clock.now == 2.0
+    # A page slower than the budget gets no extra sleep
+    started = clock()
+    clock.now += 3.0
+    assert pacer.pause("post", since=started) == 0.0
+
+
+def test_pacer_scale():
+    clock = FakeClock()
+    pacer = throttle.Pacer(scale=0, clock=clock, sleep=clock.sleep)
+    assert pacer.pause("profile") == 0.0 and clock.now == 0
+    pacer.scale = 2
+    pacer.rng = lambda lo, hi: lo
+    assert pacer.pause("click") == 2 * throttle.Pacer.DEFAULT_DELAYS["click"][0]
+    assert pacer.pause("unknown") == 0.0
+
+
+def test_adaptive_concurrency_aimd():
+    clock = FakeClock()
+    limiter = throttle.AdaptiveConcurrency(initial=2, max_limit=4, cooldown=1.0, clock=clock)
+    # Additive increase: about +1 per window of healthy responses
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(ok=True, latency=0.1)
+    assert limiter.stats()["limit"] == 4
+    # A burst of failures from one window halves the limit once
+    for _ in range(3):
+        limiter.acquire()
+    for _ in range(3):
+        limiter.release(ok=False)
+    assert limiter.stats() == {"limit": 2, "in_flight": 0, "successes": 20, "failures": 3, "backoffs": 1}
+    clock.now += 2
+    limiter.acquire()
+    limiter.release(ok=False)
+    assert limiter.limit == 1
+    # Cache hits give no feedback
+    limiter.acquire()
+    limiter.release()
+    assert limiter.limit == 1
+
+
+def test_adaptive_concurrency_latency_spike():
+    limiter = throttle.AdaptiveConcurrency(initial=4, latency_factor=3.0, clock=FakeClock())
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release(ok=True, latency=0.2)
+    before = limiter.limit
+    limiter.acquire()
+    limiter.release(ok=True, latency=2.0)
+    assert limiter.limit == before / 2 and limiter.successes == 5
+
+
+def test_adaptive_concurrency_blocks_at_limit():
+    limiter = throttle.AdaptiveConcurrency(initial=1, max_limit=1)
+    limiter.acquire()
+    entered = threading.Event()
+
+    def second():
+        limiter.acquire()
+        entered.set()
+        limiter.release()
+
+    t = threading.Thread(target=second)
+    t.start()
+    assert not entered.wait(0.1)
+    limiter.release(ok=True)
+    assert entered.wait(2)
+    t.join()
+
+
+def test_rate_scheduler_classes():
+    clock = FakeClock()
+    scheduler = throttle.RateScheduler()
+    # Unconfigured classes are free
+    assert scheduler.acquire("api") == 0 and scheduler.acquire("media", 10 ** 9) == 0
+
+    scheduler.limit("media", throttle.TokenBucket(1000, capacity=1000, clock=clock, sleep=clock.sleep))
+    scheduler.total = throttle.TokenBucket(1.0, capacity=1, clock=clock, sleep=clock.sleep)
+    # Bigger than the burst: paid in installments at 1000 B/s
+    assert scheduler.acquire("media", 2500) == 1.5
+    # api and nav share the overall request budget, media doesn't touch it
+    assert scheduler.acquire("nav") == 0
+    assert scheduler.acquire("api") == 1.0
+    assert scheduler.waited == {"media": 1.5, "api": 1.0}
+
+    scheduler.limit("media", None)
+    assert scheduler.acquire("media", 5000) == 0
+    scheduler.reset()
+    assert scheduler.total is None and scheduler.waited == {}
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None):
+        self.status_code = status
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_retry_after_seconds():
+    assert throttle.retry_after_seconds("7") == 7.0
+    assert throttle.retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470) == 10.0
+    assert throttle.retry_after_seconds("soon") is None
+    assert throttle.retry_after_seconds(None) is None
+
+
+def test_retry_policy_honors_retry_after():
+    clock = FakeClock()
+    policy = throttle.RetryPolicy(attempts=3, sleep=clock.sleep, rng=lambda lo, hi: hi)
+    responses = [FakeResponse(429, {"Retry-After": "5"}), FakeResponse(503), FakeResponse(200)]
+    result = policy.call(lambda: responses.pop(0))
+    assert result.status_code == 200
+    # Retry-After, then exponential backoff (base 1s, second retry 2s)
+    assert clock.now == 5 + 2
+    assert policy.stats() == {"retries": 2, "give_ups": 0, "trips": 0}
+
+
+def test_retry_policy_gives_up():
+    clock = FakeClock()
+    policy = throttle.RetryPolicy(attempts=2, sleep=clock.sleep, rng=lambda lo, hi: 0)
+    assert policy.call(lambda: FakeResponse(500)).status_code == 500
+    # Client errors are final
+    assert policy.call(lambda: FakeResponse(404)).status_code == 404
+
+    def broken():
+        raise IOError("reset")
+
+    with pytest.raises(IOError):
+        policy.call(broken)
+    assert policy.stats() == {"retries": 2, "give_ups": 2, "trips": 0}
+
+
+def test_circuit_breaker_pauses_the_class():
+    clock = FakeClock()
+    breaker = throttle.CircuitBreaker(threshold=2, cooldown=30, clock=clock, sleep=clock.sleep)
+    policy = throttle.RetryPolicy(attempts=2, breaker=breaker, sleep=clock.sleep, rng=lambda lo, hi: 0)
+    policy.call(lambda: FakeResponse(503))
+    assert breaker.is_open and breaker.trips == 1
+    # The next request waits out the cooldown, then probes
+    assert policy.call(lambda: FakeResponse(200)).status_code == 200
+    assert clock.now == 30
+    assert not breaker.is_open and breaker.failures == 0
+
+
+def test_adaptive_concurrency_adopts_lasting_latency():
+    """A permanent latency rise without errors must not pin the limit at the floor."""
+    clock = FakeClock()
+    limiter = throttle.AdaptiveConcurrency(initial=4, max_limit=16, clock=clock)
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(ok=True, latency=0.2)
+    for _ in range(100):
+        clock.now += 0.5
+        limiter.acquire()
+        limiter.release(ok=True, latency=0.7)
+    assert limiter.backoffs <= 2
+    assert limiter.limit > 4
+
+
+def test_circuit_breaker_half_open_lets_one_probe_through():
+    clock = FakeClock()
+    breaker = throttle.CircuitBreaker(threshold=1, cooldown=30, clock=clock, sleep=clock.sleep)
+    breaker.record(False)
+    clock.now += 30
+    assert breaker.before() == 0  # the probe
+    passed = []
+    waiter = threading.Thread(target=lambda: passed.append(breaker.before()))
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive() and not passed
+    # Failed probe: the waiter sits out another cooldown, then probes itself
+    breaker.record(False)
+    waiter.join(2)
+    assert passed == [30] and clock.now == 60 and breaker.trips == 2
+    breaker.record(True)
+    assert not breaker.is_open and breaker.before() == 0
@@ -0,0 +1,400 @@
+"""
+Request pacing shared by every thread of a run.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second refill up to `capacity`.
+    acquire() blocks until a token is available, so a single bucket shared
+    by every browser, API and download thread enforces one global budget.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._stamp = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, rpm, burst=None, **kwargs):
+        """Bucket allowing `rpm` requests per minute, bursting up to `burst` (default: 1)."""
+        return cls(rpm / 60.0, capacity=burst or 1, **kwargs)
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def try_acquire(self, tokens=1):
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Takes `tokens`, waiting as long as needed (or up to `timeout` seconds).
+        Returns the time waited, or None on timeout.
+        """
+        started = self.clock()
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return self.clock() - started
+                wait = (tokens - self._tokens) / self.rate
+            if timeout is not None and self.clock() - started + wait > timeout:
+                return None
+            self.sleep(wait)
+
+
+class RateScheduler:
+    """
+    Every rate limit of a run in one place, per traffic class:
+    'api' (JSON endpoints, in requests), 'nav' (page loads, in requests) and
+    'media' (CDN transfers, in bytes). A class without a bucket is
+    unlimited. `total`, when set, is an extra bucket charged for every api
+    and nav request (the overall --rpm budget).
+    """
+
+    REQUEST_CLASSES = ("api", "nav")
+
+    def __init__(self):
+        self.buckets = {}
+        self.total = None
+        self.waited = {}  # class -> seconds spent waiting for tokens
+        self._lock = threading.Lock()
+
+    def limit(self, kind, bucket):
+        """Sets (or with None, removes) the bucket of a traffic class."""
+        if bucket is None:
+            self.buckets.pop(kind, None)
+        else:
+            self.buckets[kind] = bucket
+
+    def acquire(self, kind, amount=1):
+        """Blocks until `amount` units of `kind` may go out. Returns the time waited."""
+        waited = 0.0
+        bucket = self.buckets.get(kind)
+        if bucket:
+            # Larger than the burst (a big media chunk): taken in installments
+            while amount > 0:
+                part = min(amount, bucket.capacity)
+                waited += bucket.acquire(part)
+                amount -= part
+        if self.total and kind in self.REQUEST_CLASSES:
+            waited += self.total.acquire()
+        if waited:
+            with self._lock:
+                self.waited[kind] = self.waited.get(kind, 0.0) + waited
+        return waited
+
+    def reset(self):
+        self.buckets = {}
+        self.total = None
+        self.waited = {}
+
+
+def retry_after_seconds(value, now=None):
+    """Seconds asked for by a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+class CircuitBreaker:
+    """
+    Pauses a traffic class after `threshold` failures in a row.
+
+    While open, before() sleeps until `cooldown` has passed. The breaker is
+    then half-open: one caller goes through as a probe and the others keep
+    waiting for its outcome. A probe that fails trips the breaker again, one
+    that succeeds closes it.
+    """
+
+    def __init__(self, threshold=5, cooldown=30.0, clock=time.monotonic, sleep=time.sleep):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.sleep = sleep
+        self.failures = 0  # consecutive
+        self.trips = 0
+        self._open_until = None
+        self._probing = False
+        self._cond = threading.Condition()
+
+    @property
+    def is_open(self):
+        with self._cond:
+            return self._open_until is not None and self.clock() < self._open_until
+
+    def before(self):
+        """Blocks while the breaker is open or another probe is out. Returns the time paused."""
+        paused = 0.0
+        while True:
+            with self._cond:
+                if self._open_until is None:
+                    return paused
+                start = self.clock()
+                wait = self._open_until - start
+                if wait <= 0:
+                    if not self._probing:
+                        self._probing = True
+                        return paused
+                    if not self._cond.wait(self.cooldown):
+                        # The probe never reported back: let another one go
+                        self._probing = False
+                    paused += self.clock() - start
+                    continue
+            self.sleep(wait)
+            paused += wait
+
+    def record(self, ok):
+        with self._cond:
+            self._probing = False
+            self._cond.notify_all()
+            if ok:
+                self.failures = 0
+                self._open_until = None
+                return
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.trips += 1
+                self._open_until = self.clock() + self.cooldown
+
+
+class RetryPolicy:
+    """
+    Retries transient failures of one traffic class: network errors
+    (IOError, which requests exceptions are) and `retry_statuses`.
+    Waits what Retry-After asks for (capped at `max_delay`), else an
+    exponential backoff with full jitter, and goes through the class's
+    CircuitBreaker so a failing class is paused rather than hammered.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, attempts=4, base_delay=1.0, max_delay=60.0, breaker=None,
+                 retry_statuses=RETRY_STATUSES, sleep=time.sleep, rng=random.uniform):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.retry_statuses = retry_statuses
+        self.sleep = sleep
+        self.rng = rng
+        self.retries = 0
+        self.give_ups = 0
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt, response=None):
+        """Delay before retry number `attempt` (1-based)."""
+        headers = getattr(response, "headers", None) or {}
+        asked = retry_after_seconds(headers.get("Retry-After"))
+        if asked is not None:
+            return min(asked, self.max_delay)
+        return self.rng(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, send):
+        """
+        Runs send() -> response until it isn't a retryable failure or the
+        attempts run out. Returns the last response (the caller still sees a
+        final 429/5xx) or re-raises the last network error.
+        """
+        for attempt in range(1, self.attempts + 1):
+            if self.breaker:
+                self.breaker.before()
+            response = None
+            try:
+                response = send()
+            except IOError:
+                failed = True
+                if attempt == self.attempts:
+                    self._failed(True)
+                    raise
+            else:
+                failed = response.status_code in self.retry_statuses
+            if self.breaker:
+                self.breaker.record(not failed)
+            if not failed:
+                return response
+            if attempt == self.attempts:
+                self._failed(False)
+                return response
+            with self._lock:
+                self.retries += 1
+            delay = self.backoff(attempt, response)
+            if response is not None and hasattr(response, "close"):
+                response.close()
+            self.sleep(delay)
+
+    def _failed(self, network_error):
+        if network_error and self.breaker:
+            self.breaker.record(False)
+        with self._lock:
+            self.give_ups += 1
+
+    def stats(self):
+        return {
+            "retries": self.retries,
+            "give_ups": self.give_ups,
+            "trips": self.breaker.trips if self.breaker else 0,
+        }
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on how many requests a fan-out stage keeps in flight.
+
+    Every healthy response grows the limit by 1/limit (about +1 per round
+    trip of the whole window); a throttled one (429/5xx, network error) or
+    a latency spike - `latency_factor` times the running average of
+    latencies, which spikes only nudge - multiplies it by `decrease`, at
+    most once per `cooldown` seconds so one burst of failures from a full
+    window counts once.
+
+        limiter.acquire()
+        ... request ...
+        limiter.release(ok=..., latency=...)
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=16, decrease=0.5, latency_factor=3.0,
+                 cooldown=1.0, clock=time.monotonic):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.clock = clock
+        self.in_flight = 0
+        self.successes = 0
+        self.backoffs = 0
+        self.failures = 0
+        self.baseline = None  # EWMA of healthy latencies
+        self._last_backoff = None
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Blocks until fewer than int(limit) requests are in flight."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, ok=None, latency=None):
+        """
+        Frees a slot. `ok` is the outcome (None: no feedback, e.g. a cache
+        hit), `latency` the request's duration in seconds.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if ok is not None:
+                spike = (ok and latency is not None and self.baseline is not None
+                         and latency > self.baseline * self.latency_factor)
+                if ok and latency is not None:
+                    # Spikes move the baseline too, only slower, so a lasting
+                    # rise in latency becomes the new normal instead of an
+                    # endless series of back-offs
+                    weight = 0.05 if spike else 0.2
+                    self.baseline = latency if self.baseline is None else (1 - weight) * self.baseline + weight * latency
+                if ok and not spike:
+                    self.successes += 1
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                else:
+                    self.failures += not ok
+                    self._back_off()
+            self._cond.notify_all()
+
+    def _back_off(self):
+        now = self.clock()
+        if self._last_backoff is not None and now - self._last_backoff < self.cooldown:
+            return
+        self._last_backoff = now
+        self.backoffs += 1
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "successes": self.successes,
+                "failures": self.failures,
+                "backoffs": self.backoffs,
+            }
+
+
+class Pacer:
+    """
+    Randomized anti-bot delays, kept apart from readiness waits.
+
+    Each kind of action has a (min, max) delay budget counted from when the
+    action started. Time already spent waiting for the page is deducted, so
+    a slow page isn't followed by a fixed extra sleep, and a fast one still
+    doesn't trigger the next action instantly. `scale` stretches every
+    budget (0 turns pacing off and leaves only the readiness waits).
+    """
+
+    DEFAULT_DELAYS = {
+        "profile": (1.5, 3.0),  # profile page opened
+        "post": (1.0, 2.5),     # post page opened
+        "scroll": (0.8, 2.0),   # one scroll step of the grid
+        "click": (0.2, 0.5),    # UI interaction (unmute...)
+        "scan": (0.05, 0.2),    # pre-scan API request
+        "feed_page": (0.5, 1.5),  # next page of the feed API
+    }
+
+    def __init__(self, delays=None, scale=1.0, clock=time.monotonic, sleep=time.sleep, rng=random.uniform):
+        self.delays = dict(self.DEFAULT_DELAYS, **(delays or {}))
+        self.scale = scale
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng
+
+    def budget(self, kind):
+        low, high = self.delays.get(kind, (0.0, 0.0))
+        return self.rng(low, high) * self.scale
+
+    def pause(self, kind, since=None):
+        """
+        Sleeps what's left of a fresh `kind` budget, counting from `since`
+        (a clock() reading taken when the action started). Returns the sleep.
+        """
+        delay = self.budget(kind)
+        if since is not None:
+            delay -= self.clock() - since
+        if delay <= 0:
+            return 0.0
+        self.sleep(delay)
+        return delay
+
+
+# Process-wide policies; main configures them from the command line
+SCHEDULER = RateScheduler()
+PACER = Pacer()
+# Retries per traffic class (page loads have no status to retry on)
+RETRY = {
+    "api": RetryPolicy(breaker=CircuitBreaker()),
+    "media": RetryPolicy(breaker=CircuitBreaker()),
+}